@@ -1,5 +1,6 @@
 import { NextRequest, NextResponse } from "next/server";
 import { createClient } from "@/lib/supabase/server";
+import { MLSpendCell } from "@/types/insight";
 
 const ML_SERVICE_URL = process.env.ML_SERVICE_URL || "http://127.0.0.1:8000";
 
@@ -20,27 +21,51 @@ export async function POST(request: NextRequest) {
     const threeMonthsAgo = new Date();
     threeMonthsAgo.setMonth(threeMonthsAgo.getMonth() - 3);
 
-    const { data: transactions, error: txError } = await supabase
-      .from("transactions")
-      .select("date, amount, category, time_slot")
-      .eq("user_id", user.id)
-      .eq("is_deleted", false)
-      .gte("date", threeMonthsAgo.toISOString().split("T")[0])
-      .order("date", { ascending: false });
+    const since = threeMonthsAgo.toISOString().split("T")[0];
+    let response: Response;
 
-    if (txError) {
-      throw txError;
-    }
+    if (process.env.ML_SERVICE_AGGREGATES === "true") {
+      // Send (month, category, time_slot) totals instead of every transaction
+      const { data: cells, error: cellsError } = await supabase.rpc(
+        "get_spend_cells",
+        { p_start: since }
+      );
 
-    // Call ML service
-    const response = await fetch(`${ML_SERVICE_URL}/coaching/message`, {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({
-        user_id: user.id,
-        transactions: transactions || [],
-      }),
-    });
+      if (cellsError) {
+        throw cellsError;
+      }
+
+      response = await fetch(`${ML_SERVICE_URL}/coaching/message/aggregated`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({
+          user_id: user.id,
+          cells: (cells as MLSpendCell[]) || [],
+        }),
+      });
+    } else {
+      const { data: transactions, error: txError } = await supabase
+        .from("transactions")
+        .select("date, amount, category, time_slot")
+        .eq("user_id", user.id)
+        .eq("is_deleted", false)
+        .gte("date", since)
+        .order("date", { ascending: false });
+
+      if (txError) {
+        throw txError;
+      }
+
+      // Call ML service
+      response = await fetch(`${ML_SERVICE_URL}/coaching/message`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({
+          user_id: user.id,
+          transactions: transactions || [],
+        }),
+      });
+    }
 
     if (!response.ok) {
       const errorText = await response.text();
@@ -1,7 +1,7 @@
 import { NextResponse } from "next/server";
 import { createClient } from "@/lib/supabase/server";
 import { mlApiClient } from "@/lib/ml/client";
-import { MLInsightRequest } from "@/types/insight";
+import { MLInsightRequest, MLInsightResponse } from "@/types/insight";
 import { Transaction } from "@/types/transaction";
 
 /**
@@ -19,62 +19,72 @@ export async function POST() {
       return NextResponse.json({ error: "Unauthorized" }, { status: 401 });
     }
 
-    // Fetch user's transactions (last 3 months)
-    const threeMonthsAgo = new Date();
-    threeMonthsAgo.setMonth(threeMonthsAgo.getMonth() - 3);
-
-    const { data: transactions, error: transError } = await supabase
-      .from("transactions")
-      .select("*")
-      .eq("user_id", user.id)
-      .gte("date", threeMonthsAgo.toISOString().split("T")[0])
-      .order("date", { ascending: false });
-
-    if (transError) {
-      return NextResponse.json(
-        { error: "Failed to fetch transactions" },
-        { status: 500 }
-      );
+    let mlResponse: MLInsightResponse;
+
+    if (process.env.ML_SERVICE_FETCH === "true") {
+      // ML service reads transactions and budgets itself; only the user id is sent
+      mlResponse = await mlApiClient.generateInsightsByUser({
+        user_id: user.id,
+        months: 3,
+      });
+    } else {
+      // Fetch user's transactions (last 3 months)
+      const threeMonthsAgo = new Date();
+      threeMonthsAgo.setMonth(threeMonthsAgo.getMonth() - 3);
+
+      const { data: transactions, error: transError } = await supabase
+        .from("transactions")
+        .select("*")
+        .eq("user_id", user.id)
+        .gte("date", threeMonthsAgo.toISOString().split("T")[0])
+        .order("date", { ascending: false });
+
+      if (transError) {
+        return NextResponse.json(
+          { error: "Failed to fetch transactions" },
+          { status: 500 }
+        );
+      }
+
+      if (!transactions || transactions.length === 0) {
+        return NextResponse.json(
+          { error: "Not enough transaction data" },
+          { status: 400 }
+        );
+      }
+
+      // Fetch current month budgets
+      const currentMonth = new Date().toISOString().slice(0, 7);
+      const { data: budgets } = await supabase
+        .from("budgets")
+        .select("*")
+        .eq("user_id", user.id)
+        .eq("month", currentMonth);
+
+      const budgetMap = budgets?.reduce<Record<string, number>>(
+        (acc: Record<string, number>, b: { category: string; amount: number }) => {
+          acc[b.category] = b.amount;
+          return acc;
+        },
+        {}
+      ) || {};
+
+      // Prepare request for ML service
+      const mlRequest: MLInsightRequest = {
+        user_id: user.id,
+        transactions: transactions.map((t: Transaction) => ({
+          date: t.date,
+          amount: t.amount,
+          category: t.category,
+          description: t.description,
+        })),
+        current_month_budget: budgetMap,
+      };
+
+      // Call ML service
+      mlResponse = await mlApiClient.generateInsights(mlRequest);
     }
 
-    if (!transactions || transactions.length === 0) {
-      return NextResponse.json(
-        { error: "Not enough transaction data" },
-        { status: 400 }
-      );
-    }
-
-    // Fetch current month budgets
-    const currentMonth = new Date().toISOString().slice(0, 7);
-    const { data: budgets } = await supabase
-      .from("budgets")
-      .select("*")
-      .eq("user_id", user.id)
-      .eq("month", currentMonth);
-
-    const budgetMap = budgets?.reduce<Record<string, number>>(
-      (acc: Record<string, number>, b: { category: string; amount: number }) => {
-        acc[b.category] = b.amount;
-        return acc;
-      },
-      {}
-    ) || {};
-
-    // Prepare request for ML service
-    const mlRequest: MLInsightRequest = {
-      user_id: user.id,
-      transactions: transactions.map((t: Transaction) => ({
-        date: t.date,
-        amount: t.amount,
-        category: t.category,
-        description: t.description,
-      })),
-      current_month_budget: budgetMap,
-    };
-
-    // Call ML service
-    const mlResponse = await mlApiClient.generateInsights(mlRequest);
-
     // Save insights to database
     const insightsToInsert = mlResponse.insights.map((insight) => ({
       user_id: user.id,
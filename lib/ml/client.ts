@@ -3,7 +3,13 @@
  * Handles communication with the Python ML microservice
  */
 
-import { MLInsightRequest, MLInsightResponse } from "@/types/insight";
+import {
+  MLDashboardRequest,
+  MLDashboardResponse,
+  MLInsightByUserRequest,
+  MLInsightRequest,
+  MLInsightResponse,
+} from "@/types/insight";
 
 const ML_API_URL =
   process.env.NEXT_PUBLIC_ML_API_URL || "http://localhost:8000";
@@ -50,6 +56,66 @@ export class MLApiClient {
     }
   }
 
+  /**
+   * Generate AI insights with the ML service fetching transactions itself
+   * (only the user id and date window are sent)
+   */
+  async generateInsightsByUser(
+    request: MLInsightByUserRequest
+  ): Promise<MLInsightResponse> {
+    try {
+      const response = await fetch(`${this.baseUrl}/predict/insights/by-user`, {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+          "X-API-Key": this.apiKey,
+        },
+        body: JSON.stringify(request),
+      });
+
+      if (!response.ok) {
+        const error = await response.json();
+        throw new Error(error.detail || "Failed to generate insights");
+      }
+
+      const data = await response.json();
+      return data as MLInsightResponse;
+    } catch (error) {
+      console.error("ML API Error:", error);
+      throw error;
+    }
+  }
+
+  /**
+   * Insights, coaching message and peer comparison in one request
+   * (the transactions are parsed and aggregated once)
+   */
+  async getDashboard(
+    request: MLDashboardRequest
+  ): Promise<MLDashboardResponse> {
+    try {
+      const response = await fetch(`${this.baseUrl}/predict/dashboard`, {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+          "X-API-Key": this.apiKey,
+        },
+        body: JSON.stringify(request),
+      });
+
+      if (!response.ok) {
+        const error = await response.json();
+        throw new Error(error.detail || "Failed to generate dashboard");
+      }
+
+      const data = await response.json();
+      return data as MLDashboardResponse;
+    } catch (error) {
+      console.error("ML API Error:", error);
+      throw error;
+    }
+  }
+
   /**
    * Health check for ML service
    */
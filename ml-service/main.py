@@ -3,14 +3,26 @@ FastAPI ML Service
 Main application for AI-powered spending insights
 """
 
-from fastapi import FastAPI, HTTPException
+import asyncio
+import hmac
+import threading
+import time
+import uuid
+
+_IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Dict, Optional, Any
-from datetime import datetime
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from pydantic import BaseModel, Field, ValidationError
+from typing import Any, Callable, List, Dict, Optional
+from contextlib import nullcontext
+from dataclasses import replace
+from datetime import date, datetime
+import calendar
 import sys
 import os
-import numpy as np
 import pandas as pd
 
 # Add parent directory to path
@@ -18,14 +30,63 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from pipeline.data_loader import get_data_loader
 from pipeline.preprocessor import get_preprocessor
-from models.clustering import get_cluster_model
+from models.clustering import SpendingClusterModel
 from models.trend import get_trend_analyzer
 from models.overspending import get_overspending_predictor
-from models.coaching import generate_coaching_message, CoachingMessage
+from models.registry import ModelBundle, get_model_registry
+from models.anomaly import AnomalyDetector, anomaly_insight, flag_frame
+from models.forecast import project_month_end
+from models.coaching import (
+    analyze_spending_matrix,
+    coaching_message_from_patterns,
+    generate_coaching_message,
+    CoachingMessage,
+)
 from models.peer_comparison import (
     generate_peer_comparison_message,
+    peer_comparison_from_totals,
     PeerComparisonMessage,
 )
+from pipeline.aggregates import (
+    AggregateStore, SpendMatrix, check_iso_dates, lock_checkpoint, month_key, shift_month,
+)
+from pipeline.columnar import ColumnarError, parse_columnar_body
+from pipeline.insights import build_insights, build_insights_from_totals, INSIGHTS_ENDPOINT
+from pipeline.transaction_store import create_transaction_store
+from monitoring.metrics import (
+    REGISTRY,
+    MetricsMiddleware,
+    observe_transactions,
+    stage_timer,
+)
+from monitoring.profiling import REQUEST_TIMINGS, ProfilingMiddleware
+from serving.admission import AdmissionControlMiddleware, AdmissionLimiter
+from serving.responses import NumpyJSONResponse
+from serving.singleflight import SingleFlight, fingerprint
+from serving.retrain_scheduler import RetrainScheduler, replace_model_file
+from monitoring.startup import BOOT_TIMER, Readiness, startup_profile_enabled
+
+BOOT_TIMER.record("imports", time.perf_counter() - _IMPORT_STARTED)
+
+COACHING_ENDPOINT = "/coaching/message"
+PEER_COMPARISON_ENDPOINT = "/coaching/peer-comparison"
+INGEST_ENDPOINT = "/ingest/transactions"
+DASHBOARD_ENDPOINT = "/predict/dashboard"
+
+# Endpoints doing per-transaction work get their own admission limiter;
+# health checks, metrics and the pre-aggregated endpoints are never queued
+ADMISSION_ENDPOINTS = (
+    INSIGHTS_ENDPOINT,
+    "/predict/insights/by-user",
+    "/predict/insights/columnar",
+    COACHING_ENDPOINT,
+    "/coaching/message/columnar",
+    PEER_COMPARISON_ENDPOINT,
+    "/coaching/peer-comparison/columnar",
+    DASHBOARD_ENDPOINT,
+    "/predict/dashboard/columnar",
+)
+ADMISSION_LIMITERS = {path: AdmissionLimiter() for path in ADMISSION_ENDPOINTS}
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -34,6 +95,9 @@ app = FastAPI(
     version="1.0.0",
 )
 
+# Bounded concurrency + load shedding (innermost, so 429/503 still get CORS headers)
+app.add_middleware(AdmissionControlMiddleware, limiters=ADMISSION_LIMITERS)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -43,23 +107,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request counts, errors, latency and payload size for every endpoint
+app.add_middleware(MetricsMiddleware)
+
+# Opt-in Server-Timing / cProfile for single requests (X-Profile + X-API-Key)
+app.add_middleware(ProfilingMiddleware)
+
 
-# Helper function to convert numpy types to Python native types
-def convert_numpy_types(obj: Any) -> Any:
-    """Convert numpy types to Python native types for JSON serialization"""
-    if isinstance(obj, np.integer):
-        return int(obj)
-    elif isinstance(obj, np.floating):
-        return float(obj)
-    elif isinstance(obj, np.bool_):
-        return bool(obj)
-    elif isinstance(obj, np.ndarray):
-        return obj.tolist()
-    elif isinstance(obj, dict):
-        return {key: convert_numpy_types(value) for key, value in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_numpy_types(item) for item in obj]
-    return obj
+# YYYY-MM-DD with a valid month and day number; ingested dates are stored by month
+ISO_DATE_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])-(0[1-9]|[12]\d|3[01])"
 
 
 # Pydantic models for request/response
@@ -77,12 +133,96 @@ class InsightRequest(BaseModel):
     current_month_budget: Dict[str, float]
 
 
+class Insight(BaseModel):
+    type: str
+    severity: str  # 'critical', 'warning' or 'info'
+    title: str
+    description: str
+    suggested_action: str
+    potential_savings: Optional[float] = None
+    category: Optional[str] = None
+
+
+class PersonaResult(BaseModel):
+    cluster_id: int
+    persona_name: str
+    persona_icon: str
+    description: str
+    strengths: List[str]
+    tips: List[str]
+    typicality_score: float
+    is_typical: bool
+
+
+class TrendResult(BaseModel):
+    trend_type: str
+    trend_label: str
+    emoji: str
+    slope: float
+    percent_change: float
+    r_squared: float
+    is_significant: bool
+    average: float
+    current: float
+    previous: float
+    mom_change: float
+    volatility: float
+
+
+class NextMonthForecast(BaseModel):
+    prediction: float
+    lower: float
+    upper: float
+    method: str
+
+
+class TrendResults(BaseModel):
+    overall: Optional[TrendResult] = None
+    next_month: Optional[NextMonthForecast] = None
+
+
+class CategoryRisk(BaseModel):
+    risk_score: float
+    risk_level: str
+    risk_label: str
+    emoji: str
+    spent: float
+    budget: float
+    remaining: float
+    spent_percentage: float
+    projected_total: float
+    projected_over: float
+    projected_lower: Optional[float] = None  # Prediction interval of projected_total
+    projected_upper: Optional[float] = None  # (only when daily spend was available)
+    risk_factors: List[str]
+
+
+class OverspendingRisks(BaseModel):
+    overall_risk_score: float
+    overall_risk_level: str
+    overall_risk_label: str
+    overall_emoji: str
+    overall_message: str
+    high_risk_categories: List[str]
+    category_risks: Dict[str, CategoryRisk]
+    days_remaining: int
+
+
+class SimilarPeers(BaseModel):
+    k: int
+    mean_distance: float
+    spending_ratios: Dict[str, float]  # Peers' mean share of spending (%) per category
+    user_spending_ratios: Dict[str, float]
+    persona_share: Dict[str, float]
+
+
 class InsightResponse(BaseModel):
     user_id: str
-    insights: List[Dict]
-    persona: Optional[Dict] = None
-    trends: Optional[Dict] = None
-    overspending_risks: Optional[Dict] = None
+    insights: List[Insight]
+    persona: Optional[PersonaResult] = None
+    similar_peers: Optional[SimilarPeers] = None
+    trends: Optional[TrendResults] = None
+    overspending_risks: Optional[OverspendingRisks] = None
 
 
 # Coaching Request/Response Models
@@ -115,52 +255,505 @@ class PeerComparisonResponse(BaseModel):
     comparison: Dict
 
 
+# Pre-aggregated input: one cell per (month, category, time_slot)
+class SpendCell(BaseModel):
+    month: str = Field(pattern=r"^\d{4}-\d{2}$")  # YYYY-MM
+    category: str
+    time_slot: Optional[str] = None
+    amount: float
+    count: int = 1
+
+
+class InsightAggregateRequest(BaseModel):
+    user_id: str
+    cells: List[SpendCell]
+    current_month_budget: Dict[str, float]
+
+
+class CoachingAggregateRequest(BaseModel):
+    user_id: str
+    cells: List[SpendCell]
+
+
+class PeerComparisonAggregateRequest(BaseModel):
+    user_id: str
+    birth_year: int
+    cells: List[SpendCell]
+    period: Optional[str] = None  # defaults to current month
+
+
+class InsightByUserRequest(BaseModel):
+    user_id: str
+    start_date: Optional[str] = None  # YYYY-MM-DD, defaults to `months` before end_date
+    end_date: Optional[str] = None  # YYYY-MM-DD, defaults to today
+    months: int = 3
+    current_month_budget: Optional[Dict[str, float]] = None  # Defaults to the budgets table
+
+
+class DeltaTransaction(BaseModel):
+    id: str
+    date: str = Field(pattern=ISO_DATE_PATTERN)  # YYYY-MM-DD (a time part may follow)
+    amount: float
+    category: str
+    description: Optional[str] = None
+    merchant: Optional[str] = None
+    time_slot: Optional[str] = None
+    is_deleted: bool = False  # Soft delete (003_add_soft_delete.sql)
+
+
+class IngestRequest(BaseModel):
+    user_id: str
+    transactions: List[DeltaTransaction] = []  # New or updated rows
+    deleted_ids: List[str] = []
+
+
+class IngestedInsightRequest(BaseModel):
+    user_id: str
+    months: int = 3  # Calendar months analysed, including the current one
+    current_month_budget: Dict[str, float] = {}
+
+
+# Dashboard: insights, coaching and peer comparison of one transaction list
+class DashboardTransaction(BaseModel):
+    date: str
+    amount: float
+    category: str
+    description: Optional[str] = None
+    merchant: Optional[str] = None
+    time_slot: Optional[str] = None
+
+
+class DashboardRequest(BaseModel):
+    user_id: str
+    transactions: List[DashboardTransaction]
+    current_month_budget: Dict[str, float] = {}
+    birth_year: Optional[int] = None  # Peer comparison is skipped without it
+    period: Optional[str] = None  # Peer comparison month (YYYY-MM), defaults to current month
+
+
+class DashboardResponse(BaseModel):
+    user_id: str
+    insights: InsightResponse
+    coaching: Dict
+    peer_comparison: Optional[Dict] = None
+
+
+class ReloadRequest(BaseModel):
+    source: str = "file"  # "file" or "retrain"
+    model_file: Optional[str] = None  # File name inside saved_models/
+
+
 # Global variables for models
 data_loader = None
-preprocessor = None
-cluster_model = None
-trend_analyzer = None
-overspending_predictor = None
 
+# Pooled reader for /predict/insights/by-user (None when no database is configured)
+transaction_store = None
+
+# Fitted components are served from immutable bundles; requests pin one at entry
+MODEL_REGISTRY = get_model_registry()
+MODEL_PATH = "saved_models/clustering_model.joblib"
+
+# Seconds between checks of MODEL_PATH for a new model file (0 disables)
+MODEL_WATCH_INTERVAL = float(os.getenv("ML_MODEL_WATCH_INTERVAL", "0"))
+
+# Seconds between persona refits from the transactions store (0 disables)
+RETRAIN_INTERVAL = float(os.getenv("ML_RETRAIN_INTERVAL", "0"))
+TRANSACTIONS_DB_URL = os.getenv("ML_TRANSACTIONS_DB_URL", os.getenv("DATABASE_URL"))
+DB_POOL_SIZE = int(os.getenv("ML_DB_POOL_SIZE", "10"))
+
+# Per-user (month x category x time_slot) aggregates fed by /ingest/transactions
+AGGREGATES = AggregateStore(retain_months=int(os.getenv("ML_AGGREGATE_RETAIN_MONTHS", "13")))
+AGGREGATE_CHECKPOINT_PATH = os.getenv("ML_AGGREGATE_CHECKPOINT_PATH", "data/.cache/aggregates.json.gz")
+AGGREGATE_CHECKPOINT_INTERVAL = float(os.getenv("ML_AGGREGATE_CHECKPOINT_INTERVAL", "60"))
+# Lock on the checkpoint held by the one worker that owns the aggregates (None elsewhere)
+_aggregate_owner_lock = None
+
+# Running per-user purchase baselines that score ingested transactions as they arrive
+# (checkpointed with the aggregates, by the same owner worker)
+ANOMALIES = AnomalyDetector(max_users=int(os.getenv("ML_ANOMALY_MAX_USERS", "10000")))
+ANOMALY_CHECKPOINT_PATH = os.getenv("ML_ANOMALY_CHECKPOINT_PATH", "data/.cache/anomaly_baselines.json.gz")
+
+# Concurrent identical requests (same path, body and model version) share one computation
+SINGLE_FLIGHT = SingleFlight()
+
+# Components reported by /ready
+READINESS = Readiness(["cluster_model", "trend_analyzer", "overspending_predictor", "warmup"])
+
+# Background tasks (kept referenced so they are not garbage collected)
+_startup_task = None
+_watch_task = None
+_retrain_task = None
+_checkpoint_task = None
+
+# Set by serving.prefork when models were loaded before forking workers
+PRELOADED = False
+
+# Serializes training, reloads, the file watcher and scheduled retrains
+_reload_lock = threading.RLock()
+_loaded_model_mtime = None
+
+
+def _warmup_transactions() -> List[Dict]:
+    """Small synthetic history spanning the current and two previous months"""
+    now = datetime.now()
+    transactions = []
+    for months_back, scale in ((2, 1.0), (1, 1.1), (0, 0.6)):
+        year, month = now.year, now.month - months_back
+        if month <= 0:
+            year, month = year - 1, month + 12
+        for day, category, amount, time_slot in (
+            (1, "food", 9000, "점심"),
+            (3, "transport", 1400, "아침"),
+            (5, "shopping", 32000, "저녁"),
+            (8, "entertainment", 15000, "밤"),
+            (10, "food", 6500, "야식"),
+        ):
+            # Keep current-month dates in the past
+            if months_back == 0:
+                day = min(day, now.day)
+            transactions.append(
+                {
+                    "date": f"{year:04d}-{month:02d}-{day:02d}",
+                    "amount": amount * scale,
+                    "category": category,
+                    "description": "warmup",
+                    "time_slot": time_slot,
+                }
+            )
+    return transactions
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize models on startup"""
-    global data_loader, preprocessor, cluster_model, trend_analyzer, overspending_predictor
 
-    print("🚀 Starting ML Service...")
+def warmup(bundle: ModelBundle):
+    """
+    Run one synthetic request through every endpoint pipeline
 
-    # Initialize components
-    data_loader = get_data_loader()
-    preprocessor = get_preprocessor()
-    trend_analyzer = get_trend_analyzer()
-    overspending_predictor = get_overspending_predictor()
+    Triggers lazy imports (scipy, sklearn predict paths), pandas code paths
+    and the cohort stats cache before real traffic arrives.
 
+    Args:
+        bundle: Models to exercise (may not be published yet)
+    """
+    transactions = _warmup_transactions()
+    build_insights(
+        transactions,
+        {"food": 300000, "transport": 50000, "shopping": 100000, "entertainment": 50000},
+        data_loader=data_loader,
+        preprocessor=bundle.preprocessor,
+        cluster_model=bundle.cluster_model,
+        trend_analyzer=bundle.trend_analyzer,
+        overspending_predictor=bundle.overspending_predictor,
+    )
+    df = pd.DataFrame(transactions)
+    generate_coaching_message(df, "warmup")
+    generate_peer_comparison_message(
+        user_id="warmup",
+        user_birth_year=2003,
+        user_transactions=df,
+        cohort_stats=None,
+        period=datetime.now().strftime("%Y-%m"),
+    )
+
+
+def _model_file_mtime() -> Optional[float]:
     try:
-        # Load or train models
-        print("📊 Loading dataset...")
+        return os.stat(MODEL_PATH).st_mtime
+    except OSError:
+        return None
+
+
+def train_cluster_model(preprocessor, stage=None) -> SpendingClusterModel:
+    """
+    Train a new clustering model on the dataset and save it to MODEL_PATH
+
+    The dataset's spend statistics are saved with the model as the
+    reference for the preprocessor's high-spend flags.
+
+    Args:
+        preprocessor: SpendingPreprocessor used for feature engineering
+        stage: Optional context manager factory timing each step by name
+
+    Returns:
+        Newly fitted SpendingClusterModel (never the published instance)
+    """
+    stage = stage or (lambda name: nullcontext())
+
+    # Load or train models
+    print("📊 Loading dataset...")
+    with stage("load_dataset"):
         df = data_loader.load_dataset()
 
-        # Engineer features
-        print("🔧 Engineering features...")
+    # Engineer features (high-spend flags use the dataset as reference)
+    print("🔧 Engineering features...")
+    with stage("engineer_features"):
+        preprocessor = preprocessor.fit_reference(df)
         df_eng = preprocessor.engineer_features(df)
 
-        # Prepare features for clustering
-        print("🤖 Training clustering model...")
+    # Prepare features for clustering
+    print("🤖 Training clustering model...")
+    with stage("train_clustering"):
         X_cluster = preprocessor.prepare_for_clustering(df_eng)
 
         # Train clustering model
-        cluster_model = get_cluster_model()
-        cluster_model.fit(X_cluster)
+        model = SpendingClusterModel()
+        model.fit(X_cluster)
+        model.feature_reference = preprocessor.reference
 
-        # Save models
-        cluster_model.save()
+    # "Students like you" index over the same rows, saved with the model
+    with stage("build_peer_index"):
+        model.build_peer_index(X_cluster)
 
-        print("✅ ML Service ready!")
+    # Save models
+    with stage("save_model"):
+        model.save(MODEL_PATH)
+
+    return model
+
+
+def load_published_model() -> Optional[SpendingClusterModel]:
+    """
+    The model saved at MODEL_PATH, if it is complete
+
+    Models saved before reference statistics and the peer index were stored
+    with the model are ignored (None), so startup retrains them.
+    """
+    if not os.path.exists(MODEL_PATH):
+        return None
+    model = SpendingClusterModel.load(MODEL_PATH)
+    if not model.is_fitted or model.feature_reference is None or model.peer_index is None:
+        print(f"⚠️ {MODEL_PATH} predates the current model format, retraining")
+        return None
+    return model
+
+
+def load_models():
+    """
+    Load the clustering model and warm up the pipelines
+
+    The published model file (e.g. an accepted scheduled retrain) is served
+    as is; the model is only trained from the dataset when there is no
+    usable file. Runs in a worker thread so the event loop can answer
+    /health and /ready meanwhile. Failures are recorded in READINESS
+    instead of raised.
+    """
+    global _loaded_model_mtime
 
+    bundle = MODEL_REGISTRY.current()
+    READINESS.mark("cluster_model", "loading")
+    try:
+        with _reload_lock:
+            with BOOT_TIMER.stage("load_model"):
+                model = load_published_model()
+            source = "file"
+            if model is None:
+                model = train_cluster_model(bundle.preprocessor, stage=BOOT_TIMER.stage)
+                source = "startup"
+            bundle = MODEL_REGISTRY.publish(
+                bundle.preprocessor.with_reference(model.feature_reference),
+                model,
+                bundle.trend_analyzer,
+                bundle.overspending_predictor,
+                source=source,
+                metadata={"model_path": MODEL_PATH},
+            )
+            _loaded_model_mtime = _model_file_mtime()
+        READINESS.mark("cluster_model", "ready")
     except Exception as e:
-        print(f"❌ Error during startup: {e}")
-        raise
+        print(f"❌ Error loading models: {e}")
+        READINESS.mark("cluster_model", "failed", str(e))
+
+    READINESS.mark("warmup", "loading")
+    try:
+        print("🔥 Warming up pipelines...")
+        with BOOT_TIMER.stage("warmup"):
+            warmup(bundle)
+        READINESS.mark("warmup", "ready")
+    except Exception as e:
+        print(f"❌ Error during warmup: {e}")
+        READINESS.mark("warmup", "failed", str(e))
+
+    if startup_profile_enabled():
+        print(BOOT_TIMER.report())
+
+    if READINESS.is_ready:
+        print("✅ ML Service ready!")
+
+
+def reload_bundle(
+    source: str = "file",
+    model_path: str = None,
+    only_if_changed: bool = False,
+    metadata: Dict = None,
+) -> Optional[ModelBundle]:
+    """
+    Build a new bundle with a fresh clustering model and swap it in
+
+    The candidate is warmed up before publishing, so the first requests on
+    the new version pay no lazy-initialisation cost. Requests already
+    running keep the bundle they pinned.
+
+    Args:
+        source: 'file' to load a saved model, 'retrain' to fit on the dataset
+        model_path: Saved model to load (defaults to MODEL_PATH)
+        only_if_changed: Skip when MODEL_PATH has not changed since the last load
+        metadata: Extra bundle metadata (e.g. retraining report)
+
+    Returns:
+        The published bundle, or None if skipped
+    """
+    global _loaded_model_mtime
+
+    with _reload_lock:
+        mtime = _model_file_mtime()
+        if only_if_changed and (mtime is None or mtime == _loaded_model_mtime):
+            return None
+
+        current = MODEL_REGISTRY.current()
+        if source == "retrain":
+            model = train_cluster_model(current.preprocessor)
+            model_path = MODEL_PATH
+        else:
+            model_path = model_path or MODEL_PATH
+            model = SpendingClusterModel.load(model_path)
+
+        # The preprocessor takes its reference statistics from the model file
+        candidate = replace(
+            current,
+            preprocessor=current.preprocessor.with_reference(model.feature_reference),
+            cluster_model=model,
+        )
+        warmup(candidate)
+
+        bundle = MODEL_REGISTRY.publish(
+            candidate.preprocessor,
+            model,
+            current.trend_analyzer,
+            current.overspending_predictor,
+            source=source,
+            metadata={"model_path": model_path, **(metadata or {})},
+        )
+        if model_path == MODEL_PATH:
+            _loaded_model_mtime = _model_file_mtime()
+
+    READINESS.mark("cluster_model", "ready")
+    return bundle
+
+
+async def watch_model_file():
+    """Reload the clustering model whenever MODEL_PATH is replaced"""
+    while True:
+        await asyncio.sleep(MODEL_WATCH_INTERVAL)
+        try:
+            bundle = await asyncio.to_thread(reload_bundle, "watch", None, True)
+        except Exception as e:
+            print(f"❌ Error reloading model from {MODEL_PATH}: {e}")
+            continue
+        if bundle is not None:
+            print(f"🔄 Model file changed, serving bundle v{bundle.version}")
+
+
+def publish_retrained(candidate_path: str, report: Dict):
+    """Install an accepted scheduled-retrain candidate and serve it"""
+    with _reload_lock:
+        replace_model_file(candidate_path, MODEL_PATH)
+        bundle = reload_bundle("scheduled", MODEL_PATH, metadata={"retrain": report})
+    print(f"🔄 Retrained personas, serving bundle v{bundle.version}")
+
+
+def save_aggregates():
+    """Checkpoint the ingested aggregates and anomaly baselines if they changed"""
+    if AGGREGATES.dirty:
+        AGGREGATES.save_checkpoint(AGGREGATE_CHECKPOINT_PATH)
+    if ANOMALIES.dirty:
+        ANOMALIES.save_checkpoint(ANOMALY_CHECKPOINT_PATH)
+
+
+async def checkpoint_aggregates():
+    """Checkpoint the ingested aggregates every AGGREGATE_CHECKPOINT_INTERVAL seconds"""
+    while True:
+        await asyncio.sleep(AGGREGATE_CHECKPOINT_INTERVAL)
+        try:
+            await asyncio.to_thread(save_aggregates)
+        except Exception as e:
+            print(f"❌ Aggregate checkpoint failed: {e}")
+
+
+def init_components():
+    """Create the lightweight pipeline components and publish them (no training)"""
+    global data_loader
+
+    data_loader = get_data_loader()
+    MODEL_REGISTRY.publish(
+        get_preprocessor(),
+        None,
+        get_trend_analyzer(),
+        get_overspending_predictor(),
+        source="init",
+    )
+    READINESS.mark("trend_analyzer", "ready")
+    READINESS.mark("overspending_predictor", "ready")
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Initialize components and load models in the background"""
+    global _startup_task, _watch_task, _retrain_task, _checkpoint_task, transaction_store
+    global _aggregate_owner_lock
+
+    if TRANSACTIONS_DB_URL:
+        # Connect per process (after fork in pre-fork mode); failures only disable by-user requests
+        try:
+            store = create_transaction_store(TRANSACTIONS_DB_URL, DB_POOL_SIZE)
+            await store.connect()
+            transaction_store = store
+        except Exception as e:
+            print(f"⚠️ Transaction store unavailable: {e}")
+
+    # Aggregates are per-process state: with several workers on one socket only
+    # the worker holding the checkpoint lock serves ingest, the others answer 503
+    _aggregate_owner_lock = await asyncio.to_thread(lock_checkpoint, AGGREGATE_CHECKPOINT_PATH)
+    if _aggregate_owner_lock is None:
+        print(f"⚠️ Another worker owns {AGGREGATE_CHECKPOINT_PATH}; ingest endpoints disabled in this worker")
+    else:
+        users = await asyncio.to_thread(AGGREGATES.load_checkpoint, AGGREGATE_CHECKPOINT_PATH)
+        if users:
+            print(f"✅ Loaded spend aggregates for {users} users")
+        users = await asyncio.to_thread(ANOMALIES.load_checkpoint, ANOMALY_CHECKPOINT_PATH)
+        if users:
+            print(f"✅ Loaded anomaly baselines for {users} users")
+        if AGGREGATE_CHECKPOINT_INTERVAL > 0:
+            _checkpoint_task = asyncio.create_task(checkpoint_aggregates())
+
+    if MODEL_WATCH_INTERVAL > 0:
+        _watch_task = asyncio.create_task(watch_model_file())
+
+    if PRELOADED:
+        # Components and models are inherited from the pre-fork parent;
+        # run serving.retrain_scheduler standalone for scheduled refits
+        return
+
+    if RETRAIN_INTERVAL > 0:
+        if TRANSACTIONS_DB_URL:
+            scheduler = RetrainScheduler(
+                RETRAIN_INTERVAL, TRANSACTIONS_DB_URL, publish_retrained, model_path=MODEL_PATH
+            )
+            _retrain_task = asyncio.create_task(scheduler.run_forever())
+        else:
+            print("⚠️ ML_RETRAIN_INTERVAL is set but ML_TRANSACTIONS_DB_URL is not; retraining disabled")
+
+    print("🚀 Starting ML Service...")
+    init_components()
+
+    # Training takes seconds; accept connections while it runs
+    _startup_task = asyncio.create_task(asyncio.to_thread(load_models))
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close the database pool and checkpoint the aggregates"""
+    if transaction_store is not None:
+        await transaction_store.close()
+    if AGGREGATE_CHECKPOINT_INTERVAL > 0 and _aggregate_owner_lock is not None:
+        await asyncio.to_thread(save_aggregates)
 
 
 @app.get("/")
@@ -171,15 +764,172 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Liveness check (does not wait for models)"""
+    bundle = MODEL_REGISTRY.current()
     return {
         "status": "healthy",
-        "models_loaded": cluster_model is not None and cluster_model.is_fitted,
+        "models_loaded": bundle is not None and bundle.models_loaded,
     }
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness check: 200 once models are loaded and warmed up, else 503"""
+    ready = READINESS.is_ready
+    bundle = MODEL_REGISTRY.current()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "ready": ready,
+            "model_version": bundle.version if bundle else None,
+            "models": READINESS.snapshot(),
+        },
+    )
+
+
+def _require_api_key(api_key: Optional[str]):
+    expected = os.getenv("ML_API_SECRET_KEY", "dev-secret-key")
+    if api_key is None or not hmac.compare_digest(api_key, expected):
+        raise HTTPException(status_code=401, detail="Invalid API key")
+
+
+@app.get("/admin/models")
+async def list_models(x_api_key: Optional[str] = Header(None)):
+    """Current model bundle and recent publish history"""
+    _require_api_key(x_api_key)
+    bundle = MODEL_REGISTRY.current()
+    return {
+        "current": bundle.describe() if bundle else None,
+        "history": MODEL_REGISTRY.history(),
+    }
+
+
+@app.post("/admin/models/reload")
+async def reload_models(request: ReloadRequest, x_api_key: Optional[str] = Header(None)):
+    """
+    Swap in a new clustering model without restarting
+
+    Args:
+        request: 'file' loads a model file from saved_models/, 'retrain' refits on the dataset
+
+    Returns:
+        The published bundle
+    """
+    _require_api_key(x_api_key)
+
+    if request.source not in ("file", "retrain"):
+        raise HTTPException(status_code=400, detail="source must be 'file' or 'retrain'")
+
+    model_path = None
+    if request.model_file:
+        # Only files inside saved_models/ can be loaded
+        model_path = os.path.join(os.path.dirname(MODEL_PATH), os.path.basename(request.model_file))
+
+    try:
+        bundle = await asyncio.to_thread(reload_bundle, request.source, model_path)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        print(f"Error reloading models: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {"success": True, "bundle": bundle.describe()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics endpoint"""
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+async def _single_flight(http_request: Request, compute: Callable[[], Any]) -> Any:
+    """
+    Compute a response once for all identical in-flight requests
+
+    Args:
+        http_request: Incoming request (path, query and body form the key)
+        compute: Synchronous handler body, run in a worker thread, or a coroutine function
+
+    Returns:
+        The shared result (Responses are copied per request)
+    """
+    is_async = asyncio.iscoroutinefunction(compute)
+    if REQUEST_TIMINGS.get() is not None:
+        # Profiled requests run on their own so Server-Timing / cProfile describe them
+        return await compute() if is_async else compute()
+
+    bundle = MODEL_REGISTRY.current()
+    key = (
+        http_request.url.path,
+        bundle.version if bundle else None,
+        fingerprint(http_request.url.query.encode(), await http_request.body()),
+    )
+    result = await SINGLE_FLIGHT.do(key, compute if is_async else lambda: asyncio.to_thread(compute))
+
+    if isinstance(result, Response):
+        # Middlewares add headers to the response they send, so never share one
+        return Response(result.body, status_code=result.status_code, media_type=result.media_type)
+    return result
+
+
+def _insights_response(user_id: str, transactions: List[Dict], budget: Dict[str, float]) -> NumpyJSONResponse:
+    """Run the insight pipeline on the current model bundle"""
+    # Pin one model snapshot for the whole request
+    bundle = MODEL_REGISTRY.current()
+    result = build_insights(
+        transactions,
+        budget,
+        data_loader=data_loader,
+        preprocessor=bundle.preprocessor,
+        cluster_model=bundle.cluster_model,
+        trend_analyzer=bundle.trend_analyzer,
+        overspending_predictor=bundle.overspending_predictor,
+    )
+
+    # One orjson pass (NumPy values included) instead of response_model validation
+    with stage_timer(INSIGHTS_ENDPOINT, "serialize"):
+        return NumpyJSONResponse({"user_id": user_id, **result})
+
+
+def _totals_insights_response(
+    user_id: str,
+    category_totals: Dict[str, float],
+    monthly_trend: List[float],
+    budget: Dict[str, float],
+    anomalies: Optional[List[Dict]] = None,
+    month_end: Optional[Dict] = None,
+) -> NumpyJSONResponse:
+    """Run the insight pipeline on pre-aggregated spending"""
+    bundle = MODEL_REGISTRY.current()
+    result = build_insights_from_totals(
+        category_totals,
+        monthly_trend,
+        budget,
+        data_loader=data_loader,
+        preprocessor=bundle.preprocessor,
+        cluster_model=bundle.cluster_model,
+        trend_analyzer=bundle.trend_analyzer,
+        overspending_predictor=bundle.overspending_predictor,
+        anomalies=anomalies,
+        month_end=month_end,
+    )
+
+    with stage_timer(INSIGHTS_ENDPOINT, "serialize"):
+        return NumpyJSONResponse({"user_id": user_id, **result})
+
+
+def _require_iso_dates(transactions: List[Any]):
+    """400 unless every transaction date is an ISO date (checked once, at the request boundary)"""
+    try:
+        check_iso_dates(t.date for t in transactions)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid transaction: {e}")
+
+
 @app.post("/predict/insights", response_model=InsightResponse)
-async def generate_insights(request: InsightRequest):
+async def generate_insights(request: InsightRequest, http_request: Request):
     """
     Generate AI-powered spending insights
 
@@ -190,210 +940,275 @@ async def generate_insights(request: InsightRequest):
         AI insights, persona, trends, and risk assessment
     """
     try:
-        # Convert transactions to dict (Pydantic V2 uses model_dump)
-        transactions = [t.model_dump() for t in request.transactions]
+        observe_transactions(INSIGHTS_ENDPOINT, len(request.transactions))
 
-        if not transactions:
+        if not request.transactions:
             raise HTTPException(status_code=400, detail="No transactions provided")
+        _require_iso_dates(request.transactions)
 
-        # Convert transactions to features
-        user_features_df = data_loader.convert_user_transactions_to_features(
-            transactions
-        )
-        user_features_eng = preprocessor.engineer_features(user_features_df)
+        def compute():
+            # Convert transactions to dict (Pydantic V2 uses model_dump)
+            transactions = [t.model_dump() for t in request.transactions]
+            return _insights_response(request.user_id, transactions, request.current_month_budget)
 
-        # Get category totals
-        category_totals = data_loader.get_category_totals(transactions)
+        return await _single_flight(http_request, compute)
 
-        # Get monthly trend
-        monthly_trend = data_loader.get_monthly_trend(transactions, months=3)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error generating insights: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # Generate insights list
-        insights = []
 
-        # 1. Spending Persona Analysis
-        persona_result = None
-        if cluster_model and cluster_model.is_fitted:
-            X_user = preprocessor.prepare_for_clustering(user_features_eng)
-            persona_result = cluster_model.analyze_user_persona(X_user[0])
+def _months_ago(day: date, months: int) -> date:
+    month_index = day.year * 12 + day.month - 1 - months
+    year, month = month_index // 12, month_index % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
 
-            insights.append(
-                {
-                    "type": "spending_persona",
-                    "severity": "info",
-                    "title": f"당신의 소비 패턴: {persona_result['persona_name']}",
-                    "description": persona_result["description"],
-                    "suggested_action": f"강점: {', '.join(persona_result['strengths'])}",
-                    "potential_savings": 0,
-                    "category": None,
-                }
-            )
 
-        # 2. Trend Analysis
-        trend_results = {}
-        if monthly_trend:
-            overall_trend = trend_analyzer.analyze_trend(monthly_trend)
-            trend_results["overall"] = overall_trend
-
-            if overall_trend["trend_type"] == "increasing":
-                insights.append(
-                    {
-                        "type": "trend_increase",
-                        "severity": "warning",
-                        "title": f"지출이 {overall_trend['emoji']} 증가하고 있어요",
-                        "description": f"최근 3개월간 지출이 {abs(overall_trend['percent_change']):.1f}% 증가했습니다.",
-                        "suggested_action": "지출 패턴을 점검하고 불필요한 소비를 줄여보세요",
-                        "potential_savings": None,
-                        "category": None,
-                    }
-                )
-            elif overall_trend["trend_type"] == "decreasing":
-                insights.append(
-                    {
-                        "type": "trend_decrease",
-                        "severity": "info",
-                        "title": f"지출이 {overall_trend['emoji']} 감소했어요! 👏",
-                        "description": f"최근 3개월간 지출이 {abs(overall_trend['percent_change']):.1f}% 감소했습니다. 잘하고 계세요!",
-                        "suggested_action": "현재의 좋은 습관을 유지하세요",
-                        "potential_savings": None,
-                        "category": None,
-                    }
+@app.post("/predict/insights/by-user", response_model=InsightResponse)
+async def generate_insights_by_user(
+    request: InsightByUserRequest, http_request: Request, x_api_key: Optional[str] = Header(None)
+):
+    """
+    Generate insights from transactions read directly from the database
+
+    Args:
+        request: User id and date window (budget defaults to the budgets table)
+
+    Returns:
+        Same response as /predict/insights
+    """
+    # Reads any user's rows by the id in the body, so only trusted callers may ask
+    _require_api_key(x_api_key)
+    if transaction_store is None:
+        raise HTTPException(status_code=503, detail="Transaction store is not configured")
+
+    try:
+        # users.id is a uuid; reject anything else before it reaches `$1::uuid`
+        uuid.UUID(request.user_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid user_id: expected a UUID")
+
+    try:
+        end = date.fromisoformat(request.end_date) if request.end_date else date.today()
+        start = (
+            date.fromisoformat(request.start_date)
+            if request.start_date
+            else _months_ago(end, request.months)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date: {e}")
+
+    async def compute():
+        with stage_timer(INSIGHTS_ENDPOINT, "fetch", profile=False):
+            if request.current_month_budget is None:
+                transactions, budget = await asyncio.gather(
+                    transaction_store.fetch_transactions(request.user_id, start, end),
+                    transaction_store.fetch_budget(request.user_id, date.today().strftime("%Y-%m")),
                 )
+            else:
+                transactions = await transaction_store.fetch_transactions(request.user_id, start, end)
+                budget = request.current_month_budget
+        observe_transactions(INSIGHTS_ENDPOINT, len(transactions))
 
-        # 3. Overspending Risk Analysis
-        overspending_result = None
-        if request.current_month_budget:
-            from datetime import datetime
+        if not transactions:
+            raise HTTPException(status_code=400, detail="No transactions found")
 
-            days_in_month = 30
-            today = datetime.now().day
-            days_remaining = days_in_month - today
+        return await asyncio.to_thread(_insights_response, request.user_id, transactions, budget)
 
-            overspending_result = overspending_predictor.predict_overspending_risk(
-                current_spending=category_totals,
-                budget=request.current_month_budget,
-                days_remaining=days_remaining,
-            )
+    try:
+        # Fetch and compute once for identical concurrent requests
+        return await _single_flight(http_request, compute)
 
-            # Add high-risk categories as insights
-            for category in overspending_result.get("high_risk_categories", []):
-                risk_detail = overspending_result["category_risks"][category]
-
-                # Map internal category names to Korean
-                category_labels = {
-                    "food": "식비",
-                    "transport": "교통비",
-                    "shopping": "쇼핑",
-                    "entertainment": "문화/여가",
-                    "education": "교육",
-                    "health": "의료/건강",
-                }
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error generating insights: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-                category_kr = category_labels.get(category, category)
-
-                insights.append(
-                    {
-                        "type": "overspending",
-                        "severity": (
-                            "warning"
-                            if risk_detail["risk_level"] == "high"
-                            else "critical"
-                        ),
-                        "title": f"{category_kr} 예산 초과 위험",
-                        "description": f"현재 {risk_detail['spent_percentage']:.0f}% 사용 중입니다. {', '.join(risk_detail['risk_factors'])}",
-                        "suggested_action": f"남은 기간 동안 {category_kr} 지출을 {risk_detail['remaining']:.0f}원 이하로 유지하세요",
-                        "potential_savings": risk_detail.get("projected_over", 0),
-                        "category": category,
-                    }
-                )
 
-        # 4. Category-specific insights
-        for category, amount in category_totals.items():
-            if category in request.current_month_budget:
-                budget_amount = request.current_month_budget[category]
-                pct_used = (amount / budget_amount * 100) if budget_amount > 0 else 0
-
-                category_labels = {
-                    "food": "식비",
-                    "transport": "교통비",
-                    "shopping": "쇼핑",
-                    "entertainment": "문화/여가",
-                    "education": "교육",
-                    "health": "의료/건강",
-                }
+def _require_aggregate_owner():
+    """503 in workers that do not own the aggregate store"""
+    if _aggregate_owner_lock is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Ingested aggregates are served by a single worker; run ingest on a single-worker instance",
+            headers={"Retry-After": "1"},
+        )
 
-                category_kr = category_labels.get(category, category)
-
-                if pct_used >= 90:
-                    insights.append(
-                        {
-                            "type": "category_warning",
-                            "severity": "warning",
-                            "title": f"{category_kr} 예산이 곧 소진됩니다",
-                            "description": f"이번 달 {category_kr} 예산의 {pct_used:.0f}%를 사용했습니다.",
-                            "suggested_action": f"남은 기간 동안 {category_kr} 지출을 최소화하세요",
-                            "potential_savings": None,
-                            "category": category,
-                        }
-                    )
-
-        # 5. Savings opportunities
-        if overspending_result:
-            recommendations = overspending_predictor.generate_savings_recommendations(
-                current_spending=category_totals, budget=request.current_month_budget
-            )
 
-            for rec in recommendations[:2]:  # Top 2 opportunities
-                category_labels = {
-                    "food": "식비",
-                    "transport": "교통비",
-                    "shopping": "쇼핑",
-                    "entertainment": "문화/여가",
-                    "education": "교육",
-                    "health": "의료/건강",
-                }
+@app.post(INGEST_ENDPOINT)
+async def ingest_transactions(request: IngestRequest, x_api_key: Optional[str] = Header(None)):
+    """
+    Apply new, updated and soft-deleted transactions to a user's aggregates
 
-                category_kr = category_labels.get(rec["category"], rec["category"])
-
-                insights.append(
-                    {
-                        "type": "savings_opportunity",
-                        "severity": "info",
-                        "title": f"{category_kr} 절약 기회",
-                        "description": f"{category_kr}에서 예산을 {rec['overspend_amount']:.0f}원 초과했습니다.",
-                        "suggested_action": (
-                            rec["tips"][0] if rec["tips"] else "지출을 줄여보세요"
-                        ),
-                        "potential_savings": rec["savings_potential"],
-                        "category": rec["category"],
-                    }
-                )
+    Args:
+        request: Changed transactions (is_deleted=true removes) and deleted ids
 
-        # Sort insights by severity
-        severity_order = {"critical": 0, "warning": 1, "info": 2}
-        insights.sort(key=lambda x: severity_order.get(x["severity"], 3))
-
-        # Convert all numpy types to Python native types for JSON serialization
-        insights = convert_numpy_types(insights)
-        persona_result = convert_numpy_types(persona_result)
-        trend_results = convert_numpy_types(trend_results)
-        overspending_result = convert_numpy_types(overspending_result)
-
-        return InsightResponse(
-            user_id=request.user_id,
-            insights=insights,
-            persona=persona_result,
-            trends=trend_results,
-            overspending_risks=overspending_result,
+    Returns:
+        Applied counts, the user's aggregate size and insights for unusual
+        new purchases
+    """
+    # Writes state for the user_id in the body, so only trusted callers may ingest
+    _require_api_key(x_api_key)
+    _require_aggregate_owner()
+    observe_transactions(INGEST_ENDPOINT, len(request.transactions))
+    transactions = [t.model_dump() for t in request.transactions]
+    try:
+        summary = AGGREGATES.apply(request.user_id, transactions, request.deleted_ids)
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid transaction: {e}")
+
+    # Score purchases seen for the first time against the user's running
+    # baselines, O(1) per row; edits and re-sent rows are not counted twice
+    new_ids = set(summary.pop("new_ids"))
+    latest = {t["id"]: t for t in transactions if t["id"] in new_ids}
+    anomalies = ANOMALIES.observe_batch(request.user_id, latest.values())
+    return {
+        "success": True,
+        "user_id": request.user_id,
+        **summary,
+        "anomalies": [anomaly_insight(a) for a in anomalies],
+    }
+
+
+@app.post("/predict/insights/ingested", response_model=InsightResponse)
+async def generate_insights_from_aggregates(
+    request: IngestedInsightRequest, x_api_key: Optional[str] = Header(None)
+):
+    """
+    Generate insights from the ingested aggregates (cost independent of history length)
+
+    Args:
+        request: User id, window in months and budget
+
+    Returns:
+        Same response as /predict/insights
+    """
+    _require_api_key(x_api_key)
+    _require_aggregate_owner()
+    if request.months < 1:
+        raise HTTPException(status_code=400, detail="months must be at least 1")
+
+    # Window covers both the requested months and the 3-month trend
+    months = max(request.months, 3)
+    current = month_key(datetime.now())
+    with stage_timer(INSIGHTS_ENDPOINT, "aggregate"):
+        matrix = AGGREGATES.snapshot(request.user_id, shift_month(current, -(months - 1)))
+        if matrix is None or not matrix.cells:
+            raise HTTPException(status_code=404, detail="No ingested transactions for this user")
+        window = matrix.since(shift_month(current, -(request.months - 1)))
+        category_totals = window.category_totals()
+        monthly_trend = matrix.monthly_trend(3)
+
+    try:
+        return _totals_insights_response(
+            request.user_id, category_totals, monthly_trend, request.current_month_budget
         )
+    except Exception as e:
+        print(f"Error generating insights: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/predict/insights/aggregated", response_model=InsightResponse)
+async def generate_insights_from_cells(request: InsightAggregateRequest):
+    """
+    Generate insights from a pre-aggregated spending matrix
+
+    Args:
+        request: (month, category, time_slot) cells and budget
+
+    Returns:
+        Same response as /predict/insights for the underlying transactions
+    """
+    if not request.cells:
+        raise HTTPException(status_code=400, detail="No spending cells provided")
 
+    try:
+        with stage_timer(INSIGHTS_ENDPOINT, "aggregate"):
+            matrix = SpendMatrix.from_cells(c.model_dump() for c in request.cells)
+            category_totals = matrix.category_totals()
+            monthly_trend = matrix.monthly_trend(3)
+
+        return _totals_insights_response(
+            request.user_id, category_totals, monthly_trend, request.current_month_budget
+        )
+    except Exception as e:
+        print(f"Error generating insights: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _parse_columnar(request: Request, schema, required: List[str]):
+    """
+    Parse a columnar JSON / Arrow body
+
+    Args:
+        request: Incoming request
+        schema: Row-based request model used to validate the non-transaction fields
+        required: Transaction columns that must be present
+
+    Returns:
+        Tuple of (validated fields, transactions DataFrame)
+    """
+    body = await request.body()
+    try:
+        fields, df = parse_columnar_body(body, request.headers.get("content-type", ""), required)
+        validated = schema.model_validate({**fields, "transactions": []})
+    except ColumnarError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    return validated, df
+
+
+@app.post("/predict/insights/columnar", response_model=InsightResponse)
+async def generate_insights_from_columns(request: Request):
+    """
+    /predict/insights with a columnar body (parallel JSON arrays or Arrow IPC stream)
+
+    Args:
+        request: {user_id, current_month_budget, transactions: {date: [...], amount: [...], ...}}
+
+    Returns:
+        Same response as /predict/insights
+    """
+    with stage_timer(INSIGHTS_ENDPOINT, "parse"):
+        fields, df = await _parse_columnar(request, InsightRequest, ["date", "amount", "category"])
+    observe_transactions(INSIGHTS_ENDPOINT, len(df))
+
+    if df.empty:
+        raise HTTPException(status_code=400, detail="No transactions provided")
+
+    try:
+        with stage_timer(INSIGHTS_ENDPOINT, "aggregate"):
+            matrix = SpendMatrix.from_frame(df)
+            category_totals = matrix.category_totals()
+            monthly_trend = matrix.monthly_trend(3)
+        with stage_timer(INSIGHTS_ENDPOINT, "anomalies"):
+            anomalies = flag_frame(df)
+        with stage_timer(INSIGHTS_ENDPOINT, "forecast"):
+            month_end = project_month_end(
+                df["date"].to_numpy(dtype=object),
+                df["category"].to_numpy(dtype=object),
+                df["amount"].to_numpy(dtype=float),
+            )
+
+        return _totals_insights_response(
+            fields.user_id,
+            category_totals,
+            monthly_trend,
+            fields.current_month_budget,
+            anomalies=anomalies,
+            month_end=month_end,
+        )
     except Exception as e:
         print(f"Error generating insights: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/coaching/message", response_model=CoachingResponse)
-async def get_coaching_message(request: CoachingRequest):
+async def get_coaching_message(request: CoachingRequest, http_request: Request):
     """
     Generate a personalized coaching message based on spending patterns.
 
@@ -403,24 +1218,32 @@ async def get_coaching_message(request: CoachingRequest):
     Returns:
         CoachingResponse with personalized coaching message
     """
+    _require_iso_dates(request.transactions)
     try:
-        # Convert to DataFrame
-        if request.transactions:
-            df = pd.DataFrame([t.model_dump() for t in request.transactions])
-        else:
-            df = pd.DataFrame(columns=["date", "amount", "category", "time_slot"])
+        observe_transactions(COACHING_ENDPOINT, len(request.transactions))
 
-        # Generate message
-        message = generate_coaching_message(df, request.user_id)
+        def compute():
+            # Convert to DataFrame
+            with stage_timer(COACHING_ENDPOINT, "parse"):
+                if request.transactions:
+                    df = pd.DataFrame([t.model_dump() for t in request.transactions])
+                else:
+                    df = pd.DataFrame(columns=["date", "amount", "category", "time_slot"])
 
-        return CoachingResponse(success=True, message=message.to_dict())
+            # Generate message
+            with stage_timer(COACHING_ENDPOINT, "coaching"):
+                message = generate_coaching_message(df, request.user_id)
+
+            return CoachingResponse(success=True, message=message.to_dict())
+
+        return await _single_flight(http_request, compute)
     except Exception as e:
         print(f"Error generating coaching message: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/coaching/peer-comparison", response_model=PeerComparisonResponse)
-async def get_peer_comparison(request: PeerComparisonRequest):
+async def get_peer_comparison(request: PeerComparisonRequest, http_request: Request):
     """
     Generate a peer comparison message for the user.
 
@@ -430,24 +1253,87 @@ async def get_peer_comparison(request: PeerComparisonRequest):
     Returns:
         PeerComparisonResponse with comparison data
     """
+    _require_iso_dates(request.transactions)
     try:
         # Determine period
         period = request.period or datetime.now().strftime("%Y-%m")
 
-        # Convert transactions to DataFrame
-        if request.transactions:
-            df = pd.DataFrame([t.model_dump() for t in request.transactions])
-        else:
-            df = pd.DataFrame(columns=["date", "amount", "category", "time_slot"])
-
-        # Generate comparison (using mock cohort stats for now)
-        comparison = generate_peer_comparison_message(
-            user_id=request.user_id,
-            user_birth_year=request.birth_year,
-            user_transactions=df,
-            cohort_stats=None,  # Uses mock data
-            period=period,
-        )
+        observe_transactions(PEER_COMPARISON_ENDPOINT, len(request.transactions))
+
+        def compute():
+            # Convert transactions to DataFrame
+            with stage_timer(PEER_COMPARISON_ENDPOINT, "parse"):
+                if request.transactions:
+                    df = pd.DataFrame([t.model_dump() for t in request.transactions])
+                else:
+                    df = pd.DataFrame(columns=["date", "amount", "category", "time_slot"])
+
+            # Generate comparison (using mock cohort stats for now)
+            with stage_timer(PEER_COMPARISON_ENDPOINT, "comparison"):
+                comparison = generate_peer_comparison_message(
+                    user_id=request.user_id,
+                    user_birth_year=request.birth_year,
+                    user_transactions=df,
+                    cohort_stats=None,  # Uses mock data
+                    period=period,
+                )
+
+            return PeerComparisonResponse(success=True, comparison=comparison.to_dict())
+
+        return await _single_flight(http_request, compute)
+    except Exception as e:
+        print(f"Error generating peer comparison: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/coaching/message/aggregated", response_model=CoachingResponse)
+async def get_coaching_message_from_cells(request: CoachingAggregateRequest):
+    """
+    Generate a coaching message from a pre-aggregated spending matrix.
+
+    Args:
+        request: (month, category, time_slot) cells covering this and last month
+
+    Returns:
+        Same response as /coaching/message for the underlying transactions
+    """
+    try:
+        with stage_timer(COACHING_ENDPOINT, "parse"):
+            matrix = SpendMatrix.from_cells(c.model_dump() for c in request.cells)
+
+        with stage_timer(COACHING_ENDPOINT, "coaching"):
+            message = coaching_message_from_patterns(analyze_spending_matrix(matrix))
+
+        return CoachingResponse(success=True, message=message.to_dict())
+    except Exception as e:
+        print(f"Error generating coaching message: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/coaching/peer-comparison/aggregated", response_model=PeerComparisonResponse)
+async def get_peer_comparison_from_cells(request: PeerComparisonAggregateRequest):
+    """
+    Generate a peer comparison message from a pre-aggregated spending matrix.
+
+    Args:
+        request: Birth year and the cells of the compared period
+
+    Returns:
+        Same response as /coaching/peer-comparison for the underlying transactions
+    """
+    try:
+        period = request.period or datetime.now().strftime("%Y-%m")
+
+        with stage_timer(PEER_COMPARISON_ENDPOINT, "parse"):
+            matrix = SpendMatrix.from_cells(c.model_dump() for c in request.cells)
+
+        with stage_timer(PEER_COMPARISON_ENDPOINT, "comparison"):
+            comparison = peer_comparison_from_totals(
+                user_id=request.user_id,
+                user_birth_year=request.birth_year,
+                category_totals=matrix.category_totals(),
+                period=period,
+            )
 
         return PeerComparisonResponse(success=True, comparison=comparison.to_dict())
     except Exception as e:
@@ -455,6 +1341,210 @@ async def get_peer_comparison(request: PeerComparisonRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/coaching/message/columnar", response_model=CoachingResponse)
+async def get_coaching_message_from_columns(request: Request):
+    """
+    /coaching/message with a columnar body (parallel JSON arrays or Arrow IPC stream)
+
+    Args:
+        request: {user_id, transactions: {date: [...], amount: [...], category: [...], time_slot: [...]}}
+
+    Returns:
+        Same response as /coaching/message
+    """
+    with stage_timer(COACHING_ENDPOINT, "parse"):
+        fields, df = await _parse_columnar(request, CoachingRequest, ["date", "amount", "category"])
+    observe_transactions(COACHING_ENDPOINT, len(df))
+
+    try:
+        with stage_timer(COACHING_ENDPOINT, "coaching"):
+            message = generate_coaching_message(df, fields.user_id)
+
+        return CoachingResponse(success=True, message=message.to_dict())
+    except Exception as e:
+        print(f"Error generating coaching message: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/coaching/peer-comparison/columnar", response_model=PeerComparisonResponse)
+async def get_peer_comparison_from_columns(request: Request):
+    """
+    /coaching/peer-comparison with a columnar body (parallel JSON arrays or Arrow IPC stream)
+
+    Args:
+        request: {user_id, birth_year, period, transactions: {amount: [...], category: [...], ...}}
+
+    Returns:
+        Same response as /coaching/peer-comparison
+    """
+    with stage_timer(PEER_COMPARISON_ENDPOINT, "parse"):
+        fields, df = await _parse_columnar(request, PeerComparisonRequest, ["amount", "category"])
+    observe_transactions(PEER_COMPARISON_ENDPOINT, len(df))
+
+    try:
+        period = fields.period or datetime.now().strftime("%Y-%m")
+
+        with stage_timer(PEER_COMPARISON_ENDPOINT, "comparison"):
+            comparison = generate_peer_comparison_message(
+                user_id=fields.user_id,
+                user_birth_year=fields.birth_year,
+                user_transactions=df,
+                period=period,
+            )
+
+        return PeerComparisonResponse(success=True, comparison=comparison.to_dict())
+    except Exception as e:
+        print(f"Error generating peer comparison: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+DASHBOARD_COLUMNS = ["date", "amount", "category", "merchant", "time_slot"]
+
+
+async def _dashboard_response(fields: DashboardRequest, df: pd.DataFrame) -> NumpyJSONResponse:
+    """
+    Insights, coaching message and peer comparison from one transactions frame
+
+    The frame is aggregated once; the three results only read the shared
+    SpendMatrix, so they run concurrently in worker threads. Profiled
+    requests (X-Profile) run them one after another on the event loop
+    instead, since cProfile only sees the thread it was enabled on.
+
+    Args:
+        fields: Request fields (user_id, budget, birth_year, period)
+        df: Transactions (date, amount, category[, merchant, time_slot])
+
+    Returns:
+        {user_id, insights, coaching, peer_comparison}; peer_comparison is
+        None without a birth year
+    """
+    # Pin one model snapshot and one clock for all three results
+    bundle = MODEL_REGISTRY.current()
+    now = datetime.now()
+    period = fields.period or month_key(now)
+    profiled = REQUEST_TIMINGS.get() is not None
+
+    async def run(stage: Callable[[], Any]) -> Any:
+        return stage() if profiled else await asyncio.to_thread(stage)
+
+    def aggregate() -> SpendMatrix:
+        with stage_timer(DASHBOARD_ENDPOINT, "aggregate"):
+            return SpendMatrix.from_frame(df)
+
+    matrix = await run(aggregate)
+
+    def insights() -> Dict:
+        with stage_timer(INSIGHTS_ENDPOINT, "anomalies"):
+            anomalies = flag_frame(df)
+        with stage_timer(INSIGHTS_ENDPOINT, "forecast"):
+            month_end = project_month_end(
+                df["date"].to_numpy(dtype=object),
+                df["category"].to_numpy(dtype=object),
+                df["amount"].to_numpy(dtype=float),
+                now.date(),
+            )
+        return build_insights_from_totals(
+            matrix.category_totals(),
+            matrix.monthly_trend(3, now),
+            fields.current_month_budget,
+            data_loader=data_loader,
+            preprocessor=bundle.preprocessor,
+            cluster_model=bundle.cluster_model,
+            trend_analyzer=bundle.trend_analyzer,
+            overspending_predictor=bundle.overspending_predictor,
+            anomalies=anomalies,
+            month_end=month_end,
+        )
+
+    def coaching() -> Dict:
+        with stage_timer(DASHBOARD_ENDPOINT, "coaching"):
+            return coaching_message_from_patterns(analyze_spending_matrix(matrix, now)).to_dict()
+
+    def peer_comparison() -> Optional[Dict]:
+        if fields.birth_year is None:
+            return None
+        with stage_timer(DASHBOARD_ENDPOINT, "peer_comparison"):
+            return peer_comparison_from_totals(
+                fields.user_id, fields.birth_year, matrix.month_category_totals(period), period=period
+            ).to_dict()
+
+    insight_result, message, comparison = await asyncio.gather(
+        run(insights), run(coaching), run(peer_comparison)
+    )
+
+    with stage_timer(DASHBOARD_ENDPOINT, "serialize"):
+        return NumpyJSONResponse({
+            "user_id": fields.user_id,
+            "insights": {"user_id": fields.user_id, **insight_result},
+            "coaching": message,
+            "peer_comparison": comparison,
+        })
+
+
+@app.post(DASHBOARD_ENDPOINT, response_model=DashboardResponse)
+async def generate_dashboard(request: DashboardRequest, http_request: Request):
+    """
+    Insights, coaching message and peer comparison in one request
+
+    Replaces separate calls to /predict/insights, /coaching/message and
+    /coaching/peer-comparison with the same transactions: they are
+    converted and aggregated once and shared by all three.
+
+    Args:
+        request: User transactions, budget and (optionally) birth year
+
+    Returns:
+        DashboardResponse with the three endpoints' results (peer_comparison
+        is computed on the `period` month's transactions)
+    """
+    observe_transactions(DASHBOARD_ENDPOINT, len(request.transactions))
+
+    if not request.transactions:
+        raise HTTPException(status_code=400, detail="No transactions provided")
+    _require_iso_dates(request.transactions)
+
+    try:
+        async def compute():
+            with stage_timer(DASHBOARD_ENDPOINT, "parse"):
+                # Column lists straight from the models (no per-row dicts)
+                df = pd.DataFrame({
+                    column: [getattr(t, column) for t in request.transactions]
+                    for column in DASHBOARD_COLUMNS
+                })
+            return await _dashboard_response(request, df)
+
+        return await _single_flight(http_request, compute)
+    except Exception as e:
+        print(f"Error generating dashboard: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/predict/dashboard/columnar", response_model=DashboardResponse)
+async def generate_dashboard_from_columns(request: Request):
+    """
+    /predict/dashboard with a columnar body (parallel JSON arrays or Arrow IPC stream)
+
+    Args:
+        request: {user_id, current_month_budget, birth_year, period,
+                 transactions: {date: [...], amount: [...], category: [...], ...}}
+
+    Returns:
+        Same response as /predict/dashboard
+    """
+    with stage_timer(DASHBOARD_ENDPOINT, "parse"):
+        fields, df = await _parse_columnar(request, DashboardRequest, ["date", "amount", "category"])
+    observe_transactions(DASHBOARD_ENDPOINT, len(df))
+
+    if df.empty:
+        raise HTTPException(status_code=400, detail="No transactions provided")
+
+    try:
+        return await _dashboard_response(fields, df)
+    except Exception as e:
+        print(f"Error generating dashboard: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 if __name__ == "__main__":
     import uvicorn
 
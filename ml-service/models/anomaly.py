@@ -0,0 +1,381 @@
+"""
+Transaction Anomaly Detection
+Flags single purchases that are unusually large for the user's category
+(or merchant) history
+
+Amounts are compared in log space against robust baselines: the median and
+the MAD-based scale of the user's purchases in the same category, or at the
+same merchant once there are enough of those. A transaction is flagged when
+its robust z-score exceeds ANOMALY_Z_THRESHOLD.
+
+- score_transaction_history(): scores a whole history at once, used by
+  /predict/insights. It is retrospective: each purchase is compared with
+  all of the user's purchases in its group, including itself and later
+  ones (the median and MAD barely move for a single outlier), because the
+  question there is which purchases in the window stand out.
+- AnomalyDetector: keeps per-user baselines as running (count, center,
+  scale) triples, scoring each new transaction against the purchases
+  ingested before it and then updating in O(1); used by delta ingest and
+  checkpointed next to the aggregates. The two paths can disagree early in
+  a history, when the running baseline has seen fewer purchases.
+"""
+
+import gzip
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from pipeline.categories import CATEGORIES
+
+
+ANOMALY_Z_THRESHOLD = float(os.getenv("ML_ANOMALY_Z_THRESHOLD", "3.5"))
+MIN_HISTORY = 8  # Purchases needed before a baseline is trusted
+MIN_ANOMALY_AMOUNT = 30000  # Smaller purchases are never flagged (KRW)
+MIN_SCALE = 0.1  # Floor for the log-amount scale (repeated identical prices)
+MAD_TO_STD = 1.4826
+HUBER_K = 2.0  # Residuals are clipped to HUBER_K scales before updating a baseline
+BASELINE_WINDOW = 50  # Effective memory of a running baseline (purchases)
+MAX_MERCHANT_BASELINES = 50  # Per user; the least recently seen merchant is dropped beyond this
+ANOMALY_INSIGHT_LIMIT = 3
+
+
+class RobustBaseline:
+    """Running robust location/scale of log purchase amounts"""
+
+    __slots__ = ("count", "center", "scale", "_warmup")
+
+    def __init__(self, count: int = 0, center: float = 0.0, scale: float = MIN_SCALE):
+        self.count = count
+        self.center = center
+        self.scale = scale
+        # Raw values until MIN_HISTORY purchases have been seen
+        self._warmup: Optional[List[float]] = [] if count < MIN_HISTORY else None
+
+    @property
+    def ready(self) -> bool:
+        return self.count >= MIN_HISTORY
+
+    def score(self, x: float) -> float:
+        """Robust z-score of a log amount (0 while warming up)"""
+        if not self.ready:
+            return 0.0
+        return (x - self.center) / self.scale
+
+    def to_list(self) -> List:
+        """[count, center, scale, warm-up values or None] for checkpoints"""
+        return [self.count, self.center, self.scale, self._warmup]
+
+    @classmethod
+    def from_list(cls, values: List) -> "RobustBaseline":
+        count, center, scale, warmup = values
+        baseline = cls(count, center, scale)
+        baseline._warmup = warmup
+        return baseline
+
+    def update(self, x: float):
+        """Add one log amount"""
+        self.count += 1
+        if self._warmup is not None:
+            self._warmup.append(x)
+            if self.count >= MIN_HISTORY:
+                values = np.asarray(self._warmup)
+                self.center = float(np.median(values))
+                self.scale = max(MAD_TO_STD * float(np.median(np.abs(values - self.center))), MIN_SCALE)
+                self._warmup = None
+            return
+
+        # Huber-clipped exponentially weighted update: one outlier cannot
+        # drag the baseline towards itself
+        weight = 1.0 / min(self.count, BASELINE_WINDOW)
+        residual = min(max(x - self.center, -HUBER_K * self.scale), HUBER_K * self.scale)
+        self.center += weight * residual
+        # Mean absolute deviation -> std for a normal distribution
+        self.scale = max(self.scale + weight * (abs(residual) * math.sqrt(math.pi / 2) - self.scale), MIN_SCALE)
+
+
+def _robust_scores(x: np.ndarray, groups: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(z-score, group median, group size) of each value within its group"""
+    series = pd.Series(x)
+    grouped = series.groupby(groups, sort=False)
+    median = grouped.transform("median").to_numpy()
+    mad = pd.Series(np.abs(x - median)).groupby(groups, sort=False).transform("median").to_numpy()
+    count = grouped.transform("size").to_numpy()
+    scale = np.maximum(MAD_TO_STD * mad, MIN_SCALE)
+    return (x - median) / scale, median, count
+
+
+def score_transaction_history(
+    amounts: np.ndarray,
+    categories: Iterable[str],
+    merchants: Optional[Iterable[Optional[str]]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Score every transaction of one user against their own history
+
+    Baselines are the medians of each whole group (see the module docstring
+    for why this differs from the causal AnomalyDetector).
+
+    Args:
+        amounts: Purchase amounts
+        categories: Category of each purchase
+        merchants: Merchant of each purchase (None entries allowed)
+
+    Returns:
+        Dict of arrays: z (robust z-score), typical (baseline amount) and
+        flagged (bool)
+    """
+    amounts = np.asarray(amounts, dtype=np.float64)
+    x = np.log1p(np.maximum(amounts, 0))
+    z, median, count = _robust_scores(x, CATEGORIES.encode(categories))
+
+    if merchants is not None:
+        merchant_codes, _ = pd.factorize(np.asarray(merchants, dtype=object))
+        if (merchant_codes >= 0).any():
+            z_m, median_m, count_m = _robust_scores(x, merchant_codes)
+            # The more specific merchant baseline wins once it has enough history
+            use_merchant = (merchant_codes >= 0) & (count_m >= MIN_HISTORY)
+            z = np.where(use_merchant, z_m, z)
+            median = np.where(use_merchant, median_m, median)
+            count = np.where(use_merchant, count_m, count)
+
+    flagged = (z > ANOMALY_Z_THRESHOLD) & (count >= MIN_HISTORY) & (amounts >= MIN_ANOMALY_AMOUNT)
+    return {"z": z, "typical": np.expm1(median), "flagged": flagged}
+
+
+def _merchant(value) -> Optional[str]:
+    return value if isinstance(value, str) and value else None
+
+
+def _flagged(amounts: np.ndarray, categories, merchants, dates) -> List[Dict]:
+    scores = score_transaction_history(amounts, categories, merchants)
+    anomalies = [
+        {
+            "date": dates[i],
+            "category": categories[i],
+            "merchant": _merchant(merchants[i]) if merchants is not None else None,
+            "amount": float(amounts[i]),
+            "typical_amount": float(scores["typical"][i]),
+            "z_score": float(scores["z"][i]),
+        }
+        for i in np.flatnonzero(scores["flagged"])
+    ]
+    anomalies.sort(key=lambda a: a["z_score"], reverse=True)
+    return anomalies
+
+
+def flag_transactions(transactions: List[Dict]) -> List[Dict]:
+    """
+    Anomalous transactions of a raw transaction list
+
+    Returns:
+        Anomaly dicts (date, category, merchant, amount, typical_amount,
+        z_score), strongest first
+    """
+    if len(transactions) < MIN_HISTORY:
+        return []
+    amounts = np.fromiter((t.get("amount", 0) for t in transactions), dtype=np.float64, count=len(transactions))
+    return _flagged(
+        amounts,
+        [t.get("category", "other") for t in transactions],
+        [t.get("merchant") for t in transactions],
+        [t.get("date") for t in transactions],
+    )
+
+
+def flag_frame(trans_df: pd.DataFrame) -> List[Dict]:
+    """flag_transactions for a DataFrame (amount, category[, merchant, date])"""
+    if len(trans_df) < MIN_HISTORY:
+        return []
+    merchants = trans_df["merchant"].to_numpy(dtype=object) if "merchant" in trans_df.columns else None
+    dates = trans_df["date"].to_numpy(dtype=object) if "date" in trans_df.columns else [None] * len(trans_df)
+    return _flagged(
+        trans_df["amount"].to_numpy(dtype=np.float64),
+        trans_df["category"].to_numpy(dtype=object),
+        merchants,
+        dates,
+    )
+
+
+def anomaly_insight(anomaly: Dict) -> Dict:
+    """Insight dict (type 'transaction_anomaly') for one flagged transaction"""
+    category = anomaly["category"]
+    category_kr = CATEGORIES.label(category)
+    place = anomaly.get("merchant") or category_kr
+    typical = anomaly["typical_amount"]
+    ratio = anomaly["amount"] / typical if typical > 0 else 0
+    date = str(anomaly.get("date") or "")[:10]
+    return {
+        "type": "transaction_anomaly",
+        "severity": "warning",
+        "title": f"평소와 다른 {category_kr} 결제가 있어요",
+        "description": (
+            f"{date} {place}에서 {anomaly['amount']:,.0f}원을 결제했어요. "
+            f"평소 결제액(약 {typical:,.0f}원)의 {ratio:.1f}배예요."
+        ),
+        "suggested_action": "직접 결제한 내역인지 확인하고, 계획에 없던 지출이라면 남은 예산을 조정해보세요",
+        "potential_savings": max(0.0, anomaly["amount"] - typical),
+        "category": category,
+    }
+
+
+class AnomalyDetector:
+    """Per-user running baselines for scoring transactions as they arrive"""
+
+    CHECKPOINT_VERSION = 1
+
+    def __init__(self, max_users: int = 10000, max_merchants: int = MAX_MERCHANT_BASELINES):
+        """
+        Args:
+            max_users: Users kept in memory (least recently seen are dropped)
+            max_merchants: Merchant baselines kept per user (least recently
+                           seen are dropped; their purchases still update the
+                           category baseline)
+        """
+        self.max_users = max_users
+        self.max_merchants = max_merchants
+        # user_id -> {(kind, key): RobustBaseline}, kind is 'category' or 'merchant'
+        self._users: "OrderedDict[str, Dict[Tuple[str, str], RobustBaseline]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def _baselines(self, user_id: str) -> Dict[Tuple[str, str], RobustBaseline]:
+        baselines = self._users.get(user_id)
+        if baselines is None:
+            baselines = self._users[user_id] = {}
+            if len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        else:
+            self._users.move_to_end(user_id)
+        return baselines
+
+    def _merchant_baseline(self, baselines: Dict[Tuple[str, str], RobustBaseline], merchant: str) -> RobustBaseline:
+        """Baseline of a merchant, moved to the end (most recent) of the user's dict"""
+        key = ("merchant", merchant)
+        baseline = baselines.pop(key, None)
+        if baseline is None:
+            baseline = RobustBaseline()
+            # Merchant names come from clients: keep at most max_merchants per user
+            merchants = [k for k in baselines if k[0] == "merchant"]
+            if len(merchants) >= self.max_merchants:
+                del baselines[merchants[0]]
+        baselines[key] = baseline
+        return baseline
+
+    def observe(
+        self, user_id: str, category: str, amount: float, merchant: Optional[str] = None
+    ) -> Tuple[float, float]:
+        """
+        Score a transaction against the user's baselines, then add it
+
+        Args:
+            user_id: User identifier
+            category: Transaction category
+            amount: Purchase amount
+            merchant: Merchant name, if known
+
+        Returns:
+            Tuple of (robust z-score, typical amount); z is 0 while the
+            baselines are still warming up
+        """
+        x = math.log1p(max(amount, 0.0))
+        # Unknown names share the 'other' baseline, as in the registry
+        category = CATEGORIES.canonical(category)
+        with self._lock:
+            baselines = self._baselines(user_id)
+            category_baseline = baselines.get(("category", category))
+            if category_baseline is None:
+                category_baseline = baselines[("category", category)] = RobustBaseline()
+            baseline = category_baseline
+            merchant_baseline = None
+            if merchant:
+                merchant_baseline = self._merchant_baseline(baselines, merchant)
+                if merchant_baseline.ready:
+                    baseline = merchant_baseline
+
+            z = baseline.score(x)
+            typical = math.expm1(baseline.center)
+            category_baseline.update(x)
+            if merchant_baseline is not None:
+                merchant_baseline.update(x)
+            self.dirty = True
+        return z, typical
+
+    def observe_batch(self, user_id: str, transactions: Iterable[Dict]) -> List[Dict]:
+        """
+        Score and add transactions in order
+
+        Returns:
+            Anomaly dicts (same shape as flag_transactions) for flagged ones
+        """
+        anomalies = []
+        for t in transactions:
+            amount = float(t.get("amount", 0))
+            category = CATEGORIES.canonical(t.get("category", "other"))
+            z, typical = self.observe(user_id, category, amount, t.get("merchant"))
+            if z > ANOMALY_Z_THRESHOLD and amount >= MIN_ANOMALY_AMOUNT:
+                anomalies.append({
+                    "date": t.get("date"),
+                    "category": category,
+                    "merchant": t.get("merchant"),
+                    "amount": amount,
+                    "typical_amount": typical,
+                    "z_score": z,
+                })
+        return anomalies
+
+    def save_checkpoint(self, path: str):
+        """Write all baselines to a gzip JSON checkpoint (write, then rename)"""
+        with self._lock:
+            # Least recently seen user first, so loading keeps the eviction order
+            users = [
+                [user_id, [[kind, key, *baseline.to_list()] for (kind, key), baseline in baselines.items()]]
+                for user_id, baselines in self._users.items()
+            ]
+            self.dirty = False
+
+        payload = {
+            "version": self.CHECKPOINT_VERSION,
+            "saved_at": datetime.now().isoformat(),
+            "users": users,
+        }
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def load_checkpoint(self, path: str) -> int:
+        """
+        Replace the in-memory baselines with a checkpoint
+
+        Returns:
+            Number of users loaded (0 if there is no usable checkpoint)
+        """
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if payload.get("version") != self.CHECKPOINT_VERSION:
+            return 0
+
+        users: "OrderedDict[str, Dict[Tuple[str, str], RobustBaseline]]" = OrderedDict()
+        for user_id, entries in payload["users"][-self.max_users:]:
+            users[user_id] = {
+                (kind, key): RobustBaseline.from_list(values) for kind, key, *values in entries
+            }
+
+        with self._lock:
+            self._users = users
+            self.dirty = False
+        return len(users)
@@ -5,11 +5,12 @@ KMeans clustering to identify spending personas
 
 import numpy as np
 import pandas as pd
-from sklearn.cluster import KMeans
-from typing import Dict, List, Tuple
-import joblib
+from typing import Dict, List, Optional, Tuple
 import os
 
+from models.neighbors import PEER_NEIGHBORS, PeerIndex
+from pipeline.feature_kernel import ReferenceStats
+
 
 class SpendingClusterModel:
     """KMeans clustering model for spending pattern analysis"""
@@ -61,13 +62,13 @@ class SpendingClusterModel:
             n_clusters: Number of clusters (spending personas)
         """
         self.n_clusters = n_clusters
-        self.model = KMeans(
-            n_clusters=n_clusters,
-            random_state=42,
-            n_init=10
-        )
+        self.model = None  # KMeans is created on first fit (sklearn is imported lazily)
         self.is_fitted = False
         self.cluster_centers = None
+        # Spend statistics of the training features (pipeline.feature_kernel.ReferenceStats)
+        self.feature_reference = None
+        # Nearest-neighbour index over the training rows (models.neighbors.PeerIndex)
+        self.peer_index = None
         
     def fit(self, X: np.ndarray) -> 'SpendingClusterModel':
         """
@@ -79,6 +80,14 @@ class SpendingClusterModel:
         Returns:
             Self for chaining
         """
+        if self.model is None:
+            from sklearn.cluster import KMeans
+
+            self.model = KMeans(
+                n_clusters=self.n_clusters,
+                random_state=42,
+                n_init=10
+            )
         self.model.fit(X)
         self.cluster_centers = self.model.cluster_centers_
         self.is_fitted = True
@@ -162,6 +171,43 @@ class SpendingClusterModel:
             "is_typical": typicality_score > 60
         }
     
+    def build_peer_index(self, X: np.ndarray) -> 'SpendingClusterModel':
+        """
+        Index the training rows for similar_peers
+
+        Args:
+            X: Feature matrix the model was fitted on
+        
+        Returns:
+            Self for chaining
+        """
+        self.peer_index = PeerIndex(X, self.predict(X))
+        return self
+    
+    def similar_peers(self, X: np.ndarray, k: int = PEER_NEIGHBORS) -> Optional[List[Dict]]:
+        """
+        Spending profile of the k most similar reference students
+        
+        Args:
+            X: Feature vector of one user, or a (users × features) matrix
+            k: Number of peers
+        
+        Returns:
+            One profile per user (see PeerIndex.profiles) with the peers'
+            persona mix by name, or None without a peer index
+        """
+        if self.peer_index is None:
+            return None
+        
+        profiles = self.peer_index.profiles(X, k)
+        for profile in profiles:
+            shares = profile.pop("cluster_share", {})
+            profile["persona_share"] = {
+                self.get_persona(cluster_id)["name"]: share
+                for cluster_id, share in shares.items()
+            }
+        return profiles
+    
     def get_cluster_statistics(self, X: np.ndarray) -> Dict:
         """
         Get statistics about all clusters
@@ -198,13 +244,20 @@ class SpendingClusterModel:
         Args:
             path: Path to save file
         """
+        import joblib
+
         os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so readers (model file watcher) never see a partial file
+        tmp_path = f"{path}.tmp"
         joblib.dump({
             'model': self.model,
             'n_clusters': self.n_clusters,
             'is_fitted': self.is_fitted,
-            'cluster_centers': self.cluster_centers
-        }, path)
+            'cluster_centers': self.cluster_centers,
+            'feature_reference': self.feature_reference.to_dict() if self.feature_reference else None,
+            'peer_index': self.peer_index.to_dict() if self.peer_index else None,
+        }, tmp_path)
+        os.replace(tmp_path, path)
         print(f"✅ Clustering model saved to {path}")
     
     @classmethod
@@ -221,11 +274,15 @@ class SpendingClusterModel:
         if not os.path.exists(path):
             raise FileNotFoundError(f"Model not found at {path}")
         
+        import joblib
+
         data = joblib.load(path)
         model_instance = cls(n_clusters=data['n_clusters'])
         model_instance.model = data['model']
         model_instance.is_fitted = data['is_fitted']
         model_instance.cluster_centers = data['cluster_centers']
+        model_instance.feature_reference = ReferenceStats.from_dict(data.get('feature_reference'))
+        model_instance.peer_index = PeerIndex.from_dict(data.get('peer_index'))
         
         print(f"✅ Clustering model loaded from {path}")
         return model_instance
@@ -14,6 +14,9 @@ from enum import Enum
 import json
 import os
 
+from pipeline.aggregates import SpendMatrix
+from pipeline.categories import CATEGORIES
+
 
 class PatternType(str, Enum):
     SPENDING_INCREASE = "spending_increase"
@@ -52,20 +55,6 @@ class CoachingMessage:
         return asdict(self)
 
 
-# Category labels for Korean UI
-CATEGORY_LABELS = {
-    "food": "식비",
-    "delivery": "배달",
-    "cafe": "카페",
-    "transport": "교통비",
-    "shopping": "쇼핑",
-    "entertainment": "문화/여가",
-    "education": "교육",
-    "health": "의료/건강",
-    "utilities": "공과금",
-    "other": "기타",
-}
-
 TIME_SLOT_LABELS = {
     "morning": "아침",
     "afternoon": "오후",
@@ -130,26 +119,37 @@ def analyze_spending_patterns(
     if transactions.empty:
         return {"has_data": False}
     
-    transactions = transactions.copy()
-    transactions['date'] = pd.to_datetime(transactions['date'])
-    transactions['month'] = transactions['date'].dt.to_period('M')
+    # Aggregate on category codes into (month, category, time_slot) cells
+    return analyze_spending_matrix(SpendMatrix.from_frame(transactions))
+
+
+def analyze_spending_matrix(matrix: SpendMatrix, now: datetime = None) -> Dict:
+    """
+    Analyze spending patterns from pre-aggregated spending.
     
-    # Get current and previous month
-    current_month = pd.Period(datetime.now(), freq='M')
-    prev_month = current_month - 1
+    Same result as analyze_spending_patterns on the transactions the
+    matrix was built from.
     
-    current_data = transactions[transactions['month'] == current_month]
-    prev_data = transactions[transactions['month'] == prev_month]
+    Args:
+        matrix: SpendMatrix of (month, category, time_slot) totals
+        now: Reference time for the current month (defaults to now)
     
-    # Category spending analysis
-    current_by_category = current_data.groupby('category')['amount'].sum()
-    prev_by_category = prev_data.groupby('category')['amount'].sum()
+    Returns:
+        Dictionary containing pattern analysis results
+    """
+    if not matrix.cells:
+        return {"has_data": False}
+    
+    current_month = pd.Period(now or datetime.now(), freq='M')
+    prev_month = current_month - 1
+    
+    current_by_category = matrix.month_category_totals(str(current_month))
+    prev_by_category = matrix.month_category_totals(str(prev_month))
     
-    # Calculate month-over-month changes
     category_changes = {}
-    for category in current_by_category.index:
-        current_amt = current_by_category.get(category, 0)
-        prev_amt = prev_by_category.get(category, 0) if category in prev_by_category.index else 0
+    time_slot_by_category = {}
+    for category, current_amt in current_by_category.items():
+        prev_amt = prev_by_category.get(category, 0)
         
         if prev_amt > 0:
             pct_change = ((current_amt - prev_amt) / prev_amt) * 100
@@ -162,29 +162,22 @@ def analyze_spending_patterns(
             "change_amount": float(current_amt - prev_amt),
             "change_percent": float(pct_change)
         }
-    
-    # Time slot analysis for current month
-    time_slot_by_category = {}
-    if 'time_slot' in current_data.columns:
-        for category in current_by_category.index:
-            cat_data = current_data[current_data['category'] == category]
-            if not cat_data.empty and 'time_slot' in cat_data.columns:
-                cat_data_with_slots = cat_data[cat_data['time_slot'].notna()]
-                if not cat_data_with_slots.empty:
-                    slot_totals = cat_data_with_slots.groupby('time_slot')['amount'].sum()
-                    dominant_slot = slot_totals.idxmax() if not slot_totals.empty else None
-                    time_slot_by_category[category] = {
-                        "slots": slot_totals.to_dict(),
-                        "dominant": dominant_slot
-                    }
+        
+        slot_totals = matrix.time_slot_totals(str(current_month), category)
+        if slot_totals:
+            time_slot_by_category[category] = {
+                "slots": slot_totals,
+                # First slot with the highest total, like Series.idxmax
+                "dominant": max(slot_totals, key=slot_totals.get)
+            }
     
     return {
         "has_data": True,
         "current_month": str(current_month),
         "category_changes": category_changes,
         "time_patterns": time_slot_by_category,
-        "total_current": float(current_data['amount'].sum()),
-        "total_previous": float(prev_data['amount'].sum()),
+        "total_current": float(sum(current_by_category.values())),
+        "total_previous": float(sum(prev_by_category.values())),
     }
 
 
@@ -202,8 +195,19 @@ def generate_coaching_message(
     Returns:
         CoachingMessage with personalized advice
     """
-    patterns = analyze_spending_patterns(transactions)
+    return coaching_message_from_patterns(analyze_spending_patterns(transactions))
+
+
+def coaching_message_from_patterns(patterns: Dict) -> CoachingMessage:
+    """
+    Generate a coaching message from a pattern analysis.
+    
+    Args:
+        patterns: Result of analyze_spending_patterns or analyze_spending_matrix
     
+    Returns:
+        CoachingMessage with personalized advice
+    """
     # Default positive message if no data
     if not patterns.get("has_data"):
         return CoachingMessage(
@@ -236,7 +240,7 @@ def generate_coaching_message(
     if significant_increases:
         top_increase = significant_increases[0]
         category = top_increase["category"]
-        category_label = CATEGORY_LABELS.get(category, category)
+        category_label = CATEGORIES.label(category)
         pct = round(top_increase["change_percent"])
         
         # Build title
@@ -297,7 +301,7 @@ def generate_coaching_message(
 
 def _generate_challenge(category: str, pattern_data: Dict) -> Optional[SuggestedChallenge]:
     """Generate a specific challenge based on category and pattern."""
-    category_label = CATEGORY_LABELS.get(category, category)
+    category_label = CATEGORIES.label(category)
     
     # Load patterns from dataset analysis
     patterns = load_coaching_patterns()
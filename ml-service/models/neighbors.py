@@ -0,0 +1,137 @@
+"""
+Peer Neighbour Index
+"Students like you": nearest neighbours of a user's spending ratios in the
+reference population the persona model was trained on
+
+Built once at training time and saved inside the clustering model file.
+Queries are blocked brute force in NumPy (squared distances via one
+matrix product per block of queries), which for a few thousand
+low-dimensional rows beats tree indexes and needs no extra dependency:
+one user costs tens of microseconds, and batch queries reuse the same
+kernel a block at a time so memory stays bounded.
+"""
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from pipeline.categories import DATASET_SPENDING_COLUMNS, DATASET_TO_APP
+
+
+PEER_NEIGHBORS = int(os.getenv("ML_PEER_NEIGHBORS", "20"))
+QUERY_BLOCK_SIZE = 1024  # Queries per distance block (block x N float64 matrix)
+
+# Peer ratios are reported per app category; several dataset columns fold into one
+PROFILE_CATEGORIES = sorted({DATASET_TO_APP[col] for col in DATASET_SPENDING_COLUMNS})
+_APP_FOLD = (
+    np.array([DATASET_TO_APP[col] for col in DATASET_SPENDING_COLUMNS])[:, None]
+    == np.array(PROFILE_CATEGORIES)[None, :]
+).astype(np.float64)
+
+
+class PeerIndex:
+    """Brute-force k-NN index over clustering (ratio) features"""
+
+    def __init__(self, points: np.ndarray, labels: Optional[np.ndarray] = None):
+        """
+        Args:
+            points: (N x F) clustering features whose first 8 columns are the
+                    spending ratios (%) per dataset spending column
+            labels: (N,) persona cluster of each row, if known
+        """
+        self.points = np.ascontiguousarray(points, dtype=np.float64)
+        self.labels = None if labels is None else np.asarray(labels, dtype=np.int64)
+        self._norms = np.einsum("ij,ij->i", self.points, self.points)
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def query(self, X: np.ndarray, k: int = PEER_NEIGHBORS) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        k nearest reference rows of each query row
+
+        Args:
+            X: (Q x F) or (F,) query features
+            k: Neighbours per query (capped at the index size)
+
+        Returns:
+            Tuple of (Q x k) Euclidean distances and (Q x k) row indices,
+            nearest first
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        k = min(k, len(self.points))
+        distances = np.empty((len(X), k))
+        indices = np.empty((len(X), k), dtype=np.int64)
+
+        for start in range(0, len(X), QUERY_BLOCK_SIZE):
+            block = X[start:start + QUERY_BLOCK_SIZE]
+            # |x - p|^2 = |x|^2 - 2 x.p + |p|^2
+            d2 = self._norms[None, :] - 2 * block @ self.points.T
+            d2 += np.einsum("ij,ij->i", block, block)[:, None]
+
+            if k < len(self.points):
+                nearest = np.argpartition(d2, k - 1, axis=1)[:, :k]
+            else:
+                nearest = np.broadcast_to(np.arange(k), (len(block), k))
+            nearest_d2 = np.take_along_axis(d2, nearest, axis=1)
+            order = np.argsort(nearest_d2, axis=1)
+
+            rows = slice(start, start + len(block))
+            indices[rows] = np.take_along_axis(nearest, order, axis=1)
+            distances[rows] = np.sqrt(np.maximum(np.take_along_axis(nearest_d2, order, axis=1), 0))
+        return distances, indices
+
+    def profiles(self, X: np.ndarray, k: int = PEER_NEIGHBORS) -> List[Dict]:
+        """
+        Aggregate spending profile of each query row's k nearest peers
+
+        Args:
+            X: (Q x F) or (F,) query features
+            k: Peers per query
+
+        Returns:
+            One dict per query: k, mean_distance, spending_ratios (peers'
+            mean % per app category), user_spending_ratios (the query's own
+            %, same keys) and cluster_share (cluster id -> share of peers,
+            when labels are known)
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        distances, indices = self.query(X, k)
+        n_ratios = len(DATASET_SPENDING_COLUMNS)
+        peer_ratios = self.points[indices, :n_ratios].mean(axis=1) @ _APP_FOLD
+        user_ratios = X[:, :n_ratios] @ _APP_FOLD
+
+        if self.labels is not None:
+            n_clusters = int(self.labels.max()) + 1
+            peer_labels = self.labels[indices]
+            shares = (peer_labels[:, :, None] == np.arange(n_clusters)).mean(axis=1)
+
+        results = []
+        for q in range(len(indices)):
+            profile = {
+                "k": int(indices.shape[1]),
+                "mean_distance": float(distances[q].mean()),
+                "spending_ratios": dict(zip(PROFILE_CATEGORIES, peer_ratios[q].tolist())),
+                "user_spending_ratios": dict(zip(PROFILE_CATEGORIES, user_ratios[q].tolist())),
+            }
+            if self.labels is not None:
+                profile["cluster_share"] = {
+                    int(c): float(s) for c, s in enumerate(shares[q]) if s > 0
+                }
+            results.append(profile)
+        return results
+
+    def to_dict(self) -> Dict:
+        return {
+            "columns": list(DATASET_SPENDING_COLUMNS),
+            "points": self.points,
+            "labels": self.labels,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> Optional["PeerIndex"]:
+        """Inverse of to_dict (None for missing or mismatching data)"""
+        if not data or data.get("columns") != list(DATASET_SPENDING_COLUMNS):
+            return None
+        return cls(data["points"], data.get("labels"))
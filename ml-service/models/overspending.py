@@ -19,7 +19,8 @@ class OverspendingPredictor:
         current_spending: Dict[str, float],
         budget: Dict[str, float],
         historical_avg: Dict[str, float] = None,
-        days_remaining: int = 15
+        days_remaining: int = 15,
+        projections: Dict[str, Dict] = None
     ) -> Dict:
         """
         Predict risk of overspending in each category
@@ -29,6 +30,9 @@ class OverspendingPredictor:
             budget: Budget by category
             historical_avg: Historical average spending (optional)
             days_remaining: Days remaining in the month
+            projections: Month-end projections by category (models.forecast,
+                         with projected_total, lower and upper); categories
+                         without one are projected from the average daily rate
         
         Returns:
             Dict with risk assessment
@@ -45,7 +49,14 @@ class OverspendingPredictor:
             remaining = max(0, budget_amount - spent)
             
             # Project spending to end of month
-            if days_remaining > 0:
+            projection = projections.get(category) if projections else None
+            projected_lower = projected_upper = None
+            if projection is not None:
+                projected_total = projection["projected_total"]
+                projected_over = max(0, projected_total - budget_amount)
+                projected_lower = float(projection["lower"])
+                projected_upper = float(projection["upper"])
+            elif days_remaining > 0:
                 days_in_month = 30
                 days_elapsed = days_in_month - days_remaining
                 if days_elapsed > 0:
@@ -131,6 +142,8 @@ class OverspendingPredictor:
                 "spent_percentage": float(spent_pct),
                 "projected_total": float(projected_total),
                 "projected_over": float(projected_over),
+                "projected_lower": projected_lower,
+                "projected_upper": projected_upper,
                 "risk_factors": risk_factors
             }
             
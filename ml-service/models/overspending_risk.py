@@ -6,8 +6,6 @@ Predicts likelihood of exceeding budget based on current spending patterns
 import pandas as pd
 import numpy as np
 from typing import Dict, List
-from sklearn.linear_model import LogisticRegression
-import joblib
 import os
 
 
@@ -121,6 +119,8 @@ class OverspendingRiskPredictor:
             X: Feature matrix
             y: Binary labels (0: within budget, 1: exceeded budget)
         """
+        from sklearn.linear_model import LogisticRegression
+
         self.model = LogisticRegression(random_state=42)
         self.model.fit(X, y)
         self._trained = True
@@ -132,6 +132,8 @@ class OverspendingRiskPredictor:
         if not self.is_trained():
             return
 
+        import joblib
+
         os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
         joblib.dump(self.model, self.model_path)
 
@@ -139,6 +141,8 @@ class OverspendingRiskPredictor:
         """Load trained model"""
         if os.path.exists(self.model_path):
             try:
+                import joblib
+
                 self.model = joblib.load(self.model_path)
                 self._trained = True
             except Exception as e:
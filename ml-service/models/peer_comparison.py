@@ -13,6 +13,9 @@ import uuid
 import json
 import os
 
+from monitoring.metrics import REGISTRY
+from pipeline.categories import CATEGORIES
+
 
 @dataclass
 class PeerComparisonMessage:
@@ -42,21 +45,6 @@ SIMILARITY_THRESHOLD = 5
 # USD to KRW conversion rate (approximate)
 USD_TO_KRW = 1300
 
-# Category labels for Korean UI
-CATEGORY_LABELS = {
-    "food": "식비",
-    "delivery": "배달",
-    "cafe": "카페",
-    "transport": "교통비",
-    "shopping": "쇼핑",
-    "entertainment": "문화/여가",
-    "education": "교육",
-    "health": "의료/건강",
-    "utilities": "공과금",
-    "other": "기타",
-}
-
-
 def get_age_group(birth_year: int) -> str:
     """Determine age group from birth year."""
     current_year = datetime.now().year
@@ -164,13 +152,17 @@ def get_mock_cohort_stats() -> Dict[str, Dict]:
 
 # Load cohort stats at module level
 _COHORT_STATS = None
+_COHORT_CACHE_STATS = REGISTRY.cache("cohort_stats")
 
 
 def get_cohort_stats() -> Dict[str, Dict]:
     """Get cohort statistics, loading from file if not already loaded."""
     global _COHORT_STATS
     if _COHORT_STATS is None:
+        _COHORT_CACHE_STATS.miss()
         _COHORT_STATS = load_cohort_stats_from_file()
+    else:
+        _COHORT_CACHE_STATS.hit()
     return _COHORT_STATS
 
 
@@ -191,6 +183,38 @@ def generate_peer_comparison_message(
         cohort_stats: Pre-computed cohort statistics (uses real data if None)
         period: Target period in 'YYYY-MM' format
 
+    Returns:
+        PeerComparisonMessage with comparison data
+    """
+    if user_transactions.empty:
+        category_totals = {}
+    else:
+        category_totals = CATEGORIES.column_totals(
+            user_transactions["category"], user_transactions["amount"]
+        )
+
+    return peer_comparison_from_totals(
+        user_id, user_birth_year, category_totals, cohort_stats, period
+    )
+
+
+def peer_comparison_from_totals(
+    user_id: str,
+    user_birth_year: int,
+    category_totals: Dict[str, float],
+    cohort_stats: Dict[str, Dict] | None = None,
+    period: str | None = None,
+) -> PeerComparisonMessage:
+    """
+    Generate a peer comparison message from the user's spending by category.
+
+    Args:
+        user_id: User identifier
+        user_birth_year: User's birth year
+        category_totals: Spending by category for the period (sorted by category)
+        cohort_stats: Pre-computed cohort statistics (uses real data if None)
+        period: Target period in 'YYYY-MM' format
+
     Returns:
         PeerComparisonMessage with comparison data
     """
@@ -203,10 +227,7 @@ def generate_peer_comparison_message(
     age_group = get_age_group(user_birth_year)
 
     # Calculate user spending
-    if user_transactions.empty:
-        user_spending = 0
-    else:
-        user_spending = float(user_transactions["amount"].sum())
+    user_spending = float(sum(category_totals.values())) if category_totals else 0
 
     # Check if cohort data is available
     if age_group not in cohort_stats:
@@ -236,15 +257,9 @@ def generate_peer_comparison_message(
 
     # Find top excess category if spending is above average
     top_excess_category = None
-    if (
-        comparison_type == "above"
-        and "category_averages" in cohort
-        and not user_transactions.empty
-    ):
-        user_by_category = user_transactions.groupby("category")["amount"].sum()
+    if comparison_type == "above" and "category_averages" in cohort:
         max_excess = 0
-        for category in user_by_category.index:
-            user_amt = user_by_category[category]
+        for category, user_amt in category_totals.items():
             cohort_cat_avg = cohort["category_averages"].get(category, 0)
             excess = user_amt - cohort_cat_avg
             if excess > max_excess:
@@ -303,7 +318,7 @@ def _generate_comparison_message(
         diff = user_spending - cohort_average
         category_hint = ""
         if top_excess_category:
-            cat_label = CATEGORY_LABELS.get(top_excess_category, top_excess_category)
+            cat_label = CATEGORIES.label(top_excess_category)
             category_hint = f" 특히 {cat_label} 지출을 조금 줄여보는 건 어떨까요?"
 
         return (
@@ -0,0 +1,116 @@
+"""
+Model Registry
+Versioned, immutable snapshots of the fitted components used by a request
+
+A request takes `get_model_registry().current()` once at entry and uses
+only that bundle, so publishing a new bundle (reload, retrain) never
+changes the models under an in-flight request. Publishing is a single
+reference swap; the old bundle is freed once its last request finishes.
+Published components must not be mutated: build new instances instead.
+"""
+
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+@dataclass(frozen=True)
+class ModelBundle:
+    """Immutable set of fitted components served together"""
+
+    version: int
+    preprocessor: Any
+    cluster_model: Any
+    trend_analyzer: Any
+    overspending_predictor: Any
+    source: str = "startup"
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    metadata: Dict = field(default_factory=dict)
+
+    @property
+    def models_loaded(self) -> bool:
+        """True when the persona model is fitted"""
+        return self.cluster_model is not None and self.cluster_model.is_fitted
+
+    def describe(self) -> Dict:
+        """JSON-friendly summary of the bundle"""
+        return {
+            "version": self.version,
+            "source": self.source,
+            "created_at": self.created_at,
+            "models_loaded": self.models_loaded,
+            "metadata": dict(self.metadata),
+        }
+
+
+class ModelRegistry:
+    """Holds the current ModelBundle and a short publish history"""
+
+    def __init__(self, history_size: int = 5):
+        self._lock = threading.Lock()
+        self._current: Optional[ModelBundle] = None
+        self._history: List[Dict] = []
+        self._history_size = history_size
+        self._next_version = 1
+
+    def current(self) -> Optional[ModelBundle]:
+        """The bundle new requests should use (None before the first publish)"""
+        return self._current
+
+    def publish(
+        self,
+        preprocessor,
+        cluster_model,
+        trend_analyzer,
+        overspending_predictor,
+        source: str = "startup",
+        metadata: Dict = None,
+    ) -> ModelBundle:
+        """
+        Atomically make a new bundle current
+
+        Args:
+            preprocessor: SpendingPreprocessor
+            cluster_model: Fitted SpendingClusterModel (or None)
+            trend_analyzer: TrendAnalyzer
+            overspending_predictor: OverspendingPredictor
+            source: Where the bundle came from ('startup', 'reload', 'watch', ...)
+            metadata: Extra information (paths, validation metrics, ...)
+
+        Returns:
+            The published bundle
+        """
+        with self._lock:
+            bundle = ModelBundle(
+                version=self._next_version,
+                preprocessor=preprocessor,
+                cluster_model=cluster_model,
+                trend_analyzer=trend_analyzer,
+                overspending_predictor=overspending_predictor,
+                source=source,
+                metadata=dict(metadata or {}),
+            )
+            self._next_version += 1
+            self._current = bundle
+            self._history.append(bundle.describe())
+            del self._history[:-self._history_size]
+
+        print(f"📦 Published model bundle v{bundle.version} ({source})")
+        return bundle
+
+    def history(self) -> List[Dict]:
+        """Summaries of recently published bundles, oldest first"""
+        with self._lock:
+            return list(self._history)
+
+
+# Singleton instance
+_model_registry = None
+
+def get_model_registry() -> ModelRegistry:
+    """Get or create model registry singleton instance"""
+    global _model_registry
+    if _model_registry is None:
+        _model_registry = ModelRegistry()
+    return _model_registry
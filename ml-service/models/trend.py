@@ -5,7 +5,8 @@ Detects spending trends and patterns over time
 
 import numpy as np
 from typing import Dict, List, Tuple
-from scipy import stats
+
+from models.forecast import forecast_series
 
 
 class TrendAnalyzer:
@@ -42,7 +43,9 @@ class TrendAnalyzer:
         if len(non_zero_values) < 2:
             return self._get_no_data_result()
         
-        # Calculate linear regression
+        # Calculate linear regression (scipy is imported on first use)
+        from scipy import stats
+
         x = np.arange(len(values))
         slope, intercept, r_value, p_value, std_err = stats.linregress(x, values_arr)
         
@@ -218,10 +221,10 @@ class TrendAnalyzer:
         confidence: float = 0.95
     ) -> Dict:
         """
-        Simple prediction for next month's spending
+        Predict next month's spending
         
         Args:
-            values: Historical spending values
+            values: Historical spending values (complete months, oldest first)
             confidence: Confidence level for prediction interval
         
         Returns:
@@ -234,27 +237,13 @@ class TrendAnalyzer:
                 "method": "insufficient_data"
             }
         
-        # Linear regression for trend
-        x = np.arange(len(values))
-        slope, intercept, r_value, p_value, std_err = stats.linregress(x, values)
-        
-        # Predict next value
-        next_x = len(values)
-        prediction = slope * next_x + intercept
-        
-        # Calculate confidence interval
-        residuals = np.array(values) - (slope * x + intercept)
-        residual_std = np.std(residuals)
-        margin = residual_std * 1.96  # 95% confidence
-        
-        lower_bound = max(0, prediction - margin)
-        upper_bound = prediction + margin
+        # Damped-trend exponential smoothing (see models/forecast.py)
+        forecast = forecast_series(np.array([values], dtype=float), horizon=1, level=confidence)
         
         return {
-            "prediction": float(max(0, prediction)),
-            "confidence_interval": (float(lower_bound), float(upper_bound)),
-            "method": "linear_regression",
-            "r_squared": float(r_value ** 2) if r_value else 0
+            "prediction": float(forecast["point"][0, 0]),
+            "confidence_interval": (float(forecast["lower"][0, 0]), float(forecast["upper"][0, 0])),
+            "method": "damped_exponential_smoothing"
         }
     
     def _get_no_data_result(self) -> Dict:
@@ -0,0 +1,2 @@
+# Monitoring Package
+
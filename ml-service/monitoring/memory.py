@@ -0,0 +1,211 @@
+"""
+Memory Profiling
+tracemalloc-based peak allocation measurement per pipeline stage
+"""
+
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from pipeline.data_loader import DataLoader
+from pipeline.feature_engineer import FeatureEngineer
+from pipeline.preprocessor import SpendingPreprocessor
+from models.clustering import SpendingClusterModel
+from models.trend import TrendAnalyzer
+from models.overspending import OverspendingPredictor
+from models.anomaly import flag_transactions
+from models.coaching import analyze_spending_patterns
+from models.forecast import next_month_forecast, project_month_end
+from models.peer_comparison import generate_peer_comparison_message
+
+
+# Peak allocation budgets (MiB) per stage for a REFERENCE_SIZE-transaction payload.
+# Stages that only touch per-user aggregates should stay well under 1 MiB.
+REFERENCE_SIZE = 10000
+
+STAGE_BUDGETS_MB = {
+    "category_totals": 0.25,
+    "monthly_trend": 4.0,
+    "anomalies": 2.0,
+    "forecast.month_end": 1.0,
+    "features": 0.25,
+    "engineer_features": 0.5,
+    "persona": 0.25,
+    "similar_peers": 0.25,
+    "trend": 0.25,
+    "forecast.next_month": 0.25,
+    "overspending": 0.25,
+    "savings": 0.25,
+    "preprocessor_transform": 0.5,
+    "prepare_for_prediction": 0.5,
+    "feature_engineer.monthly": 4.0,
+    "feature_engineer.category": 1.0,
+    "feature_engineer.trend": 2.0,
+    "feature_engineer.patterns": 2.0,
+    "coaching_patterns": 2.0,
+    "peer_comparison": 1.0,
+}
+
+
+def measure_peak(fn: Callable, *args, **kwargs) -> Tuple[Any, int]:
+    """
+    Run fn and measure its peak traced allocation
+
+    Args:
+        fn: Callable to measure
+        *args, **kwargs: Arguments forwarded to fn
+
+    Returns:
+        Tuple of (fn result, peak bytes allocated above the starting level)
+    """
+    started_here = not tracemalloc.is_tracing()
+    if started_here:
+        tracemalloc.start()
+
+    try:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        result = fn(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if started_here:
+            tracemalloc.stop()
+
+    return result, max(0, peak - baseline)
+
+
+def profile_pipeline_memory(
+    transactions: List[Dict],
+    budget: Dict[str, float],
+    cluster_model: Optional[SpendingClusterModel] = None,
+    preprocessor: Optional[SpendingPreprocessor] = None,
+    birth_year: int = 2003,
+) -> Dict[str, int]:
+    """
+    Measure peak allocation of every pipeline stage for one request
+
+    Stages run in the same order and on the same intermediate results as
+    /predict/insights (pipeline.insights.build_insights: aggregates,
+    anomalies, month-end forecast, features from category totals, persona
+    and similar peers, trend and next-month forecast, overspending,
+    savings), followed by the transform / prediction / FeatureEngineer
+    steps and the coaching and peer comparison endpoints.
+
+    Args:
+        transactions: Transaction dicts as sent to /predict/insights
+        budget: Current month budget by category
+        cluster_model: Fitted cluster model (persona stage skipped if None)
+        preprocessor: Preprocessor (a fresh one is used if None)
+        birth_year: Birth year used for peer comparison
+
+    Returns:
+        Dict mapping stage name to peak bytes allocated during that stage
+    """
+    loader = DataLoader()
+    preprocessor = preprocessor or SpendingPreprocessor()
+    trend_analyzer = TrendAnalyzer()
+    predictor = OverspendingPredictor()
+    engineer = FeatureEngineer()
+
+    peaks = {}
+
+    tracemalloc.start()
+    try:
+        category_totals, peaks["category_totals"] = measure_peak(
+            loader.get_category_totals, transactions
+        )
+        monthly_trend, peaks["monthly_trend"] = measure_peak(
+            loader.get_monthly_trend, transactions, 3
+        )
+        _, peaks["anomalies"] = measure_peak(flag_transactions, transactions)
+        month_end, peaks["forecast.month_end"] = measure_peak(
+            project_month_end,
+            [t["date"] for t in transactions],
+            [t.get("category", "other") for t in transactions],
+            [t.get("amount", 0) for t in transactions],
+        )
+
+        features_df, peaks["features"] = measure_peak(
+            loader.features_from_category_totals, category_totals
+        )
+        features_eng, peaks["engineer_features"] = measure_peak(
+            preprocessor.engineer_features, features_df
+        )
+
+        if cluster_model is not None and cluster_model.is_fitted:
+            X_user = preprocessor.prepare_for_clustering(features_eng)
+            _, peaks["persona"] = measure_peak(cluster_model.analyze_user_persona, X_user[0])
+            _, peaks["similar_peers"] = measure_peak(cluster_model.similar_peers, X_user[0])
+
+        _, peaks["trend"] = measure_peak(trend_analyzer.analyze_trend, monthly_trend)
+        _, peaks["forecast.next_month"] = measure_peak(next_month_forecast, monthly_trend, month_end)
+        _, peaks["overspending"] = measure_peak(
+            predictor.predict_overspending_risk,
+            current_spending=category_totals,
+            budget=budget,
+            days_remaining=15,
+        )
+        _, peaks["savings"] = measure_peak(
+            predictor.generate_savings_recommendations,
+            current_spending=category_totals,
+            budget=budget,
+        )
+
+        if preprocessor.is_fitted:
+            _, peaks["preprocessor_transform"] = measure_peak(preprocessor.transform, features_eng)
+        _, peaks["prepare_for_prediction"] = measure_peak(
+            preprocessor.prepare_for_prediction, features_eng, budget
+        )
+
+        trans_df = pd.DataFrame(transactions)
+        _, peaks["feature_engineer.monthly"] = measure_peak(engineer.create_monthly_features, trans_df)
+        _, peaks["feature_engineer.category"] = measure_peak(engineer.aggregate_by_category, trans_df)
+        _, peaks["feature_engineer.trend"] = measure_peak(engineer.create_trend_features, trans_df)
+        _, peaks["feature_engineer.patterns"] = measure_peak(engineer.create_spending_patterns, trans_df)
+
+        _, peaks["coaching_patterns"] = measure_peak(analyze_spending_patterns, trans_df)
+        _, peaks["peer_comparison"] = measure_peak(
+            generate_peer_comparison_message,
+            user_id="memory-profile",
+            user_birth_year=birth_year,
+            user_transactions=trans_df,
+        )
+    finally:
+        tracemalloc.stop()
+
+    return peaks
+
+
+def check_budgets(
+    peaks: Dict[str, int],
+    n_transactions: int,
+    budgets_mb: Dict[str, float] = None,
+) -> Dict[str, Tuple[float, float]]:
+    """
+    Find stages whose peak allocation exceeds their budget
+
+    Budgets are defined for REFERENCE_SIZE transactions and scaled linearly
+    for larger payloads (never scaled down below the reference budget).
+
+    Args:
+        peaks: Stage -> peak bytes (from profile_pipeline_memory)
+        n_transactions: Payload size the peaks were measured with
+        budgets_mb: Stage -> budget in MiB (defaults to STAGE_BUDGETS_MB)
+
+    Returns:
+        Dict mapping over-budget stage to (peak MiB, budget MiB)
+    """
+    budgets_mb = budgets_mb or STAGE_BUDGETS_MB
+    scale = max(1.0, n_transactions / REFERENCE_SIZE)
+
+    exceeded = {}
+    for stage, peak in peaks.items():
+        if stage not in budgets_mb:
+            continue
+        peak_mb = peak / (1024 * 1024)
+        budget_mb = budgets_mb[stage] * scale
+        if peak_mb > budget_mb:
+            exceeded[stage] = (peak_mb, budget_mb)
+
+    return exceeded
@@ -0,0 +1,308 @@
+"""
+Service Metrics
+Prometheus-compatible counters and histograms with a text exposition renderer
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from monitoring.profiling import REQUEST_PROFILE, record_stage
+
+
+# Default histogram buckets
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+PAYLOAD_BYTES_BUCKETS = (
+    1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216,
+)
+TRANSACTION_COUNT_BUCKETS = (
+    10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000,
+)
+
+
+def _format_labels(labelnames: Sequence[str], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonically increasing counter keyed by label values"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount: float = 1.0):
+        """Increment the counter for the given label values"""
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def get(self, *labelvalues) -> float:
+        """Current value for the given label values"""
+        return self._values.get(labelvalues, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+        ]
+        for labelvalues, value in sorted(self._values.items()):
+            lines.append(
+                f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}"
+            )
+        return lines
+
+
+class Histogram:
+    """Fixed-bucket histogram keyed by label values"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labelvalues -> [per-bucket counts (last slot is +Inf), sum]
+        self._series: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues):
+        """Record one observation for the given label values"""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = [[0] * (len(self.buckets) + 1), 0.0]
+                self._series[labelvalues] = series
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, *labelvalues) -> int:
+        """Number of observations for the given label values"""
+        series = self._series.get(labelvalues)
+        return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            snapshot = [(k, list(v[0]), v[1]) for k, v in self._series.items()]
+
+        for labelvalues, counts, total in sorted(snapshot, key=lambda s: s[0]):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, labelvalues, le)} {cumulative}"
+                )
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class CacheStats:
+    """Hit/miss counters for an in-process cache"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+
+    def hit(self):
+        self.hits += 1
+
+    def miss(self):
+        self.misses += 1
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together in Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: List = []
+        self._caches: Dict[str, CacheStats] = {}
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def cache(self, name: str) -> CacheStats:
+        """Get or create hit/miss stats for a named cache"""
+        if name not in self._caches:
+            self._caches[name] = CacheStats(name)
+        return self._caches[name]
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus text exposition format (0.0.4)"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+
+        if self._caches:
+            caches = sorted(self._caches.items())
+            lines.append("# HELP ml_cache_requests_total Cache lookups by result")
+            lines.append("# TYPE ml_cache_requests_total counter")
+            for name, stats in caches:
+                lines.append(f'ml_cache_requests_total{{cache="{name}",result="hit"}} {stats.hits}')
+                lines.append(f'ml_cache_requests_total{{cache="{name}",result="miss"}} {stats.misses}')
+            lines.append("# HELP ml_cache_hit_ratio Cache hit ratio since process start")
+            lines.append("# TYPE ml_cache_hit_ratio gauge")
+            for name, stats in caches:
+                lines.append(f'ml_cache_hit_ratio{{cache="{name}"}} {_format_value(stats.hit_ratio)}')
+
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry and the service metrics
+REGISTRY = MetricsRegistry()
+
+REQUESTS = REGISTRY.counter(
+    "ml_requests_total", "HTTP requests by endpoint, method and status", ("endpoint", "method", "status")
+)
+ERRORS = REGISTRY.counter(
+    "ml_errors_total", "Requests that failed with a 5xx status", ("endpoint",)
+)
+REQUEST_LATENCY = REGISTRY.histogram(
+    "ml_request_duration_seconds", "End-to-end request latency", ("endpoint",)
+)
+PAYLOAD_BYTES = REGISTRY.histogram(
+    "ml_request_payload_bytes", "Request body size", ("endpoint",), PAYLOAD_BYTES_BUCKETS
+)
+PAYLOAD_TRANSACTIONS = REGISTRY.histogram(
+    "ml_request_transactions", "Transactions per request", ("endpoint",), TRANSACTION_COUNT_BUCKETS
+)
+STAGE_LATENCY = REGISTRY.histogram(
+    "ml_stage_duration_seconds", "Latency of each pipeline stage", ("endpoint", "stage")
+)
+
+
+class stage_timer:
+    """
+    Context manager timing one pipeline stage
+
+    Usage:
+        with stage_timer("insights", "persona"):
+            ...
+
+    Pass profile=False for stages that await: cProfile would otherwise also
+    record the other requests the event loop serves in the meantime.
+    """
+
+    __slots__ = ("endpoint", "stage", "profile", "_start", "_profile")
+
+    def __init__(self, endpoint: str, stage: str, profile: bool = True):
+        self.endpoint = endpoint
+        self.stage = stage
+        self.profile = profile
+
+    def __enter__(self):
+        self._profile = REQUEST_PROFILE.get() if self.profile else None
+        if self._profile is not None:
+            self._profile.enter()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._start
+        if self._profile is not None:
+            self._profile.exit()
+        STAGE_LATENCY.observe(duration, self.endpoint, self.stage)
+        record_stage(self.stage, duration)
+        return False
+
+
+def observe_transactions(endpoint: str, count: int):
+    """Record how many transactions a request carried"""
+    PAYLOAD_TRANSACTIONS.observe(count, endpoint)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request counts, errors, latency and payload size
+
+    Requests to paths that are not registered routes are grouped under
+    'other' to keep label cardinality bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._routes: Optional[set] = None
+
+    def _endpoint(self, scope) -> str:
+        if self._routes is None:
+            router_app = scope.get("app")
+            routes = getattr(router_app, "routes", [])
+            self._routes = {getattr(route, "path", None) for route in routes}
+        path = scope["path"]
+        return path if path in self._routes else "other"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        endpoint = self._endpoint(scope)
+        status_holder = [500]
+
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                PAYLOAD_BYTES.observe(int(value), endpoint)
+                break
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            status = status_holder[0]
+            REQUEST_LATENCY.observe(time.perf_counter() - start, endpoint)
+            REQUESTS.inc(endpoint, scope["method"], str(status))
+            if status >= 500:
+                ERRORS.inc(endpoint)
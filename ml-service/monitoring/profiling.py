@@ -0,0 +1,178 @@
+"""
+Per-Request Profiling
+Opt-in Server-Timing stage breakdown and cProfile dumps for single requests
+
+A request is profiled when it carries a valid X-API-Key together with either
+an `X-Profile` header or a `profile` query parameter:
+
+    X-Profile: 1            -> Server-Timing header with per-stage durations
+    X-Profile: cprofile     -> Server-Timing + pstats file in ML_PROFILE_DIR
+
+cProfile only runs inside synchronous stage_timer bodies: enabled across an
+await it would also record whatever else the event loop ran meanwhile.
+Stages that await (e.g. database fetches) are timed but not profiled, and so
+is work outside stages (request parsing by FastAPI, middleware).
+
+Requests without the flag pass straight through; the only cost on the hot
+path is two ContextVar lookups per timed stage.
+"""
+
+import cProfile
+import hmac
+import os
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+
+# Stage timings of the request currently being profiled (None when not profiling)
+REQUEST_TIMINGS: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar(
+    "request_timings", default=None
+)
+
+class StageProfile:
+    """cProfile profiler of one request, enabled only while a stage body runs"""
+
+    __slots__ = ("profiler", "_depth")
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self._depth = 0
+
+    def enter(self):
+        # Nested stages keep the outer one's profiler running
+        if self._depth == 0:
+            self.profiler.enable()
+        self._depth += 1
+
+    def exit(self):
+        self._depth -= 1
+        if self._depth == 0:
+            self.profiler.disable()
+
+
+# cProfile of the request currently being profiled (None when not cProfiling)
+REQUEST_PROFILE: ContextVar[Optional[StageProfile]] = ContextVar(
+    "request_profile", default=None
+)
+
+PROFILE_DIR = os.getenv("ML_PROFILE_DIR", "profiles")
+
+# Only one cProfile profiler can be active per process
+_cprofile_lock = threading.Lock()
+
+
+def record_stage(stage: str, duration: float):
+    """Append a stage duration to the active request profile, if any"""
+    timings = REQUEST_TIMINGS.get()
+    if timings is not None:
+        timings.append((stage, duration))
+
+
+def format_server_timing(timings: List[Tuple[str, float]], total: float) -> str:
+    """
+    Format stage timings as a Server-Timing header value
+
+    Durations of stages that ran more than once are summed.
+
+    Args:
+        timings: (stage, seconds) pairs in execution order
+        total: Total request time in seconds
+
+    Returns:
+        Header value, e.g. 'persona;dur=1.20, trend;dur=0.40, total;dur=5.00'
+    """
+    merged: Dict[str, float] = {}
+    for stage, duration in timings:
+        merged[stage] = merged.get(stage, 0.0) + duration
+
+    parts = [f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in merged.items()]
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+def _profile_mode(scope) -> Optional[str]:
+    """Requested profile mode ('timing' or 'cprofile') if authorised"""
+    mode = None
+    api_key = None
+    for name, value in scope.get("headers", []):
+        if name == b"x-profile":
+            mode = value.decode("latin-1").strip().lower()
+        elif name == b"x-api-key":
+            api_key = value.decode("latin-1")
+
+    if mode is None and b"profile" in scope.get("query_string", b""):
+        values = parse_qs(scope["query_string"].decode("latin-1")).get("profile")
+        if values:
+            mode = values[0].strip().lower()
+
+    if not mode or mode in ("0", "false", "off"):
+        return None
+
+    expected = os.getenv("ML_API_SECRET_KEY", "dev-secret-key")
+    if api_key is None or not hmac.compare_digest(api_key, expected):
+        return None
+
+    return "cprofile" if mode == "cprofile" else "timing"
+
+
+class ProfilingMiddleware:
+    """ASGI middleware adding Server-Timing and optional cProfile dumps"""
+
+    def __init__(self, app, profile_dir: str = None):
+        self.app = app
+        self.profile_dir = profile_dir or PROFILE_DIR
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        mode = _profile_mode(scope)
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        timings: List[Tuple[str, float]] = []
+        token = REQUEST_TIMINGS.set(timings)
+
+        profile = None
+        profile_token = None
+        profile_path = None
+        if mode == "cprofile" and _cprofile_lock.acquire(blocking=False):
+            profile = StageProfile()
+            profile_token = REQUEST_PROFILE.set(profile)
+            os.makedirs(self.profile_dir, exist_ok=True)
+            slug = scope["path"].strip("/").replace("/", "_") or "root"
+            profile_path = os.path.join(
+                self.profile_dir,
+                f"{datetime.now().strftime('%Y%m%d-%H%M%S')}_{slug}_{uuid.uuid4().hex[:8]}.prof",
+            )
+
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                total = time.perf_counter() - start
+                headers = list(message.get("headers", []))
+                headers.append(
+                    (b"server-timing", format_server_timing(timings, total).encode("latin-1"))
+                )
+                if profile_path:
+                    headers.append((b"x-profile-file", os.path.basename(profile_path).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if profile is not None:
+                REQUEST_PROFILE.reset(profile_token)
+                profile.profiler.dump_stats(profile_path)
+                _cprofile_lock.release()
+                print(f"📈 Request profile written to {profile_path}")
+            REQUEST_TIMINGS.reset(token)
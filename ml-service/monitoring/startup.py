@@ -0,0 +1,86 @@
+"""
+Startup Timing
+Records how long each boot stage takes (imports, dataset load, training, ...)
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+
+class BootTimer:
+    """Collect durations of named boot stages"""
+
+    def __init__(self):
+        self.timings: List[Tuple[str, float]] = []
+
+    def record(self, stage: str, seconds: float):
+        """Record a stage duration measured elsewhere"""
+        self.timings.append((stage, seconds))
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block as one boot stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def as_dict(self) -> Dict[str, float]:
+        """Stage -> seconds (repeated stages are summed)"""
+        result: Dict[str, float] = {}
+        for stage, seconds in self.timings:
+            result[stage] = result.get(stage, 0.0) + seconds
+        return result
+
+    def report(self) -> str:
+        """Human-readable breakdown of the recorded stages"""
+        timings = self.as_dict()
+        total = sum(timings.values())
+        lines = ["⏱️  Startup breakdown"]
+        for stage, seconds in timings.items():
+            share = (seconds / total * 100) if total > 0 else 0
+            lines.append(f"   {stage:<24} {seconds * 1000:9.1f} ms  {share:5.1f}%")
+        lines.append(f"   {'total':<24} {total * 1000:9.1f} ms")
+        return "\n".join(lines)
+
+
+def startup_profile_enabled() -> bool:
+    """True when ML_STARTUP_PROFILE is set to a truthy value"""
+    return os.getenv("ML_STARTUP_PROFILE", "").lower() in ("1", "true", "yes")
+
+
+BOOT_TIMER = BootTimer()
+
+
+class Readiness:
+    """
+    Per-component readiness for the /ready endpoint
+
+    Components move from 'pending' -> 'loading' -> 'ready' or 'failed'.
+    The service is ready once every component reports 'ready'.
+    """
+
+    def __init__(self, components: List[str]):
+        self._lock = threading.Lock()
+        self._status: Dict[str, Dict] = {
+            name: {"status": "pending", "error": None} for name in components
+        }
+
+    def mark(self, component: str, status: str, error: str = None):
+        """Set the status of one component"""
+        with self._lock:
+            self._status[component] = {"status": status, "error": error}
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Copy of component -> {'status', 'error'}"""
+        with self._lock:
+            return {name: dict(state) for name, state in self._status.items()}
+
+    @property
+    def is_ready(self) -> bool:
+        with self._lock:
+            return all(state["status"] == "ready" for state in self._status.values())
@@ -0,0 +1,407 @@
+"""
+Spend Aggregates
+Per-user (month × category × time_slot) spend sums and counts
+
+Every input the insight pipeline takes from a transaction list (category
+totals, monthly trend, dataset features) can be derived from these cells,
+so insights cost O(months × categories) instead of O(transactions).
+AggregateStore keeps the cells up to date from delta ingests (new, updated
+and soft-deleted transactions) and checkpoints them to disk.
+"""
+
+import gzip
+import json
+import os
+import re
+import threading
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from pipeline.categories import CATEGORIES
+
+
+CellKey = Tuple[str, str, Optional[str]]  # (YYYY-MM, category, time_slot)
+
+_ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def check_iso_dates(values: Iterable):
+    """
+    Raise ValueError unless every value is an ISO date
+
+    Strings must start with a valid 'YYYY-MM-DD' (a time part may follow);
+    dates and datetimes pass. Call this where dates enter the service:
+    month_key and the forecast day index only slice strings. Dates repeat
+    heavily within one history, so each distinct value is parsed once.
+
+    Args:
+        values: Transaction dates
+    """
+    for value in set(values):
+        if isinstance(value, date):
+            continue
+        try:
+            if not (isinstance(value, str) and _ISO_DATE.match(value)):
+                raise ValueError
+            date.fromisoformat(value[:10])
+        except ValueError:
+            raise ValueError(f"invalid date {value!r} (expected YYYY-MM-DD)") from None
+
+
+def month_key(value) -> str:
+    """'YYYY-MM' of an ISO date string (see check_iso_dates), date or datetime"""
+    if isinstance(value, str):
+        return value[:7]
+    return value.strftime("%Y-%m")
+
+
+def shift_month(month: str, delta: int) -> str:
+    """Add delta months to a 'YYYY-MM' key"""
+    index = int(month[:4]) * 12 + int(month[5:7]) - 1 + delta
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def monthly_trend_from_totals(
+    month_totals: Dict[str, float], months: int = 3, now: datetime = None
+) -> List[float]:
+    """
+    Spending of the last N calendar months, oldest first
+
+    Args:
+        month_totals: 'YYYY-MM' -> total amount
+        months: Number of months (the current month is the last entry)
+        now: Reference time (defaults to now)
+
+    Returns:
+        List of monthly totals
+    """
+    current = month_key(now or datetime.now())
+    return [
+        float(month_totals.get(shift_month(current, -i), 0.0))
+        for i in range(months - 1, -1, -1)
+    ]
+
+
+class SpendMatrix:
+    """Spend sum and transaction count per (month, category, time_slot)"""
+
+    __slots__ = ("cells",)
+
+    def __init__(self, cells: Dict[CellKey, List[float]] = None):
+        self.cells: Dict[CellKey, List[float]] = cells if cells is not None else {}
+
+    def add(self, month: str, category: str, time_slot: Optional[str], amount: float, count: int = 1):
+        """Add (or with negative values, remove) spend in one cell"""
+        key = (month, category, time_slot)
+        cell = self.cells.get(key)
+        if cell is None:
+            self.cells[key] = [amount, count]
+            return
+        cell[0] += amount
+        cell[1] += count
+        if cell[1] <= 0:
+            del self.cells[key]
+
+    @classmethod
+    def from_transactions(cls, transactions: Iterable[Dict]) -> "SpendMatrix":
+        """Aggregate a raw transaction list"""
+        matrix = cls()
+        for t in transactions:
+            matrix.add(
+                month_key(t["date"]),
+                CATEGORIES.canonical(t.get("category", "other")),
+                t.get("time_slot"),
+                float(t.get("amount", 0)),
+            )
+        return matrix
+
+    @classmethod
+    def from_frame(cls, trans_df: pd.DataFrame) -> "SpendMatrix":
+        """Aggregate a transactions DataFrame (date, amount, category[, time_slot])"""
+        if trans_df.empty:
+            return cls()
+        dates = pd.to_datetime(trans_df["date"])
+        month_index = (dates.dt.year * 100 + dates.dt.month).to_numpy()
+        time_slots = trans_df["time_slot"] if "time_slot" in trans_df.columns else None
+        grouped = (
+            pd.DataFrame({
+                "month": month_index,
+                "category": CATEGORIES.encode(trans_df["category"]),
+                "time_slot": time_slots.to_numpy() if time_slots is not None else None,
+                "amount": trans_df["amount"].to_numpy(),
+            })
+            .groupby(["month", "category", "time_slot"], dropna=False, sort=False)["amount"]
+            .agg(["sum", "count"])
+        )
+        matrix = cls()
+        for (month, category, time_slot), (amount, count) in zip(grouped.index, grouped.to_numpy()):
+            key = f"{month // 100:04d}-{month % 100:02d}"
+            matrix.add(
+                key,
+                CATEGORIES.name(category),
+                None if pd.isna(time_slot) else time_slot,
+                float(amount),
+                int(count),
+            )
+        return matrix
+
+    @classmethod
+    def from_cells(cls, cells: Iterable[Dict]) -> "SpendMatrix":
+        """
+        Build from pre-aggregated cells (e.g. the user_spend_cells RPC)
+
+        Args:
+            cells: Dicts with month ('YYYY-MM'), category, time_slot, amount and count
+        """
+        matrix = cls()
+        for c in cells:
+            matrix.add(c["month"], c["category"], c.get("time_slot"), float(c["amount"]), int(c.get("count", 1)))
+        return matrix
+
+    def since(self, start_month: str) -> "SpendMatrix":
+        """Cells from start_month on (copied)"""
+        return SpendMatrix(
+            {key: list(cell) for key, cell in self.cells.items() if key[0] >= start_month}
+        )
+
+    def category_totals(self) -> Dict[str, float]:
+        """Total spend per category (sorted by category)"""
+        totals: Dict[str, float] = {}
+        for (_, category, _), (amount, _) in self.cells.items():
+            totals[category] = totals.get(category, 0) + amount
+        return dict(sorted(totals.items()))
+
+    def month_category_totals(self, month: str) -> Dict[str, float]:
+        """Spend per category in one month (sorted by category)"""
+        totals: Dict[str, float] = {}
+        for (cell_month, category, _), (amount, _) in self.cells.items():
+            if cell_month == month:
+                totals[category] = totals.get(category, 0) + amount
+        return dict(sorted(totals.items()))
+
+    def time_slot_totals(self, month: str, category: str) -> Dict[str, float]:
+        """Spend per known time slot of one category and month (sorted by slot)"""
+        totals: Dict[str, float] = {}
+        for (cell_month, cell_category, time_slot), (amount, _) in self.cells.items():
+            if cell_month == month and cell_category == category and time_slot is not None:
+                totals[time_slot] = totals.get(time_slot, 0) + amount
+        return dict(sorted(totals.items()))
+
+    def month_totals(self) -> Dict[str, float]:
+        """Total spend per month"""
+        totals: Dict[str, float] = {}
+        for (month, _, _), (amount, _) in self.cells.items():
+            totals[month] = totals.get(month, 0) + amount
+        return totals
+
+    def monthly_trend(self, months: int = 3, now: datetime = None) -> List[float]:
+        """Spending of the last N calendar months, oldest first"""
+        return monthly_trend_from_totals(self.month_totals(), months, now)
+
+    @property
+    def transaction_count(self) -> int:
+        return int(sum(count for _, count in self.cells.values()))
+
+
+class UserAggregate:
+    """Cells of one user plus the per-transaction entries needed for updates"""
+
+    __slots__ = ("matrix", "transactions")
+
+    def __init__(self):
+        self.matrix = SpendMatrix()
+        # id -> (month, category, time_slot, amount)
+        self.transactions: Dict[str, Tuple[str, str, Optional[str], float]] = {}
+
+    def upsert(self, tx_id: str, month: str, category: str, time_slot: Optional[str], amount: float):
+        """Insert a transaction or replace its previous version"""
+        self.delete(tx_id)
+        self.transactions[tx_id] = (month, category, time_slot, amount)
+        self.matrix.add(month, category, time_slot, amount)
+
+    def delete(self, tx_id: str) -> bool:
+        """Remove a transaction (soft delete); False if it was unknown"""
+        previous = self.transactions.pop(tx_id, None)
+        if previous is None:
+            return False
+        month, category, time_slot, amount = previous
+        self.matrix.add(month, category, time_slot, -amount, -1)
+        return True
+
+    def prune(self, oldest_month: str) -> int:
+        """Drop transactions older than oldest_month"""
+        expired = [tx_id for tx_id, entry in self.transactions.items() if entry[0] < oldest_month]
+        for tx_id in expired:
+            self.delete(tx_id)
+        return len(expired)
+
+
+class AggregateStore:
+    """In-memory per-user aggregates with delta ingest and checkpointing"""
+
+    CHECKPOINT_VERSION = 1
+
+    def __init__(self, retain_months: int = 13):
+        """
+        Args:
+            retain_months: Months of history kept per user (including the current one)
+        """
+        self.retain_months = retain_months
+        self._users: Dict[str, UserAggregate] = {}
+        self._lock = threading.Lock()
+        self.dirty = False
+
+    def _oldest_month(self) -> str:
+        return shift_month(month_key(datetime.now()), -(self.retain_months - 1))
+
+    def apply(self, user_id: str, upserts: Iterable[Dict], deleted_ids: Iterable[str] = ()) -> Dict:
+        """
+        Apply one delta batch for a user
+
+        Args:
+            user_id: User identifier
+            upserts: Transactions with id, date, amount, category, time_slot and
+                     optional is_deleted (soft-deleted rows are removed)
+            deleted_ids: Ids of transactions to remove
+
+        Returns:
+            Counts of upserted/deleted rows, the user's totals after the batch
+            and new_ids (ids seen for the first time, in batch order)
+        """
+        # Validate the whole batch first so a bad row changes nothing
+        upserts = list(upserts)
+        check_iso_dates(t["date"] for t in upserts)
+        upserts = [(t, month_key(t["date"])) for t in upserts]
+
+        oldest = self._oldest_month()
+        upserted = deleted = 0
+        new_ids = []
+        with self._lock:
+            user = self._users.get(user_id)
+            if user is None:
+                user = self._users[user_id] = UserAggregate()
+
+            for t, month in upserts:
+                if t.get("is_deleted") or month < oldest:
+                    deleted += user.delete(t["id"])
+                    continue
+                if t["id"] not in user.transactions:
+                    new_ids.append(t["id"])
+                user.upsert(t["id"], month, CATEGORIES.canonical(t["category"]), t.get("time_slot"), float(t["amount"]))
+                upserted += 1
+
+            for tx_id in deleted_ids:
+                deleted += user.delete(tx_id)
+
+            user.prune(oldest)
+            self.dirty = True
+            return {
+                "upserted": upserted,
+                "deleted": deleted,
+                "transactions": len(user.transactions),
+                "months": len({key[0] for key in user.matrix.cells}),
+                "new_ids": new_ids,
+            }
+
+    def snapshot(self, user_id: str, start_month: str = None) -> Optional[SpendMatrix]:
+        """Copy of a user's cells (from start_month on), or None if unknown"""
+        with self._lock:
+            user = self._users.get(user_id)
+            if user is None:
+                return None
+            return user.matrix.since(start_month or "")
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def save_checkpoint(self, path: str):
+        """Write all users to a gzip JSON checkpoint (write, then rename)"""
+        with self._lock:
+            users = {
+                user_id: [[tx_id, *entry] for tx_id, entry in user.transactions.items()]
+                for user_id, user in self._users.items()
+            }
+            self.dirty = False
+
+        payload = {
+            "version": self.CHECKPOINT_VERSION,
+            "saved_at": datetime.now().isoformat(),
+            "users": users,
+        }
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def load_checkpoint(self, path: str) -> int:
+        """
+        Replace the in-memory state with a checkpoint
+
+        Returns:
+            Number of users loaded (0 if there is no usable checkpoint)
+        """
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if payload.get("version") != self.CHECKPOINT_VERSION:
+            return 0
+
+        oldest = self._oldest_month()
+        users: Dict[str, UserAggregate] = {}
+        for user_id, entries in payload["users"].items():
+            user = UserAggregate()
+            for tx_id, month, category, time_slot, amount in entries:
+                if month >= oldest:
+                    user.upsert(tx_id, month, category, time_slot, amount)
+            users[user_id] = user
+
+        with self._lock:
+            self._users = users
+            self.dirty = False
+        return len(users)
+
+
+def lock_checkpoint(path: str):
+    """
+    Claim a checkpoint for this process (exclusive flock on '<path>.lock')
+
+    Only one process may own an AggregateStore checkpoint: workers sharing
+    a socket would each hold part of the users and overwrite each other's
+    file. The lock is released when the process exits.
+
+    Args:
+        path: Checkpoint path
+
+    Returns:
+        The open lock file (keep a reference while owning the store), or
+        None when another live process owns the checkpoint
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    lock_file = open(f"{path}.lock", "a")
+    try:
+        import fcntl
+    except ImportError:
+        # No flock (Windows): single-process use is assumed
+        return lock_file
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def month_totals_from_transactions(transactions: List[Dict]) -> Dict[str, float]:
+    """Spend per 'YYYY-MM' of a raw transaction list (ISO date strings, dates or datetimes)"""
+    # One pass into a plain dict, like SpendMatrix.from_transactions: building
+    # a DataFrame and parsing every date costs several times more
+    totals: Dict[str, float] = {}
+    for t in transactions:
+        month = month_key(t["date"])
+        totals[month] = totals.get(month, 0.0) + t.get("amount", 0)
+    return totals
@@ -0,0 +1,240 @@
+"""
+Category Registry
+Stable integer codes, app <-> dataset mappings and Korean labels for
+spending categories
+
+Pipelines aggregate on the integer codes (np.bincount, pandas Categorical)
+and only turn codes back into names for output. Codes are list positions:
+new categories are appended, existing ones are never reordered. The
+registry is fixed at import: category names it does not know (e.g. sent by
+a newer app build) count as 'other', the same as the database CHECK
+constraints, so client input can never grow the shared code space.
+"""
+
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+# App categories (transactions, budgets, UI)
+APP_CATEGORIES = (
+    "food", "delivery", "cafe", "transport", "shopping",
+    "entertainment", "education", "health", "utilities", "other",
+)
+DEFAULT_CATEGORY = "other"
+
+# Below this many rows a dict loop beats factorize + bincount (fixed ~100 µs)
+SMALL_INPUT_ROWS = 500
+
+# Categories of FeatureEngineer.create_user_vector, in vector order
+USER_VECTOR_CATEGORIES = (
+    "food", "transport", "shopping", "entertainment",
+    "education", "health", "utilities", "other",
+)
+
+# Spending columns of the training dataset
+DATASET_SPENDING_COLUMNS = [
+    "food", "transportation", "books_supplies", "entertainment",
+    "personal_care", "technology", "health_wellness", "miscellaneous",
+]
+DEFAULT_DATASET_COLUMN = "miscellaneous"
+
+# App category -> dataset column (anything else counts as miscellaneous)
+APP_TO_DATASET = {
+    "food": "food",
+    "transport": "transportation",
+    "shopping": "miscellaneous",  # Could be books_supplies or misc
+    "entertainment": "entertainment",
+    "education": "books_supplies",
+    "health": "health_wellness",
+    "utilities": "miscellaneous",
+    "other": "miscellaneous",
+}
+
+# Dataset column -> app category (cohort statistics)
+DATASET_TO_APP = {
+    "food": "food",
+    "transportation": "transport",
+    "entertainment": "entertainment",
+    "books_supplies": "education",
+    "health_wellness": "health",
+    "personal_care": "shopping",
+    "technology": "shopping",
+    "miscellaneous": "other",
+    "housing": "utilities",
+}
+
+# Category labels for Korean UI
+CATEGORY_LABELS = {
+    "food": "식비",
+    "delivery": "배달",
+    "cafe": "카페",
+    "transport": "교통비",
+    "shopping": "쇼핑",
+    "entertainment": "문화/여가",
+    "education": "교육",
+    "health": "의료/건강",
+    "utilities": "공과금",
+    "other": "기타",
+}
+
+
+class CategoryRegistry:
+    """Category name <-> integer code mapping shared by every pipeline"""
+
+    def __init__(
+        self,
+        names: Sequence[str] = APP_CATEGORIES,
+        dataset_columns: Sequence[str] = DATASET_SPENDING_COLUMNS,
+        app_to_dataset: Dict[str, str] = APP_TO_DATASET,
+        labels: Dict[str, str] = CATEGORY_LABELS,
+    ):
+        """
+        Args:
+            names: Known app categories in code order
+            dataset_columns: Training dataset spending columns in code order
+            app_to_dataset: App category -> dataset column
+            labels: App category -> display label
+        """
+        self._names: List[str] = list(names)
+        self._codes: Dict[str, int] = {name: code for code, name in enumerate(self._names)}
+        self._default_code = self._codes[DEFAULT_CATEGORY]
+        self.dataset_columns = list(dataset_columns)
+        self._app_to_dataset = dict(app_to_dataset)
+        self._labels = dict(labels)
+        column_index = {column: i for i, column in enumerate(self.dataset_columns)}
+        default = column_index[DEFAULT_DATASET_COLUMN]
+        self._dataset_codes = np.array(
+            [column_index.get(self._app_to_dataset.get(name), default) for name in self._names],
+            dtype=np.intp,
+        )
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    @property
+    def names(self) -> List[str]:
+        """Category names in code order (a copy)"""
+        return list(self._names)
+
+    def code(self, name: str) -> int:
+        """Code of a category ('other' for unknown names)"""
+        return self._codes.get(name, self._default_code)
+
+    def canonical(self, name: str) -> str:
+        """The category itself if the registry knows it, else 'other'"""
+        return name if name in self._codes else DEFAULT_CATEGORY
+
+    def fold_unknown(self, category_totals: Dict[str, float]) -> Dict[str, float]:
+        """
+        Merge totals of unknown category names into 'other'
+
+        Args:
+            category_totals: Category name -> amount
+
+        Returns:
+            Dict over known categories (sorted by name)
+        """
+        folded = {}
+        for name, amount in category_totals.items():
+            name = self.canonical(name)
+            folded[name] = folded.get(name, 0) + amount
+        return dict(sorted(folded.items()))
+
+    def name(self, code: int) -> str:
+        return self._names[code]
+
+    def label(self, name: str) -> str:
+        """Korean display label (the name itself if there is none)"""
+        return self._labels.get(name, name)
+
+    def encode(self, values: Iterable) -> np.ndarray:
+        """
+        Codes of a sequence of category names
+
+        Each distinct name is looked up once; missing values and unknown
+        names become 'other'.
+
+        Args:
+            values: List, array, Series or Categorical of names
+
+        Returns:
+            intp array of codes
+        """
+        if not isinstance(values, (pd.Series, np.ndarray, pd.api.extensions.ExtensionArray)):
+            values = np.asarray(list(values), dtype=object)
+        row_codes, uniques = pd.factorize(values)
+        lookup = np.array([self.code(name) for name in uniques] + [self._default_code], dtype=np.intp)
+        # factorize marks missing values with -1, which picks the last lookup entry
+        return lookup[row_codes]
+
+    def categorical(self, values: Iterable) -> pd.Categorical:
+        """Category names as a pandas Categorical over the registry's codes"""
+        codes = self.encode(values)
+        return pd.Categorical.from_codes(codes, categories=self.names)
+
+    def totals(self, codes: np.ndarray, amounts: np.ndarray) -> Dict[str, float]:
+        """
+        Sum amounts per category code
+
+        Args:
+            codes: Category code per row
+            amounts: Amount per row
+
+        Returns:
+            Dict mapping each category that occurs to its total (sorted by name)
+        """
+        size = len(self._names)
+        sums = np.bincount(codes, weights=amounts, minlength=size)
+        counts = np.bincount(codes, minlength=size)
+        present = np.flatnonzero(counts)
+        return dict(sorted((self._names[code], float(sums[code])) for code in present))
+
+    def column_totals(self, categories: Iterable, amounts: Iterable) -> Dict[str, float]:
+        """
+        Sum amounts per category of a names column and an amounts column
+
+        Args:
+            categories: Category name per row (Series, array or list)
+            amounts: Amount per row
+
+        Returns:
+            Same as totals(): each category that occurs to its total (sorted by name)
+        """
+        amounts = np.asarray(amounts, dtype=np.float64)
+        if len(amounts) >= SMALL_INPUT_ROWS:
+            return self.totals(self.encode(categories), amounts)
+        totals: Dict[str, float] = {}
+        for name, amount in zip(list(categories), amounts.tolist()):
+            totals[name] = totals.get(name, 0.0) + amount
+        return self.fold_unknown(totals)
+
+    def dataset_codes(self) -> np.ndarray:
+        """Dataset column index per app category code"""
+        return self._dataset_codes
+
+    def dataset_totals(self, category_totals: Dict[str, float]) -> np.ndarray:
+        """
+        Fold spending by app category into the dataset spending columns
+
+        Args:
+            category_totals: App category -> amount
+
+        Returns:
+            float64 array aligned with dataset_columns
+        """
+        codes = np.fromiter((self.code(c) for c in category_totals), dtype=np.intp, count=len(category_totals))
+        amounts = np.fromiter(category_totals.values(), dtype=np.float64, count=len(category_totals))
+        return np.bincount(
+            self.dataset_codes()[codes], weights=amounts, minlength=len(self.dataset_columns)
+        )
+
+    def dataset_codes_of(self, values: Iterable) -> np.ndarray:
+        """Dataset column index of each app category name"""
+        codes = self.encode(values)
+        return self.dataset_codes()[codes]
+
+
+# Process-wide registry
+CATEGORIES = CategoryRegistry()
@@ -6,21 +6,25 @@ Handles loading and initial processing of spending data
 import pandas as pd
 import os
 from typing import Dict, List
-from datetime import datetime, timedelta
-import random
+
+from pipeline.categories import CATEGORIES, DATASET_SPENDING_COLUMNS
+from pipeline.aggregates import month_totals_from_transactions, monthly_trend_from_totals
+from pipeline.dataset_cache import load_dataset_cached
 
 
 class DataLoader:
     """Load and prepare spending data for ML models"""
     
-    def __init__(self, data_path: str = "data/student_spending.csv"):
+    def __init__(self, data_path: str = "data/student_spending.csv", use_cache: bool = True):
         """
         Initialize DataLoader
         
         Args:
             data_path: Path to the CSV data file
+            use_cache: Load through the memory-mapped columnar cache
         """
         self.data_path = data_path
+        self.use_cache = use_cache
         self.df = None
         
     def load_dataset(self) -> pd.DataFrame:
@@ -33,12 +37,16 @@ class DataLoader:
         if not os.path.exists(self.data_path):
             raise FileNotFoundError(f"Dataset not found at {self.data_path}")
         
-        # Load CSV
-        self.df = pd.read_csv(self.data_path)
-        
-        # Drop unnamed index column if exists
-        if 'Unnamed: 0' in self.df.columns:
-            self.df = self.df.drop('Unnamed: 0', axis=1)
+        if self.use_cache:
+            # Columnar cache: float32/categorical columns, memory-mapped
+            self.df = load_dataset_cached(self.data_path)
+        else:
+            # Load CSV
+            self.df = pd.read_csv(self.data_path)
+            
+            # Drop unnamed index column if exists
+            if 'Unnamed: 0' in self.df.columns:
+                self.df = self.df.drop('Unnamed: 0', axis=1)
         
         print(f"✅ Loaded {len(self.df)} student spending records")
         print(f"📊 Columns: {list(self.df.columns)}")
@@ -64,47 +72,30 @@ class DataLoader:
             # Return default/empty features
             return self._get_default_features()
         
-        # Convert to DataFrame
-        trans_df = pd.DataFrame(transactions)
-        
-        # Map our categories to dataset categories
-        category_mapping = {
-            'food': 'food',
-            'transport': 'transportation',
-            'shopping': 'miscellaneous',  # Could be books_supplies or misc
-            'entertainment': 'entertainment',
-            'education': 'books_supplies',
-            'health': 'health_wellness',
-            'utilities': 'miscellaneous',
-            'other': 'miscellaneous'
-        }
-        
-        # Calculate total spending by category
-        features = {}
+        return self.features_from_category_totals(self.get_category_totals(transactions))
+    
+    def features_from_category_totals(self, category_totals: Dict[str, float]) -> pd.DataFrame:
+        """
+        Build the feature row from spending totals by (our) category
         
-        # Initialize all categories with 0
-        for col in ['food', 'transportation', 'books_supplies', 'entertainment',
-                    'personal_care', 'technology', 'health_wellness', 'miscellaneous']:
-            features[col] = 0
+        Args:
+            category_totals: Dict mapping category to total amount
         
-        # Aggregate spending by category
-        for _, trans in trans_df.iterrows():
-            category = trans.get('category', 'other')
-            mapped_category = category_mapping.get(category, 'miscellaneous')
-            features[mapped_category] = features.get(mapped_category, 0) + trans['amount']
+        Returns:
+            DataFrame with one row of features similar to training data
+        """
+        # Aggregate spending by dataset category (unmapped ones count as miscellaneous)
+        features = dict(zip(DATASET_SPENDING_COLUMNS, CATEGORIES.dataset_totals(category_totals).tolist()))
         
         # Add synthetic/estimated fields
         # These would ideally come from user profile
         features['age'] = 22  # Default student age
-        features['monthly_income'] = trans_df['amount'].sum()  # Total as proxy income
+        features['monthly_income'] = sum(category_totals.values())  # Total as proxy income
         features['financial_aid'] = 0  # Not available
         features['tuition'] = 0  # Not available
         features['housing'] = 0  # Not available
         
-        # Create DataFrame
-        feature_df = pd.DataFrame([features])
-        
-        return feature_df
+        return pd.DataFrame([features])
     
     def _get_default_features(self) -> pd.DataFrame:
         """
@@ -119,14 +110,7 @@ class DataLoader:
             'financial_aid': 0,
             'tuition': 0,
             'housing': 0,
-            'food': 0,
-            'transportation': 0,
-            'books_supplies': 0,
-            'entertainment': 0,
-            'personal_care': 0,
-            'technology': 0,
-            'health_wellness': 0,
-            'miscellaneous': 0
+            **{col: 0 for col in DATASET_SPENDING_COLUMNS},
         }
         
         return pd.DataFrame([default])
@@ -141,6 +125,9 @@ class DataLoader:
         Returns:
             Dict mapping category to total amount
         """
+        # One pass over the row dicts: per-row dict access dominates here, so
+        # encoding to category codes first would only add a second pass
+        # (str hashes are cached). Frame inputs aggregate on codes instead.
         category_totals = {}
         
         for trans in transactions:
@@ -148,7 +135,9 @@ class DataLoader:
             amount = trans.get('amount', 0)
             category_totals[category] = category_totals.get(category, 0) + amount
         
-        return category_totals
+        # Unknown names count as 'other' (like the code paths); sorted so
+        # insights come out in the same order as from SpendMatrix
+        return CATEGORIES.fold_unknown(category_totals)
     
     def get_monthly_trend(self, transactions: List[Dict], months: int = 3) -> List[float]:
         """
@@ -161,37 +150,8 @@ class DataLoader:
         Returns:
             List of monthly total amounts
         """
-        trans_df = pd.DataFrame(transactions)
-        
-        if trans_df.empty or 'date' not in trans_df.columns:
-            return [0] * months
-        
-        # Convert date to datetime
-        trans_df['date'] = pd.to_datetime(trans_df['date'])
-        
-        # Get current date and calculate month boundaries
-        now = datetime.now()
-        monthly_totals = []
-        
-        for i in range(months - 1, -1, -1):  # Go backwards from current month
-            # Calculate start and end of month
-            month_start = (now - timedelta(days=30 * i)).replace(day=1)
-            if i == 0:
-                month_end = now
-            else:
-                month_end = (now - timedelta(days=30 * (i - 1))).replace(day=1)
-            
-            # Filter transactions for this month
-            month_trans = trans_df[
-                (trans_df['date'] >= month_start) & 
-                (trans_df['date'] < month_end)
-            ]
-            
-            # Sum amounts
-            total = month_trans['amount'].sum() if not month_trans.empty else 0
-            monthly_totals.append(float(total))
-        
-        return monthly_totals
+        # Calendar months (the current month is the last entry)
+        return monthly_trend_from_totals(month_totals_from_transactions(transactions), months)
 
 
 # Singleton instance
@@ -0,0 +1,175 @@
+"""
+Dataset Cache
+Compiled columnar copy of the training CSV (one .npy file per column)
+
+Numeric columns are stored as float32 and text columns as categorical
+codes. Arrays are memory-mapped on load, so startup skips CSV parsing and
+every worker process shares the same read-only page cache. The cache is
+rebuilt whenever the SHA-256 of the source CSV changes.
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+# Defaults to a .cache directory next to the CSV
+CACHE_DIR = os.getenv("ML_DATASET_CACHE_DIR")
+MANIFEST_FILE = "manifest.json"
+CACHE_VERSION = 1
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 hex digest of a file"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_path(csv_path: str, cache_dir: str = None) -> str:
+    root = cache_dir or CACHE_DIR or os.path.join(os.path.dirname(csv_path), ".cache")
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(root, name)
+
+
+def _read_csv(csv_path: str) -> pd.DataFrame:
+    df = pd.read_csv(csv_path)
+
+    # Drop unnamed index column if exists
+    if "Unnamed: 0" in df.columns:
+        df = df.drop("Unnamed: 0", axis=1)
+    return df
+
+
+def _codes_dtype(n_categories: int):
+    return np.int8 if n_categories < 127 else np.int16 if n_categories < 32767 else np.int32
+
+
+def build_cache(csv_path: str, cache_dir: str = None, source_hash: str = None) -> Dict:
+    """
+    Parse the CSV once and write the columnar cache
+
+    Args:
+        csv_path: Source CSV file
+        cache_dir: Cache root directory (defaults to CACHE_DIR or a .cache dir next to the CSV)
+        source_hash: Precomputed SHA-256 of the CSV
+
+    Returns:
+        The written manifest
+    """
+    target = _cache_path(csv_path, cache_dir)
+    os.makedirs(target, exist_ok=True)
+
+    df = _read_csv(csv_path)
+    columns = []
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        filename = f"{i:03d}.npy"
+        if pd.api.types.is_numeric_dtype(series):
+            values = series.to_numpy(dtype=np.float32)
+            entry = {"name": col, "file": filename, "kind": "numeric"}
+        else:
+            categorical = pd.Categorical(series)
+            categories = [str(c) for c in categorical.categories]
+            values = categorical.codes.astype(_codes_dtype(len(categories)))
+            entry = {"name": col, "file": filename, "kind": "categorical", "categories": categories}
+
+        tmp_path = os.path.join(target, f"{filename}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, values)
+        os.replace(tmp_path, os.path.join(target, filename))
+        columns.append(entry)
+
+    manifest = {
+        "version": CACHE_VERSION,
+        "source_sha256": source_hash or file_sha256(csv_path),
+        "rows": len(df),
+        "columns": columns,
+    }
+
+    # Manifest is written last: a cache without a matching manifest is never read
+    tmp_path = os.path.join(target, f"{MANIFEST_FILE}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, os.path.join(target, MANIFEST_FILE))
+
+    return manifest
+
+
+def load_cache(
+    csv_path: str, cache_dir: str = None, source_hash: str = None, mmap: bool = True
+) -> Optional[pd.DataFrame]:
+    """
+    Load the columnar cache if it matches the current CSV
+
+    Args:
+        csv_path: Source CSV file
+        cache_dir: Cache root directory (defaults to CACHE_DIR or a .cache dir next to the CSV)
+        source_hash: Precomputed SHA-256 of the CSV
+        mmap: Memory-map column files read-only instead of reading them
+
+    Returns:
+        DataFrame, or None if the cache is missing or stale
+    """
+    target = _cache_path(csv_path, cache_dir)
+    try:
+        with open(os.path.join(target, MANIFEST_FILE), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if manifest.get("version") != CACHE_VERSION:
+        return None
+    if manifest.get("source_sha256") != (source_hash or file_sha256(csv_path)):
+        return None
+
+    data = {}
+    try:
+        for entry in manifest["columns"]:
+            values = np.load(
+                os.path.join(target, entry["file"]), mmap_mode="r" if mmap else None
+            )
+            if entry["kind"] == "categorical":
+                data[entry["name"]] = pd.Categorical.from_codes(values, entry["categories"])
+            else:
+                data[entry["name"]] = values
+    except (OSError, ValueError, KeyError):
+        return None
+
+    # copy=False keeps numeric columns backed by the mapped files
+    return pd.DataFrame(data, copy=False)
+
+
+def load_dataset_cached(csv_path: str, cache_dir: str = None) -> pd.DataFrame:
+    """
+    Load the dataset from the columnar cache, rebuilding it when stale
+
+    Falls back to parsing the CSV directly if the cache cannot be written
+    (e.g. read-only filesystem).
+
+    Args:
+        csv_path: Source CSV file
+        cache_dir: Cache root directory (defaults to CACHE_DIR or a .cache dir next to the CSV)
+
+    Returns:
+        DataFrame with float32 numeric and categorical text columns
+    """
+    source_hash = file_sha256(csv_path)
+    df = load_cache(csv_path, cache_dir, source_hash)
+    if df is not None:
+        return df
+
+    try:
+        build_cache(csv_path, cache_dir, source_hash)
+    except OSError as e:
+        print(f"⚠️ Could not write dataset cache: {e}")
+        return _read_csv(csv_path)
+
+    print(f"💾 Built columnar dataset cache for {csv_path}")
+    return load_cache(csv_path, cache_dir, source_hash)
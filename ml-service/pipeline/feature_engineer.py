@@ -7,6 +7,16 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List
 
+from pipeline.categories import CATEGORIES, USER_VECTOR_CATEGORIES
+
+
+def _category_sums(df: pd.DataFrame):
+    """(sum, count) per category code of a transactions DataFrame"""
+    codes = CATEGORIES.encode(df["category"])
+    amounts = df["amount"].to_numpy(dtype=np.float64)
+    size = len(CATEGORIES)
+    return np.bincount(codes, weights=amounts, minlength=size), np.bincount(codes, minlength=size)
+
 
 class FeatureEngineer:
     """Create features from transaction data"""
@@ -23,6 +33,7 @@ class FeatureEngineer:
         # Ensure temporal features exist
         if "year_month" not in df.columns:
             df["year_month"] = pd.to_datetime(df["date"]).dt.to_period("M").astype(str)
+        df["category"] = CATEGORIES.encode(df["category"])
 
         # Group by month
         monthly_stats = (
@@ -63,24 +74,19 @@ class FeatureEngineer:
         Returns:
             DataFrame with spending totals per category
         """
-        category_stats = (
-            df.groupby("category")
-            .agg(
-                {
-                    "amount": ["sum", "mean", "count"],
-                }
-            )
-            .reset_index()
-        )
+        sums, counts = _category_sums(df)
+        present = np.flatnonzero(counts)
 
-        category_stats.columns = [
-            "category",
-            "total_amount",
-            "avg_amount",
-            "transaction_count",
-        ]
+        category_stats = pd.DataFrame(
+            {
+                "category": [CATEGORIES.name(code) for code in present],
+                "total_amount": sums[present],
+                "avg_amount": sums[present] / counts[present],
+                "transaction_count": counts[present],
+            }
+        )
 
-        return category_stats
+        return category_stats.sort_values("category", ignore_index=True)
 
     def create_trend_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -98,20 +104,19 @@ class FeatureEngineer:
         current_data = df[df["date"].dt.to_period("M") == current_month]
         previous_data = df[df["date"].dt.to_period("M") == previous_month]
 
-        # Aggregate by category
-        current_by_cat = current_data.groupby("category")["amount"].sum()
-        previous_by_cat = previous_data.groupby("category")["amount"].sum()
+        # Aggregate by category code
+        current_sums, current_counts = _category_sums(current_data)
+        previous_sums, _ = _category_sums(previous_data)
+        present = np.flatnonzero(current_counts)
 
         # Calculate changes
         trends = pd.DataFrame(
             {
-                "category": current_by_cat.index,
-                "current_amount": current_by_cat.values,
-                "previous_amount": previous_by_cat.reindex(
-                    current_by_cat.index, fill_value=0
-                ).values,
+                "category": [CATEGORIES.name(code) for code in present],
+                "current_amount": current_sums[present],
+                "previous_amount": previous_sums[present],
             }
-        )
+        ).sort_values("category", ignore_index=True)
 
         trends["change_amount"] = (
             trends["current_amount"] - trends["previous_amount"]
@@ -145,11 +150,11 @@ class FeatureEngineer:
         )
 
         # Most active spending category
-        category_totals = df.groupby("category")["amount"].sum()
+        category_totals = CATEGORIES.column_totals(df["category"], df["amount"])
         if len(category_totals) > 0:
-            patterns["top_category"] = category_totals.idxmax()
+            patterns["top_category"] = max(category_totals, key=category_totals.get)
             patterns["top_category_percentage"] = (
-                category_totals.max() / df["amount"].sum()
+                category_totals[patterns["top_category"]] / df["amount"].sum()
             ) * 100
 
         # Spending frequency
@@ -174,23 +179,13 @@ class FeatureEngineer:
             return np.zeros(10)
 
         # Category spending distribution (8 categories)
-        categories = [
-            "food",
-            "transport",
-            "shopping",
-            "entertainment",
-            "education",
-            "health",
-            "utilities",
-            "other",
-        ]
+        sums, _ = _category_sums(df)
         total_spending = df["amount"].sum()
-
-        category_ratios = []
-        for cat in categories:
-            cat_spending = df[df["category"] == cat]["amount"].sum()
-            ratio = cat_spending / total_spending if total_spending > 0 else 0
-            category_ratios.append(ratio)
+        vector_sums = sums[[CATEGORIES.code(cat) for cat in USER_VECTOR_CATEGORIES]]
+        if total_spending > 0:
+            category_ratios = (vector_sums / total_spending).tolist()
+        else:
+            category_ratios = [0] * len(USER_VECTOR_CATEGORIES)
 
         # Additional features
         avg_transaction = df["amount"].mean()
@@ -0,0 +1,107 @@
+"""
+Feature Kernel
+Engineered spending features computed on (N x 8) spend arrays
+
+Every feature of a row depends only on that row and on reference
+statistics recorded when the persona model was trained, so a user scored
+alone gets exactly the row they would get inside a batch. The `*_high`
+flags compare spend against the training-time mean + std instead of the
+statistics of whatever frame is being transformed (a single-user request
+is a 1-row frame whose std is NaN).
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from pipeline.categories import DATASET_SPENDING_COLUMNS
+
+
+# Dataset spending columns counted as discretionary / necessary spending
+# ('shopping' has no column of its own in the dataset)
+DISCRETIONARY_COLUMNS = ("entertainment", "miscellaneous")
+NECESSARY_COLUMNS = ("food", "transportation", "books_supplies", "health_wellness")
+
+_DISCRETIONARY_MASK = np.isin(DATASET_SPENDING_COLUMNS, DISCRETIONARY_COLUMNS).astype(np.float64)
+_NECESSARY_MASK = np.isin(DATASET_SPENDING_COLUMNS, NECESSARY_COLUMNS).astype(np.float64)
+
+RATIO_COLUMNS = [f"{col}_ratio" for col in DATASET_SPENDING_COLUMNS]
+HIGH_COLUMNS = [f"{col}_high" for col in DATASET_SPENDING_COLUMNS]
+
+
+@dataclass(frozen=True)
+class ReferenceStats:
+    """Per-column spend mean and std of the training data"""
+
+    mean: Tuple[float, ...]
+    std: Tuple[float, ...]
+
+    @classmethod
+    def from_spend(cls, spend: np.ndarray) -> "ReferenceStats":
+        """Statistics of an (N x 8) spend array (sample std, like pandas)"""
+        if len(spend) < 2:
+            nan = (float("nan"),) * spend.shape[1]
+            return cls(tuple(spend.mean(axis=0).tolist()) if len(spend) else nan, nan)
+        return cls(tuple(spend.mean(axis=0).tolist()), tuple(spend.std(axis=0, ddof=1).tolist()))
+
+    @property
+    def thresholds(self) -> np.ndarray:
+        """Spend above which a column is flagged as high"""
+        return np.asarray(self.mean) + np.asarray(self.std)
+
+    def to_dict(self) -> Dict:
+        return {"columns": list(DATASET_SPENDING_COLUMNS), "mean": list(self.mean), "std": list(self.std)}
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> Optional["ReferenceStats"]:
+        """Inverse of to_dict (None for missing or mismatching data)"""
+        if not data or data.get("columns") != list(DATASET_SPENDING_COLUMNS):
+            return None
+        return cls(tuple(data["mean"]), tuple(data["std"]))
+
+
+def spend_matrix(df: pd.DataFrame) -> np.ndarray:
+    """(N x 8) float64 spend array of a feature frame (missing columns are 0)"""
+    spend = np.zeros((len(df), len(DATASET_SPENDING_COLUMNS)), dtype=np.float64)
+    for i, col in enumerate(DATASET_SPENDING_COLUMNS):
+        if col in df.columns:
+            spend[:, i] = df[col].to_numpy(dtype=np.float64)
+    return spend
+
+
+def compute_features(
+    spend: np.ndarray,
+    monthly_income: Optional[np.ndarray] = None,
+    reference: Optional[ReferenceStats] = None,
+) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+    """
+    Engineered features of each row
+
+    Args:
+        spend: (N x 8) spend per dataset spending column
+        monthly_income: (N,) income, or None to skip the savings features
+        reference: Training-time statistics for the high-spend flags
+                   (None: statistics of `spend` itself)
+
+    Returns:
+        Tuple of (float features, int high flags), each an ordered
+        column name -> (N,) array mapping
+    """
+    total = spend.sum(axis=1)
+    ratios = spend / (total + 1)[:, None] * 100  # +1 to avoid division by zero
+
+    features = {"total_spending": total}
+    features.update(zip(RATIO_COLUMNS, ratios.T))
+    features["discretionary_spending"] = spend @ _DISCRETIONARY_MASK
+    features["necessary_spending"] = spend @ _NECESSARY_MASK
+    if monthly_income is not None:
+        features["savings_potential"] = monthly_income - total
+        features["spending_ratio"] = total / (monthly_income + 1) * 100
+
+    if reference is None:
+        reference = ReferenceStats.from_spend(spend)
+    with np.errstate(invalid="ignore"):
+        high = (spend > reference.thresholds).astype(np.int64)
+    return features, dict(zip(HIGH_COLUMNS, high.T))
@@ -0,0 +1,286 @@
+"""
+Insight Builder
+Runs the persona, trend, forecast, overspending, category warning, savings
+and anomaly stages that make up a /predict/insights response
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from monitoring.metrics import stage_timer
+from models.anomaly import ANOMALY_INSIGHT_LIMIT, anomaly_insight, flag_transactions
+from models.forecast import next_month_forecast, project_month_end
+from pipeline.categories import CATEGORIES
+
+
+INSIGHTS_ENDPOINT = "/predict/insights"
+
+SEVERITY_ORDER = {"critical": 0, "warning": 1, "info": 2}
+
+
+def build_insights(
+    transactions: List[Dict],
+    current_month_budget: Dict[str, float],
+    data_loader,
+    preprocessor,
+    cluster_model,
+    trend_analyzer,
+    overspending_predictor,
+) -> Dict:
+    """
+    Generate the insight list and model outputs for one user
+
+    Args:
+        transactions: List of transaction dicts
+        current_month_budget: Budget by category
+        data_loader: DataLoader used for feature conversion
+        preprocessor: SpendingPreprocessor
+        cluster_model: Fitted SpendingClusterModel (persona skipped if None/unfitted)
+        trend_analyzer: TrendAnalyzer
+        overspending_predictor: OverspendingPredictor
+
+    Returns:
+        Dict with insights, persona, similar_peers, trends and
+        overspending_risks
+    """
+    with stage_timer(INSIGHTS_ENDPOINT, "aggregate"):
+        # Get category totals
+        category_totals = data_loader.get_category_totals(transactions)
+
+        # Get monthly trend
+        monthly_trend = data_loader.get_monthly_trend(transactions, months=3)
+
+    with stage_timer(INSIGHTS_ENDPOINT, "anomalies"):
+        anomalies = flag_transactions(transactions)
+
+    with stage_timer(INSIGHTS_ENDPOINT, "forecast"):
+        month_end = project_month_end(
+            [t["date"] for t in transactions],
+            [t.get("category", "other") for t in transactions],
+            [t.get("amount", 0) for t in transactions],
+        )
+
+    return build_insights_from_totals(
+        category_totals,
+        monthly_trend,
+        current_month_budget,
+        data_loader,
+        preprocessor,
+        cluster_model,
+        trend_analyzer,
+        overspending_predictor,
+        anomalies=anomalies,
+        month_end=month_end,
+    )
+
+
+def build_insights_from_totals(
+    category_totals: Dict[str, float],
+    monthly_trend: List[float],
+    current_month_budget: Dict[str, float],
+    data_loader,
+    preprocessor,
+    cluster_model,
+    trend_analyzer,
+    overspending_predictor,
+    anomalies: Optional[List[Dict]] = None,
+    month_end: Optional[Dict] = None,
+) -> Dict:
+    """
+    Generate insights from pre-aggregated spending (e.g. a SpendMatrix)
+
+    Args:
+        category_totals: Spending by category over the analysed window
+        monthly_trend: Monthly totals of the last 3 months, oldest first
+        current_month_budget: Budget by category
+        data_loader, preprocessor, cluster_model, trend_analyzer,
+        overspending_predictor: As in build_insights
+        anomalies: Flagged transactions (models.anomaly), strongest first
+        month_end: Month-end projections from daily spend
+                   (models.forecast.project_month_end), which also supply
+                   the current month's spend per category for overspending;
+                   without them category_totals is projected from its
+                   average daily rate
+
+    Returns:
+        Dict with insights, persona, similar_peers, trends and
+        overspending_risks
+    """
+    with stage_timer(INSIGHTS_ENDPOINT, "features"):
+        user_features_df = data_loader.features_from_category_totals(category_totals)
+        user_features_eng = preprocessor.engineer_features(user_features_df)
+
+    # Generate insights list
+    insights = []
+
+    # 1. Spending Persona Analysis
+    persona_result = None
+    similar_peers = None
+    with stage_timer(INSIGHTS_ENDPOINT, "persona"):
+        if cluster_model and cluster_model.is_fitted:
+            X_user = preprocessor.prepare_for_clustering(user_features_eng)
+            persona_result = cluster_model.analyze_user_persona(X_user[0])
+
+            # Aggregate profile of the most similar students in the reference data
+            peers = cluster_model.similar_peers(X_user[0])
+            similar_peers = peers[0] if peers else None
+
+            insights.append(
+                {
+                    "type": "spending_persona",
+                    "severity": "info",
+                    "title": f"당신의 소비 패턴: {persona_result['persona_name']}",
+                    "description": persona_result["description"],
+                    "suggested_action": f"강점: {', '.join(persona_result['strengths'])}",
+                    "potential_savings": 0,
+                    "category": None,
+                }
+            )
+
+    # 2. Trend Analysis
+    trend_results = {}
+    with stage_timer(INSIGHTS_ENDPOINT, "trend"):
+        if monthly_trend:
+            overall_trend = trend_analyzer.analyze_trend(monthly_trend)
+            trend_results["overall"] = overall_trend
+
+            next_month = next_month_forecast(monthly_trend, month_end)
+            if next_month is not None:
+                trend_results["next_month"] = next_month
+
+            if overall_trend["trend_type"] == "increasing":
+                description = f"최근 3개월간 지출이 {abs(overall_trend['percent_change']):.1f}% 증가했습니다."
+                if next_month is not None:
+                    description += (
+                        f" 이대로라면 다음 달 지출은 약 {next_month['prediction']:,.0f}원"
+                        f"({next_month['lower']:,.0f}~{next_month['upper']:,.0f}원)으로 예상돼요."
+                    )
+                insights.append(
+                    {
+                        "type": "trend_increase",
+                        "severity": "warning",
+                        "title": f"지출이 {overall_trend['emoji']} 증가하고 있어요",
+                        "description": description,
+                        "suggested_action": "지출 패턴을 점검하고 불필요한 소비를 줄여보세요",
+                        "potential_savings": None,
+                        "category": None,
+                    }
+                )
+            elif overall_trend["trend_type"] == "decreasing":
+                insights.append(
+                    {
+                        "type": "trend_decrease",
+                        "severity": "info",
+                        "title": f"지출이 {overall_trend['emoji']} 감소했어요! 👏",
+                        "description": f"최근 3개월간 지출이 {abs(overall_trend['percent_change']):.1f}% 감소했습니다. 잘하고 계세요!",
+                        "suggested_action": "현재의 좋은 습관을 유지하세요",
+                        "potential_savings": None,
+                        "category": None,
+                    }
+                )
+
+    # 3. Overspending Risk Analysis
+    overspending_result = None
+    with stage_timer(INSIGHTS_ENDPOINT, "overspending"):
+        if current_month_budget:
+            days_in_month = 30
+            today = datetime.now().day
+            days_remaining = days_in_month - today
+
+            if month_end:
+                # Projections cover the current month only; spent and the
+                # budget percentage must describe the same month (categories
+                # without a projection had no spending in it)
+                projections = month_end["categories"]
+                current_spending = {c: p["spent"] for c, p in projections.items()}
+            else:
+                projections = None
+                current_spending = category_totals
+
+            overspending_result = overspending_predictor.predict_overspending_risk(
+                current_spending=current_spending,
+                budget=current_month_budget,
+                days_remaining=days_remaining,
+                projections=projections,
+            )
+
+            # Add high-risk categories as insights
+            for category in overspending_result.get("high_risk_categories", []):
+                risk_detail = overspending_result["category_risks"][category]
+                category_kr = CATEGORIES.label(category)
+
+                insights.append(
+                    {
+                        "type": "overspending",
+                        "severity": (
+                            "warning"
+                            if risk_detail["risk_level"] == "high"
+                            else "critical"
+                        ),
+                        "title": f"{category_kr} 예산 초과 위험",
+                        "description": f"현재 {risk_detail['spent_percentage']:.0f}% 사용 중입니다. {', '.join(risk_detail['risk_factors'])}",
+                        "suggested_action": f"남은 기간 동안 {category_kr} 지출을 {risk_detail['remaining']:.0f}원 이하로 유지하세요",
+                        "potential_savings": risk_detail.get("projected_over", 0),
+                        "category": category,
+                    }
+                )
+
+    # 4. Category-specific insights
+    with stage_timer(INSIGHTS_ENDPOINT, "category_warnings"):
+        for category, amount in category_totals.items():
+            if category in current_month_budget:
+                budget_amount = current_month_budget[category]
+                pct_used = (amount / budget_amount * 100) if budget_amount > 0 else 0
+                category_kr = CATEGORIES.label(category)
+
+                if pct_used >= 90:
+                    insights.append(
+                        {
+                            "type": "category_warning",
+                            "severity": "warning",
+                            "title": f"{category_kr} 예산이 곧 소진됩니다",
+                            "description": f"이번 달 {category_kr} 예산의 {pct_used:.0f}%를 사용했습니다.",
+                            "suggested_action": f"남은 기간 동안 {category_kr} 지출을 최소화하세요",
+                            "potential_savings": None,
+                            "category": category,
+                        }
+                    )
+
+    # 5. Savings opportunities
+    with stage_timer(INSIGHTS_ENDPOINT, "savings"):
+        if overspending_result:
+            recommendations = overspending_predictor.generate_savings_recommendations(
+                current_spending=category_totals, budget=current_month_budget
+            )
+
+            for rec in recommendations[:2]:  # Top 2 opportunities
+                category_kr = CATEGORIES.label(rec["category"])
+
+                insights.append(
+                    {
+                        "type": "savings_opportunity",
+                        "severity": "info",
+                        "title": f"{category_kr} 절약 기회",
+                        "description": f"{category_kr}에서 예산을 {rec['overspend_amount']:.0f}원 초과했습니다.",
+                        "suggested_action": (
+                            rec["tips"][0] if rec["tips"] else "지출을 줄여보세요"
+                        ),
+                        "potential_savings": rec["savings_potential"],
+                        "category": rec["category"],
+                    }
+                )
+
+    # 6. Unusual single purchases
+    for anomaly in (anomalies or [])[:ANOMALY_INSIGHT_LIMIT]:
+        insights.append(anomaly_insight(anomaly))
+
+    # Sort insights by severity
+    insights.sort(key=lambda x: SEVERITY_ORDER.get(x["severity"], 3))
+
+    return {
+        "insights": insights,
+        "persona": persona_result,
+        "similar_peers": similar_peers,
+        "trends": trend_results,
+        "overspending_risks": overspending_result,
+    }
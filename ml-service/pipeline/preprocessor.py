@@ -5,20 +5,24 @@ Handles data cleaning, feature engineering, and transformation
 
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Tuple
-from sklearn.preprocessing import StandardScaler
-import joblib
+from typing import List, Dict, Optional, Tuple
+import copy
 import os
 
+from pipeline.categories import DATASET_SPENDING_COLUMNS
+from pipeline.feature_kernel import ReferenceStats, compute_features, spend_matrix
+
 
 class SpendingPreprocessor:
     """Preprocess and engineer features from spending data"""
     
     def __init__(self):
         """Initialize preprocessor"""
-        self.scaler = StandardScaler()
+        self.scaler = None  # StandardScaler is created on first fit (sklearn is imported lazily)
         self.feature_columns = None
         self.is_fitted = False
+        # Training-time spend statistics for the *_high flags (see fit_reference)
+        self.reference: Optional[ReferenceStats] = None
         
     def fit(self, df: pd.DataFrame) -> 'SpendingPreprocessor':
         """
@@ -41,6 +45,9 @@ class SpendingPreprocessor:
         
         # Fit scaler on numeric features
         if numeric_cols:
+            from sklearn.preprocessing import StandardScaler
+
+            self.scaler = StandardScaler()
             self.scaler.fit(df[numeric_cols])
             self.is_fitted = True
         
@@ -81,69 +88,65 @@ class SpendingPreprocessor:
         """
         return self.fit(df).transform(df)
     
-    def engineer_features(self, df: pd.DataFrame) -> pd.DataFrame:
+    def fit_reference(self, df: pd.DataFrame) -> 'SpendingPreprocessor':
         """
-        Create additional engineered features
+        Copy of this preprocessor using df's spending statistics as the
+        reference for the high-spend flags (call on the training data)
         
         Args:
-            df: Input DataFrame
+            df: Training DataFrame with the dataset spending columns
         
         Returns:
-            DataFrame with additional features
+            New SpendingPreprocessor (published instances are never mutated)
         """
-        df_eng = df.copy()
-        
-        # Spending categories
-        spending_cols = ['food', 'transportation', 'books_supplies', 
-                        'entertainment', 'personal_care', 'technology',
-                        'health_wellness', 'miscellaneous']
-        
-        # Ensure all columns exist
-        for col in spending_cols:
-            if col not in df_eng.columns:
-                df_eng[col] = 0
-        
-        # Total spending
-        df_eng['total_spending'] = df_eng[spending_cols].sum(axis=1)
+        return self.with_reference(ReferenceStats.from_spend(spend_matrix(df)))
+    
+    def with_reference(self, reference: Optional[ReferenceStats]) -> 'SpendingPreprocessor':
+        """
+        Copy of this preprocessor with the given reference statistics
         
-        # Spending ratios (as percentage of total)
-        for col in spending_cols:
-            ratio_col = f'{col}_ratio'
-            df_eng[ratio_col] = (
-                df_eng[col] / (df_eng['total_spending'] + 1)  # +1 to avoid division by zero
-            ) * 100
+        Args:
+            reference: Training-time statistics (None: per-frame statistics)
         
-        # Discretionary vs necessary spending
-        discretionary = ['entertainment', 'shopping', 'miscellaneous']
-        necessary = ['food', 'transportation', 'books_supplies', 'health_wellness']
+        Returns:
+            New SpendingPreprocessor
+        """
+        preprocessor = copy.copy(self)
+        preprocessor.reference = reference
+        return preprocessor
+    
+    def engineer_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Create additional engineered features
         
-        df_eng['discretionary_spending'] = df_eng[
-            [col for col in discretionary if col in df_eng.columns]
-        ].sum(axis=1)
+        Rows are computed independently (see pipeline.feature_kernel), so a
+        single-user frame gets the same features as inside a batch.
         
-        df_eng['necessary_spending'] = df_eng[
-            [col for col in necessary if col in df_eng.columns]
-        ].sum(axis=1)
+        Args:
+            df: Input DataFrame
         
-        # Financial health indicators
-        if 'monthly_income' in df_eng.columns and 'total_spending' in df_eng.columns:
-            df_eng['savings_potential'] = (
-                df_eng['monthly_income'] - df_eng['total_spending']
-            )
-            df_eng['spending_ratio'] = (
-                df_eng['total_spending'] / (df_eng['monthly_income'] + 1)
-            ) * 100
-        
-        # High spending flags
-        for col in spending_cols:
-            if col in df_eng.columns:
-                mean_val = df_eng[col].mean()
-                std_val = df_eng[col].std()
-                df_eng[f'{col}_high'] = (
-                    df_eng[col] > mean_val + std_val
-                ).astype(int)
-        
-        return df_eng
+        Returns:
+            DataFrame with additional features
+        """
+        spend = spend_matrix(df)
+        income = (
+            df['monthly_income'].to_numpy(dtype=np.float64) if 'monthly_income' in df.columns else None
+        )
+        features, high_flags = compute_features(spend, income, self.reference)
+        
+        # Spending columns the input lacks are added as 0
+        missing = {
+            col: spend[:, i] for i, col in enumerate(DATASET_SPENDING_COLUMNS) if col not in df.columns
+        }
+        features = {**missing, **features}
+        
+        blocks = [
+            pd.DataFrame(np.column_stack(list(features.values())), columns=list(features), index=df.index),
+            pd.DataFrame(np.column_stack(list(high_flags.values())), columns=list(high_flags), index=df.index),
+        ]
+        existing = [col for col in (*features, *high_flags) if col in df.columns]
+        base = df.drop(columns=existing) if existing else df
+        return pd.concat([base, *blocks], axis=1)
     
     def prepare_for_clustering(self, df: pd.DataFrame) -> np.ndarray:
         """
@@ -158,15 +161,14 @@ class SpendingPreprocessor:
         # Use spending ratios for clustering (more meaningful than absolute values)
         ratio_cols = [col for col in df.columns if col.endswith('_ratio')]
         
+        # Always float64: the training dataset is stored as float32, but the
+        # fitted model must accept request features built in float64
         if ratio_cols:
-            return df[ratio_cols].values
+            return df[ratio_cols].to_numpy(dtype=np.float64)
         else:
             # Fallback to spending columns
-            spending_cols = ['food', 'transportation', 'books_supplies', 
-                           'entertainment', 'personal_care', 'technology',
-                           'health_wellness', 'miscellaneous']
-            available_cols = [col for col in spending_cols if col in df.columns]
-            return df[available_cols].values
+            available_cols = [col for col in DATASET_SPENDING_COLUMNS if col in df.columns]
+            return df[available_cols].to_numpy(dtype=np.float64)
     
     def prepare_for_prediction(
         self, 
@@ -208,11 +210,14 @@ class SpendingPreprocessor:
         Args:
             path: Path to save file
         """
+        import joblib
+
         os.makedirs(os.path.dirname(path), exist_ok=True)
         joblib.dump({
             'scaler': self.scaler,
             'feature_columns': self.feature_columns,
-            'is_fitted': self.is_fitted
+            'is_fitted': self.is_fitted,
+            'reference': self.reference.to_dict() if self.reference else None,
         }, path)
         print(f"✅ Preprocessor saved to {path}")
     
@@ -230,11 +235,14 @@ class SpendingPreprocessor:
         if not os.path.exists(path):
             raise FileNotFoundError(f"Preprocessor not found at {path}")
         
+        import joblib
+
         data = joblib.load(path)
         preprocessor = cls()
         preprocessor.scaler = data['scaler']
         preprocessor.feature_columns = data['feature_columns']
         preprocessor.is_fitted = data['is_fitted']
+        preprocessor.reference = ReferenceStats.from_dict(data.get('reference'))
         
         print(f"✅ Preprocessor loaded from {path}")
         return preprocessor
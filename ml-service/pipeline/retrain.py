@@ -0,0 +1,288 @@
+"""
+Persona Retraining
+Refits the persona clustering model on user-month spending exported from
+the transactions store and validates it against the currently served model
+
+Runs as its own process (see serving/retrain_scheduler.py) so fitting never
+competes with request handling in the service process.
+
+Usage:
+    python -m pipeline.retrain --database-url sqlite:///data/transactions.db \\
+        --reference saved_models/clustering_model.joblib \\
+        --output saved_models/candidate_clustering_model.joblib --report-out report.json
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from datetime import date, datetime
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from pipeline.categories import CATEGORIES, DATASET_SPENDING_COLUMNS
+from pipeline.preprocessor import SpendingPreprocessor
+from models.clustering import SpendingClusterModel
+from models.neighbors import PeerIndex
+
+
+# Monthly spend per user and category, excluding soft-deleted rows
+EXPORT_QUERIES = {
+    "sqlite": """
+        SELECT user_id, substr(date, 1, 7) AS month, category,
+               SUM(amount) AS amount, COUNT(*) AS n
+        FROM transactions
+        WHERE COALESCE(is_deleted, 0) = 0 AND date >= ? AND date < ?
+        GROUP BY user_id, month, category
+    """,
+    "postgres": """
+        SELECT user_id::text, to_char(date, 'YYYY-MM') AS month, category,
+               SUM(amount) AS amount, COUNT(*) AS n
+        FROM transactions
+        WHERE COALESCE(is_deleted, false) = false AND date >= %s AND date < %s
+        GROUP BY 1, 2, 3
+    """,
+}
+
+MIN_ROWS = 50
+MIN_LABEL_AGREEMENT = float(os.getenv("ML_RETRAIN_MIN_AGREEMENT", "0.6"))
+MAX_INERTIA_RATIO = float(os.getenv("ML_RETRAIN_MAX_INERTIA_RATIO", "1.1"))
+
+
+def open_connection(database_url: str) -> Tuple[object, str]:
+    """
+    Open a DB-API connection to the transactions store
+
+    Args:
+        database_url: 'sqlite:///path/to.db' or 'postgresql://...'
+
+    Returns:
+        Tuple of (connection, dialect)
+    """
+    if database_url.startswith("sqlite:///"):
+        return sqlite3.connect(database_url[len("sqlite:///"):]), "sqlite"
+
+    if database_url.startswith(("postgres://", "postgresql://")):
+        try:
+            import psycopg
+        except ImportError:
+            raise RuntimeError("psycopg is required to export from Postgres (pip install psycopg)")
+        return psycopg.connect(database_url), "postgres"
+
+    raise ValueError(f"Unsupported database URL: {database_url}")
+
+
+def _month_start(day: date, months_back: int = 0) -> date:
+    month_index = day.year * 12 + day.month - 1 - months_back
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def export_user_month_features(
+    conn,
+    dialect: str = "sqlite",
+    months: int = 6,
+    min_transactions: int = 5,
+    today: date = None,
+) -> pd.DataFrame:
+    """
+    Export one feature row per (user, completed month)
+
+    Rows have the same columns as DataLoader.convert_user_transactions_to_features,
+    so the usual engineer_features / prepare_for_clustering path applies.
+
+    Args:
+        conn: DB-API connection
+        dialect: 'sqlite' or 'postgres'
+        months: Number of completed months to export
+        min_transactions: Skip user-months with fewer transactions
+        today: Reference date (defaults to today; the current month is excluded)
+
+    Returns:
+        DataFrame indexed by (user_id, month)
+    """
+    today = today or date.today()
+    start, end = _month_start(today, months), _month_start(today)
+
+    cursor = conn.cursor()
+    cursor.execute(EXPORT_QUERIES[dialect], (start.isoformat(), end.isoformat()))
+    rows = cursor.fetchall()
+    cursor.close()
+
+    if not rows:
+        return pd.DataFrame(columns=DATASET_SPENDING_COLUMNS)
+
+    spend = pd.DataFrame(rows, columns=["user_id", "month", "category", "amount", "n"])
+    spend["column"] = CATEGORIES.dataset_codes_of(spend["category"])
+
+    counts = spend.groupby(["user_id", "month"])["n"].sum()
+    features = (
+        spend.groupby(["user_id", "month", "column"])["amount"].sum()
+        .unstack(fill_value=0)
+        .reindex(columns=range(len(DATASET_SPENDING_COLUMNS)), fill_value=0)
+        .astype(float)
+    )
+    features.columns = DATASET_SPENDING_COLUMNS
+    features = features[counts.reindex(features.index) >= min_transactions]
+
+    # Same proxies as convert_user_transactions_to_features
+    features["age"] = 22
+    features["monthly_income"] = features[DATASET_SPENDING_COLUMNS].sum(axis=1)
+    features["financial_aid"] = 0
+    features["tuition"] = 0
+    features["housing"] = 0
+    return features
+
+
+def align_clusters(candidate: SpendingClusterModel, reference: SpendingClusterModel):
+    """
+    Renumber candidate clusters to match the closest reference clusters
+
+    Persona names are looked up by cluster id, so without this a refit
+    could silently swap personas between users.
+    """
+    from scipy.optimize import linear_sum_assignment
+
+    ref_centers = np.asarray(reference.cluster_centers)
+    cand_centers = np.asarray(candidate.cluster_centers)
+    cost = ((ref_centers[:, None, :] - cand_centers[None, :, :]) ** 2).sum(axis=2)
+    _, order = linear_sum_assignment(cost)
+
+    candidate.model.cluster_centers_ = candidate.model.cluster_centers_[order]
+    inverse = np.argsort(order)
+    candidate.model.labels_ = inverse[candidate.model.labels_]
+    candidate.cluster_centers = candidate.model.cluster_centers_
+
+
+def validate_candidate(
+    candidate: SpendingClusterModel,
+    reference: Optional[SpendingClusterModel],
+    X: np.ndarray,
+    min_agreement: float = MIN_LABEL_AGREEMENT,
+    max_inertia_ratio: float = MAX_INERTIA_RATIO,
+) -> Dict:
+    """
+    Compare a candidate with the current model on the exported rows
+
+    Args:
+        candidate: Newly fitted (and aligned) model
+        reference: Currently served model, or None
+        X: Clustering features of the exported rows
+        min_agreement: Minimum share of rows keeping their persona
+        max_inertia_ratio: Maximum candidate / reference inertia
+
+    Returns:
+        Report with label agreement, ARI, inertia and the decision
+    """
+    from sklearn.metrics import adjusted_rand_score
+
+    report = {
+        "rows": int(len(X)),
+        "candidate_inertia": float(-candidate.model.score(X)),
+        "reasons": [],
+    }
+
+    if len(X) < MIN_ROWS:
+        report["reasons"].append(f"only {len(X)} rows (< {MIN_ROWS})")
+
+    if reference is not None and reference.is_fitted:
+        ref_labels = reference.predict(X)
+        cand_labels = candidate.predict(X)
+        report["label_agreement"] = float(np.mean(ref_labels == cand_labels))
+        report["adjusted_rand_index"] = float(adjusted_rand_score(ref_labels, cand_labels))
+        report["reference_inertia"] = float(-reference.model.score(X))
+        report["inertia_ratio"] = report["candidate_inertia"] / max(report["reference_inertia"], 1e-9)
+
+        if report["label_agreement"] < min_agreement:
+            report["reasons"].append(
+                f"label agreement {report['label_agreement']:.2f} < {min_agreement:.2f}"
+            )
+        if report["inertia_ratio"] > max_inertia_ratio:
+            report["reasons"].append(
+                f"inertia ratio {report['inertia_ratio']:.2f} > {max_inertia_ratio:.2f}"
+            )
+
+    report["accepted"] = not report["reasons"]
+    return report
+
+
+def retrain(
+    database_url: str,
+    reference_path: str,
+    output_path: str,
+    months: int = 6,
+    min_transactions: int = 5,
+) -> Dict:
+    """
+    Export, refit, align and validate; save the candidate if accepted
+
+    Args:
+        database_url: Transactions store URL
+        reference_path: Currently served model file (may not exist)
+        output_path: Where to write an accepted candidate
+        months: Completed months to export
+        min_transactions: Minimum transactions per user-month
+
+    Returns:
+        Validation report (with 'output' set when the candidate was saved)
+    """
+    conn, dialect = open_connection(database_url)
+    try:
+        features = export_user_month_features(conn, dialect, months, min_transactions)
+    finally:
+        conn.close()
+
+    report = {"generated_at": datetime.now().isoformat(), "rows": int(len(features))}
+    reference = (
+        SpendingClusterModel.load(reference_path) if os.path.exists(reference_path) else None
+    )
+    n_clusters = reference.n_clusters if reference is not None else SpendingClusterModel().n_clusters
+    if len(features) < max(MIN_ROWS, n_clusters):
+        report.update({"accepted": False, "reasons": [f"only {len(features)} rows (< {MIN_ROWS})"]})
+        return report
+
+    preprocessor = SpendingPreprocessor().fit_reference(features)
+    X = preprocessor.prepare_for_clustering(preprocessor.engineer_features(features))
+
+    candidate = SpendingClusterModel(n_clusters=n_clusters).fit(X)
+    candidate.feature_reference = preprocessor.reference
+    if reference is not None and reference.is_fitted:
+        align_clusters(candidate, reference)
+    # Peers stay the reference population; only their personas are relabelled
+    if reference is not None and reference.peer_index is not None:
+        points = reference.peer_index.points
+        candidate.peer_index = PeerIndex(points, candidate.predict(points))
+
+    report.update(validate_candidate(candidate, reference, X))
+    if report["accepted"]:
+        candidate.save(output_path)
+        report["output"] = output_path
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refit personas from the transactions store")
+    parser.add_argument("--database-url", default=os.getenv("ML_TRANSACTIONS_DB_URL", os.getenv("DATABASE_URL")))
+    parser.add_argument("--reference", default="saved_models/clustering_model.joblib")
+    parser.add_argument("--output", default="saved_models/candidate_clustering_model.joblib")
+    parser.add_argument("--months", type=int, default=6)
+    parser.add_argument("--min-transactions", type=int, default=5)
+    parser.add_argument("--report-out", default=None)
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("--database-url (or ML_TRANSACTIONS_DB_URL) is required")
+
+    report = retrain(args.database_url, args.reference, args.output, args.months, args.min_transactions)
+
+    if args.report_out:
+        with open(args.report_out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    print(json.dumps(report, ensure_ascii=False))
+    sys.exit(0 if report["accepted"] else 2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Transaction Store
+Async, pooled read access to the `transactions` and `budgets` tables so a
+request can carry only a user id and a date window
+
+Postgres is accessed through an asyncpg connection pool; asyncpg prepares
+each query once per connection and reuses the statement. A SQLite file
+(see scripts/create_local_store.py) is supported for local runs and tests,
+with a small pool of connections used from worker threads.
+
+Only the columns the pipelines need are fetched, using the
+idx_transactions_user_date and idx_budgets_user_month indexes.
+"""
+
+import asyncio
+import os
+import queue
+import sqlite3
+from datetime import date
+from typing import Dict, List, Optional
+
+
+TRANSACTION_COLUMNS = ["date", "amount", "category", "description", "merchant", "time_slot"]
+
+POSTGRES_QUERIES = {
+    "transactions": """
+        SELECT date, amount, category, description, merchant, time_slot
+        FROM transactions
+        WHERE user_id = $1::uuid AND date >= $2 AND date <= $3
+          AND COALESCE(is_deleted, false) = false
+        ORDER BY date
+    """,
+    "budgets": """
+        SELECT category, amount
+        FROM budgets
+        WHERE user_id = $1::uuid AND month = $2
+    """,
+}
+
+SQLITE_QUERIES = {
+    "transactions": """
+        SELECT date, amount, category, description, merchant, time_slot
+        FROM transactions
+        WHERE user_id = ? AND date >= ? AND date <= ?
+          AND COALESCE(is_deleted, 0) = 0
+        ORDER BY date
+    """,
+    "budgets": """
+        SELECT category, amount
+        FROM budgets
+        WHERE user_id = ? AND month = ?
+    """,
+}
+
+
+def _transaction_dict(row) -> Dict:
+    tx_date, amount, category, description, merchant, time_slot = row
+    return {
+        "date": tx_date.isoformat() if isinstance(tx_date, date) else str(tx_date),
+        "amount": float(amount),
+        "category": category,
+        "description": description or "",
+        "merchant": merchant,
+        "time_slot": time_slot,
+    }
+
+
+class PostgresTransactionStore:
+    """Transaction store backed by an asyncpg connection pool"""
+
+    def __init__(self, dsn: str, min_size: int = 1, max_size: int = 10):
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self._pool = None
+
+    async def connect(self):
+        """Create the connection pool"""
+        try:
+            import asyncpg
+        except ImportError:
+            raise RuntimeError("asyncpg is required for Postgres transaction fetch (pip install asyncpg)")
+
+        self._pool = await asyncpg.create_pool(
+            self.dsn, min_size=self.min_size, max_size=self.max_size
+        )
+
+    async def close(self):
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    async def fetch_transactions(self, user_id: str, start: date, end: date) -> List[Dict]:
+        """Non-deleted transactions of a user between start and end (inclusive)"""
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(POSTGRES_QUERIES["transactions"], user_id, start, end)
+        return [_transaction_dict(tuple(row)) for row in rows]
+
+    async def fetch_budget(self, user_id: str, month: str) -> Dict[str, float]:
+        """Budget by category for a YYYY-MM month"""
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(POSTGRES_QUERIES["budgets"], user_id, month)
+        return {row["category"]: float(row["amount"]) for row in rows}
+
+
+class SQLiteTransactionStore:
+    """Transaction store backed by a SQLite file and a pool of connections"""
+
+    def __init__(self, path: str, pool_size: int = 4):
+        self.path = path
+        self.pool_size = pool_size
+        self._pool: Optional[queue.Queue] = None
+
+    async def connect(self):
+        """Open the connections (queries run in worker threads)"""
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"Transactions database not found at {self.path}")
+
+        self._pool = queue.Queue()
+        for _ in range(self.pool_size):
+            # sqlite3 keeps compiled statements in a per-connection cache
+            conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=32)
+            self._pool.put(conn)
+
+    async def close(self):
+        if self._pool is not None:
+            while not self._pool.empty():
+                self._pool.get_nowait().close()
+            self._pool = None
+
+    def _query(self, sql: str, params: tuple) -> List[tuple]:
+        conn = self._pool.get()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            self._pool.put(conn)
+
+    async def fetch_transactions(self, user_id: str, start: date, end: date) -> List[Dict]:
+        """Non-deleted transactions of a user between start and end (inclusive)"""
+        rows = await asyncio.to_thread(
+            self._query, SQLITE_QUERIES["transactions"], (user_id, start.isoformat(), end.isoformat())
+        )
+        return [_transaction_dict(row) for row in rows]
+
+    async def fetch_budget(self, user_id: str, month: str) -> Dict[str, float]:
+        """Budget by category for a YYYY-MM month"""
+        rows = await asyncio.to_thread(self._query, SQLITE_QUERIES["budgets"], (user_id, month))
+        return {category: float(amount) for category, amount in rows}
+
+
+def create_transaction_store(database_url: str, pool_size: int = 10):
+    """
+    Create a store for a database URL
+
+    Args:
+        database_url: 'postgresql://...' or 'sqlite:///path/to.db'
+        pool_size: Maximum pooled connections
+
+    Returns:
+        PostgresTransactionStore or SQLiteTransactionStore (not yet connected)
+    """
+    if database_url.startswith(("postgres://", "postgresql://")):
+        return PostgresTransactionStore(database_url, max_size=pool_size)
+    if database_url.startswith("sqlite:///"):
+        return SQLiteTransactionStore(database_url[len("sqlite:///"):], pool_size=min(pool_size, 4))
+    raise ValueError(f"Unsupported database URL: {database_url}")
@@ -0,0 +1,487 @@
+"""
+Offline Batch Scoring
+
+Scores every user of a transactions export without going through HTTP:
+insights (persona, trends, overspending, anomalies), the coaching message
+and the peer comparison, written as CSV files ready for bulk loading into
+ai_insights and coaching_logs.
+
+The export is partitioned by user into tasks of --users-per-task users,
+scored across a process pool (each worker loads the persona model once).
+Every finished task is written to output-dir/parts/ before it is marked
+done, so an interrupted run picks up where it stopped when started again
+with the same arguments.
+
+Usage:
+    python scripts/batch_score.py transactions.csv --output-dir batch_out
+    python scripts/batch_score.py export.parquet --budgets budgets.csv --workers 8
+    python scripts/batch_score.py export.ndjson --output-dir batch_out --restart
+
+Loading the results (psql):
+    \\copy ai_insights (user_id, type, severity, title, description, suggested_action,
+        potential_savings, category, metadata, expires_at) FROM 'ai_insights.csv' CSV HEADER
+    \\copy coaching_logs (user_id, message_type, message_data) FROM 'coaching_logs.csv' CSV HEADER
+"""
+
+import argparse
+import csv
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVICE_DIR = os.path.join(SCRIPTS_DIR, "..")
+sys.path.append(SERVICE_DIR)
+
+from models.anomaly import flag_frame  # noqa: E402
+from models.clustering import SpendingClusterModel  # noqa: E402
+from models.coaching import analyze_spending_matrix, coaching_message_from_patterns  # noqa: E402
+from models.forecast import project_month_end  # noqa: E402
+from models.overspending import OverspendingPredictor  # noqa: E402
+from models.peer_comparison import peer_comparison_from_totals  # noqa: E402
+from models.trend import TrendAnalyzer  # noqa: E402
+from pipeline.aggregates import SpendMatrix, month_key, shift_month  # noqa: E402
+from pipeline.data_loader import DataLoader  # noqa: E402
+from pipeline.insights import build_insights_from_totals  # noqa: E402
+from pipeline.preprocessor import SpendingPreprocessor  # noqa: E402
+from serving.responses import dumps  # noqa: E402
+
+MODEL_PATH = os.path.join(SERVICE_DIR, "saved_models", "clustering_model.joblib")
+
+REQUIRED_COLUMNS = ["user_id", "date", "amount", "category"]
+OPTIONAL_COLUMNS = ["merchant", "time_slot", "is_deleted", "birth_year"]
+BUDGET_COLUMNS = ["user_id", "category", "amount"]
+
+USERS_PER_TASK = 200
+PROGRESS_INTERVAL = 5.0  # Seconds between progress lines
+INSIGHT_TTL_DAYS = 7  # ai_insights.expires_at, as set by /api/insights/generate
+
+# ai_insights CHECK constraints (supabase/migrations/001, 007)
+AI_INSIGHT_CATEGORIES = {
+    "food", "transport", "shopping", "entertainment", "education", "health", "utilities", "other",
+}
+AI_INSIGHTS_COLUMNS = [
+    "user_id", "type", "severity", "title", "description", "suggested_action",
+    "potential_savings", "category", "metadata", "expires_at",
+]
+COACHING_LOGS_COLUMNS = ["user_id", "message_type", "message_data"]
+OUTPUT_TABLES = {"ai_insights": AI_INSIGHTS_COLUMNS, "coaching_logs": COACHING_LOGS_COLUMNS}
+
+
+def read_table(path: str, columns: List[str]) -> pd.DataFrame:
+    """
+    Read a CSV, Parquet or NDJSON file (optionally gzipped), keeping `columns`
+
+    Args:
+        path: File path; the format follows the extension
+        columns: Columns to keep (missing ones are simply absent)
+
+    Returns:
+        DataFrame with the available columns
+    """
+    name = path[:-3] if path.endswith(".gz") else path
+    wanted = set(columns)
+
+    if name.endswith(".csv"):
+        return pd.read_csv(path, usecols=lambda c: c in wanted, dtype={"user_id": str, "category": str})
+
+    if name.endswith((".parquet", ".pq")):
+        try:
+            return pd.read_parquet(path, columns=None).filter(columns)
+        except ImportError:
+            raise RuntimeError("pyarrow is required to read Parquet (pip install pyarrow)")
+
+    if name.endswith((".ndjson", ".jsonl")):
+        chunks = pd.read_json(path, lines=True, dtype=False, chunksize=100000)
+        return pd.concat([chunk.filter(columns) for chunk in chunks], ignore_index=True)
+
+    raise ValueError(f"Unsupported file type: {path} (expected .csv, .parquet or .ndjson)")
+
+
+def load_transactions(path: str) -> pd.DataFrame:
+    """
+    Read and normalise a transactions export
+
+    Soft-deleted rows are dropped; dates become 'YYYY-MM-DD' strings.
+    """
+    df = read_table(path, REQUIRED_COLUMNS + OPTIONAL_COLUMNS)
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"{path} is missing columns: {', '.join(missing)}")
+
+    if "is_deleted" in df.columns:
+        deleted = df["is_deleted"].astype(str).str.lower().isin(["true", "1", "t"])
+        df = df[~deleted].drop(columns="is_deleted")
+
+    df = df.dropna(subset=["user_id", "date", "amount"]).reset_index(drop=True)
+    df["user_id"] = df["user_id"].astype(str)
+    df["amount"] = df["amount"].astype(float)
+    df["category"] = df["category"].fillna("other").astype(str)
+    if pd.api.types.is_datetime64_any_dtype(df["date"]):
+        df["date"] = df["date"].dt.strftime("%Y-%m-%d")
+    else:
+        df["date"] = df["date"].astype(str).str[:10]
+    return df
+
+
+def load_budgets(path: Optional[str], month: str) -> Dict[str, Dict[str, float]]:
+    """
+    Budgets by user and category from a budgets export
+
+    Rows with a 'month' column only count for `month` ('YYYY-MM').
+    """
+    if not path:
+        return {}
+    df = read_table(path, BUDGET_COLUMNS + ["month"])
+    if "month" in df.columns:
+        df = df[df["month"].astype(str).str[:7] == month]
+    budgets: Dict[str, Dict[str, float]] = {}
+    for user_id, category, amount in df[BUDGET_COLUMNS].itertuples(index=False):
+        budgets.setdefault(str(user_id), {})[category] = float(amount)
+    return budgets
+
+
+def plan_tasks(user_ids: List[str], users_per_task: int) -> List[List[str]]:
+    """Split the sorted user ids into tasks (deterministic for resuming)"""
+    users = sorted(user_ids)
+    return [users[i:i + users_per_task] for i in range(0, len(users), users_per_task)]
+
+
+# Per-process models, loaded once by _init_worker
+_MODELS: Dict = {}
+
+
+def _init_worker(model_path: str):
+    cluster_model = SpendingClusterModel.load(model_path)
+    _MODELS.update({
+        "data_loader": DataLoader(),
+        "preprocessor": SpendingPreprocessor().with_reference(cluster_model.feature_reference),
+        "cluster_model": cluster_model,
+        "trend_analyzer": TrendAnalyzer(),
+        "overspending_predictor": OverspendingPredictor(),
+    })
+
+
+def insight_rows(user_id: str, result: Dict, expires_at: str) -> List[List]:
+    """ai_insights rows of one user's insight result"""
+    metadata = dumps({
+        "spending_persona": result["persona"],
+        "trend_analysis": result["trends"],
+        "similar_peers": result.get("similar_peers"),
+    }).decode()
+    rows = []
+    for insight in result["insights"]:
+        savings = insight.get("potential_savings")
+        category = insight.get("category")
+        rows.append([
+            user_id,
+            insight["type"],
+            insight["severity"],
+            insight["title"],
+            insight["description"],
+            insight.get("suggested_action"),
+            None if savings is None else max(0, round(float(savings))),
+            category if category in AI_INSIGHT_CATEGORIES else None,
+            metadata,
+            expires_at,
+        ])
+    return rows
+
+
+def score_user(
+    user_id: str,
+    user_df: pd.DataFrame,
+    budget: Dict[str, float],
+    birth_year: Optional[int],
+    months: int = 3,
+    now: datetime = None,
+) -> Tuple[List[List], List[List]]:
+    """
+    Insights, coaching message and peer comparison of one user
+
+    Mirrors the web app's calls: insights and coaching on the last `months`
+    calendar months, peer comparison on the current month.
+
+    Returns:
+        Tuple of (ai_insights rows, coaching_logs rows)
+    """
+    now = now or datetime.now()
+    current = month_key(now)
+    window = user_df[user_df["date"] >= f"{shift_month(current, -(months - 1))}-01"]
+    if window.empty:
+        return [], []
+
+    matrix = SpendMatrix.from_frame(window)
+    result = build_insights_from_totals(
+        matrix.category_totals(),
+        matrix.monthly_trend(3, now),
+        budget,
+        anomalies=flag_frame(window),
+        month_end=project_month_end(
+            window["date"].to_numpy(), window["category"].to_numpy(), window["amount"].to_numpy(), now.date()
+        ),
+        **_MODELS,
+    )
+    expires_at = (now + timedelta(days=INSIGHT_TTL_DAYS)).isoformat()
+    insights = insight_rows(user_id, result, expires_at)
+
+    coaching = coaching_message_from_patterns(analyze_spending_matrix(matrix, now))
+    logs = [[user_id, "coaching", dumps(coaching.to_dict()).decode()]]
+    if birth_year:
+        comparison = peer_comparison_from_totals(
+            user_id, int(birth_year), matrix.month_category_totals(current), period=current
+        )
+        logs.append([user_id, "peer_comparison", dumps(comparison.to_dict()).decode()])
+    return insights, logs
+
+
+def score_task(task_id: int, df: pd.DataFrame, budgets: Dict[str, Dict[str, float]], part_dir: str) -> Dict:
+    """
+    Score one task's users and write its part files
+
+    Args:
+        task_id: Task number (part file prefix)
+        df: Transactions of the task's users
+        budgets: Budgets of the task's users
+        part_dir: Directory for part files
+
+    Returns:
+        Task summary: users, scored, failed (list of [user_id, error]) and seconds
+    """
+    start = time.perf_counter()
+    rows = {"ai_insights": [], "coaching_logs": []}
+    summary = {"task_id": task_id, "users": 0, "scored": 0, "failed": []}
+
+    for user_id, user_df in df.groupby("user_id", sort=True):
+        summary["users"] += 1
+        birth_year = user_df["birth_year"].iloc[0] if "birth_year" in user_df.columns else None
+        try:
+            insights, logs = score_user(
+                user_id, user_df, budgets.get(user_id, {}), None if pd.isna(birth_year) else birth_year
+            )
+        except Exception as e:
+            summary["failed"].append([user_id, str(e)])
+            continue
+        rows["ai_insights"].extend(insights)
+        rows["coaching_logs"].extend(logs)
+        summary["scored"] += 1
+
+    for table, table_rows in rows.items():
+        with open(os.path.join(part_dir, f"{task_id:06d}.{table}.csv"), "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerows(table_rows)
+
+    summary["seconds"] = time.perf_counter() - start
+    # The marker is written last: a task counts as done only once its parts are complete
+    marker = os.path.join(part_dir, f"{task_id:06d}.done")
+    with open(f"{marker}.tmp", "w") as f:
+        json.dump(summary, f, ensure_ascii=False)
+    os.replace(f"{marker}.tmp", marker)
+    return summary
+
+
+def _score_task_in_worker(args) -> Dict:
+    return score_task(*args)
+
+
+def prepare_output(output_dir: str, manifest: Dict, restart: bool) -> str:
+    """
+    Create the output directory, or check that it belongs to the same run
+
+    Returns:
+        Path of the parts directory
+    """
+    part_dir = os.path.join(output_dir, "parts")
+    manifest_path = os.path.join(output_dir, "manifest.json")
+    if restart and os.path.isdir(output_dir):
+        shutil.rmtree(output_dir)
+
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r") as f:
+            previous = json.load(f)
+        if previous != manifest:
+            raise RuntimeError(
+                f"{output_dir} holds a run with different inputs or settings; use --restart to discard it"
+            )
+    else:
+        os.makedirs(part_dir, exist_ok=True)
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+    return part_dir
+
+
+def merge_parts(output_dir: str, part_dir: str, n_tasks: int):
+    """Concatenate the part files into one CSV per table (header first)"""
+    for table, columns in OUTPUT_TABLES.items():
+        tmp_path = os.path.join(output_dir, f"{table}.csv.tmp")
+        with open(tmp_path, "w", newline="", encoding="utf-8") as out:
+            csv.writer(out).writerow(columns)
+            for task_id in range(n_tasks):
+                with open(os.path.join(part_dir, f"{task_id:06d}.{table}.csv"), "r", encoding="utf-8") as part:
+                    shutil.copyfileobj(part, out)
+        os.replace(tmp_path, os.path.join(output_dir, f"{table}.csv"))
+
+
+def _task_inputs(
+    tasks: List[List[str]], pending: List[int], df: pd.DataFrame, budgets: Dict, part_dir: str
+) -> Iterator[Tuple]:
+    """(task_id, rows, budgets, part_dir) of each pending task, built lazily"""
+    rows_by_user = df.groupby("user_id", sort=False).indices
+    for task_id in pending:
+        users = tasks[task_id]
+        index = [i for user_id in users for i in rows_by_user[user_id]]
+        yield task_id, df.iloc[index], {u: budgets[u] for u in users if u in budgets}, part_dir
+
+
+def run_batch(
+    input_path: str,
+    output_dir: str,
+    budgets_path: Optional[str] = None,
+    model_path: str = MODEL_PATH,
+    workers: int = 1,
+    users_per_task: int = USERS_PER_TASK,
+    restart: bool = False,
+) -> Dict:
+    """
+    Score every user of an export
+
+    Args:
+        input_path: Transactions export (CSV, Parquet or NDJSON)
+        output_dir: Directory for ai_insights.csv, coaching_logs.csv and state
+        budgets_path: Optional budgets export (user_id, category, amount[, month])
+        model_path: Saved persona model
+        workers: Worker processes (1 scores in this process)
+        users_per_task: Users per task / part file
+        restart: Discard a previous (partial) run in output_dir
+
+    Returns:
+        Run summary
+    """
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model not found at {model_path} (start the service once to train it)")
+
+    started = time.perf_counter()
+    print(f"📊 Reading {input_path}...")
+    df = load_transactions(input_path)
+    budgets = load_budgets(budgets_path, month_key(datetime.now()))
+    tasks = plan_tasks(df["user_id"].unique().tolist(), users_per_task)
+    n_users = sum(len(users) for users in tasks)
+    print(f"✅ {len(df):,} transactions of {n_users:,} users in {len(tasks)} tasks")
+
+    stat = os.stat(input_path)
+    manifest = {
+        "input": os.path.abspath(input_path),
+        "input_size": stat.st_size,
+        "input_mtime": stat.st_mtime,
+        "budgets": os.path.abspath(budgets_path) if budgets_path else None,
+        "users_per_task": users_per_task,
+        "tasks": len(tasks),
+    }
+    part_dir = prepare_output(output_dir, manifest, restart)
+
+    done = {
+        int(name.split(".")[0]) for name in os.listdir(part_dir) if name.endswith(".done")
+    }
+    pending = [task_id for task_id in range(len(tasks)) if task_id not in done]
+    if done:
+        print(f"⏩ Resuming: {len(done)} of {len(tasks)} tasks already done")
+
+    users_done = sum(len(tasks[task_id]) for task_id in done)
+    users_skipped = users_done
+    failed: List = []
+    scoring_started = time.perf_counter()
+    last_report = 0.0
+
+    def report(summary: Dict):
+        nonlocal users_done, last_report
+        users_done += summary["users"]
+        failed.extend(summary["failed"])
+        now = time.perf_counter()
+        if now - last_report >= PROGRESS_INTERVAL or users_done == n_users:
+            last_report = now
+            scored_here = users_done - users_skipped
+            rate = scored_here / max(now - scoring_started, 1e-9)
+            eta = (n_users - users_done) / rate if rate > 0 else 0
+            print(
+                f"   {users_done:,}/{n_users:,} users ({users_done / max(n_users, 1) * 100:.1f}%)"
+                f" · {rate:,.1f} users/s · ETA {eta:,.0f}s"
+            )
+
+    inputs = _task_inputs(tasks, pending, df, budgets, part_dir)
+    if workers <= 1:
+        _init_worker(model_path)
+        for args in inputs:
+            report(score_task(*args))
+    else:
+        # Keep a bounded number of tasks in flight so task frames are not all pickled up front
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(model_path,)) as pool:
+            in_flight = set()
+            for args in inputs:
+                in_flight.add(pool.submit(_score_task_in_worker, args))
+                if len(in_flight) >= workers * 2:
+                    finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        report(future.result())
+            for future in in_flight:
+                report(future.result())
+
+    merge_parts(output_dir, part_dir, len(tasks))
+    scoring_seconds = time.perf_counter() - scoring_started
+    scored_here = n_users - users_skipped
+    summary = {
+        "users": n_users,
+        "scored_this_run": scored_here,
+        "resumed_users": users_skipped,
+        "failed_users": len(failed),
+        "failures": failed[:20],
+        "scoring_seconds": round(scoring_seconds, 3),
+        "total_seconds": round(time.perf_counter() - started, 3),
+        "users_per_second": round(scored_here / scoring_seconds, 1) if scoring_seconds > 0 else None,
+        "workers": workers,
+        "outputs": {table: os.path.join(output_dir, f"{table}.csv") for table in OUTPUT_TABLES},
+    }
+    with open(os.path.join(output_dir, "summary.json"), "w") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a transactions export offline")
+    parser.add_argument("input", help="Transactions export (.csv, .parquet or .ndjson, optionally .gz)")
+    parser.add_argument("--output-dir", default="batch_out")
+    parser.add_argument("--budgets", default=None, help="Budgets export (user_id, category, amount[, month])")
+    parser.add_argument("--model", default=MODEL_PATH, help="Saved persona model")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--users-per-task", type=int, default=USERS_PER_TASK)
+    parser.add_argument("--restart", action="store_true", help="Discard a previous run in --output-dir")
+    args = parser.parse_args()
+
+    try:
+        summary = run_batch(
+            args.input, args.output_dir, args.budgets, args.model,
+            args.workers, args.users_per_task, args.restart,
+        )
+    except (OSError, RuntimeError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print("\n" + "=" * 60)
+    print("BATCH SCORING SUMMARY")
+    print("=" * 60)
+    print(f"  Users:            {summary['users']:,} ({summary['resumed_users']:,} from a previous run)")
+    print(f"  Failed:           {summary['failed_users']:,}")
+    print(f"  Scoring time:     {summary['scoring_seconds']:.1f}s with {summary['workers']} worker(s)")
+    print(f"  Throughput:       {summary['users_per_second'] or 0:,.1f} users/s")
+    for table, path in summary["outputs"].items():
+        print(f"  {table + ':':<17} {path}")
+    sys.exit(1 if summary["failed_users"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""
+Hot Path Micro-Benchmarks
+
+Times the pipeline and model functions on the request path with fixed
+synthetic inputs at several sizes and compares the results against the
+checked-in baselines in benchmark_baselines.json.
+
+Usage:
+    python scripts/benchmark.py                     # compare with baselines
+    python scripts/benchmark.py --tolerance 0.5     # allow +50% before flagging
+    python scripts/benchmark.py --update-baseline   # record new baselines
+    python scripts/benchmark.py --only trend        # run matching benchmarks only
+
+Exits with status 1 if any benchmark regresses beyond the tolerance.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import date, datetime
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVICE_DIR = os.path.join(SCRIPTS_DIR, "..")
+sys.path.append(SERVICE_DIR)
+
+from synthetic_data import DEFAULT_BUDGET, generate_user_transactions  # noqa: E402
+from pipeline.data_loader import DataLoader  # noqa: E402
+from pipeline.preprocessor import SpendingPreprocessor  # noqa: E402
+from models.clustering import SpendingClusterModel  # noqa: E402
+from models.trend import TrendAnalyzer  # noqa: E402
+from models.overspending import OverspendingPredictor  # noqa: E402
+from models.coaching import analyze_spending_patterns  # noqa: E402
+from models.peer_comparison import generate_peer_comparison_message  # noqa: E402
+from models.forecast import (  # noqa: E402
+    DAILY_HISTORY_DAYS, forecast_month_end, forecast_series, project_month_end,
+)
+from pipeline.columnar import parse_columnar_json  # noqa: E402
+
+BASELINE_PATH = os.path.join(SCRIPTS_DIR, "benchmark_baselines.json")
+DATASET_PATH = os.path.join(SERVICE_DIR, "data", "student_spending.csv")
+
+SIZES = [10, 1000, 10000]
+FORECAST_BATCH_SERIES = 10000  # (user, category) series per nightly forecast batch
+DEFAULT_TOLERANCE = 0.25  # flag runs more than 25% slower than baseline
+
+
+def time_call(fn: Callable, min_time: float = 0.2, repeats: int = 5) -> float:
+    """
+    Median seconds per call of fn
+
+    Calls fn in batches large enough to run for at least min_time / repeats
+    seconds, then takes the median of the per-call times across repeats.
+    """
+    fn()  # warm-up
+
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / repeats or number >= 1_000_000:
+            break
+        number *= 2
+
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def build_benchmarks() -> List[Tuple[str, Callable]]:
+    """
+    Build (name, callable) pairs for every hot function and input size
+
+    Fixtures (the fitted cluster model, synthetic histories) are built once
+    here so that only the function under test is timed.
+    """
+    loader = DataLoader(DATASET_PATH)
+    dataset = loader.load_dataset()
+    preprocessor = SpendingPreprocessor().fit_reference(dataset)
+    trend_analyzer = TrendAnalyzer()
+    predictor = OverspendingPredictor()
+
+    df_train = preprocessor.engineer_features(dataset)
+    X_train = preprocessor.prepare_for_clustering(df_train)
+    cluster_model = SpendingClusterModel()
+    cluster_model.fit(X_train)
+    cluster_model.build_peer_index(X_train)
+
+    benchmarks = []
+
+    for size in SIZES:
+        transactions = generate_user_transactions(size, seed=size)
+        trans_df = pd.DataFrame(transactions)
+        features_df = loader.convert_user_transactions_to_features(transactions)
+        category_totals = loader.get_category_totals(transactions)
+        monthly_trend = loader.get_monthly_trend(transactions, months=3)
+        features_eng = preprocessor.engineer_features(features_df)
+        X_user = preprocessor.prepare_for_clustering(features_eng)[0]
+        columnar_body = json.dumps({
+            "user_id": "bench-user",
+            "transactions": {
+                name: [t[name] for t in transactions]
+                for name in ("date", "amount", "category", "description", "merchant")
+            },
+        }).encode()
+
+        benchmarks.extend([
+            (f"data_loader.convert_user_transactions_to_features[{size}]",
+             lambda t=transactions: loader.convert_user_transactions_to_features(t)),
+            (f"data_loader.get_monthly_trend[{size}]",
+             lambda t=transactions: loader.get_monthly_trend(t, months=3)),
+            (f"columnar.parse_columnar_json[{size}]",
+             lambda b=columnar_body: parse_columnar_json(b, ["date", "amount", "category"])),
+            (f"coaching.analyze_spending_patterns[{size}]",
+             lambda d=trans_df: analyze_spending_patterns(d)),
+            (f"peer_comparison.generate_peer_comparison_message[{size}]",
+             lambda d=trans_df: generate_peer_comparison_message(
+                 user_id="bench-user", user_birth_year=2003, user_transactions=d)),
+            (f"forecast.project_month_end[{size}]",
+             lambda d=trans_df: project_month_end(
+                 d["date"].to_numpy(), d["category"].to_numpy(), d["amount"].to_numpy())),
+        ])
+
+        # These operate on per-user aggregates, so only time them once
+        if size == SIZES[-1]:
+            benchmarks.extend([
+                ("preprocessor.engineer_features[user]",
+                 lambda f=features_df: preprocessor.engineer_features(f)),
+                ("clustering.analyze_user_persona[user]",
+                 lambda x=X_user: cluster_model.analyze_user_persona(x)),
+                ("clustering.similar_peers[user]",
+                 lambda x=X_user: cluster_model.similar_peers(x)),
+                ("trend.analyze_trend[3_months]",
+                 lambda v=monthly_trend: trend_analyzer.analyze_trend(v)),
+                ("overspending.predict_overspending_risk[user]",
+                 lambda c=category_totals: predictor.predict_overspending_risk(
+                     current_spending=c, budget=DEFAULT_BUDGET, days_remaining=12)),
+            ])
+
+    benchmarks.append((
+        f"preprocessor.engineer_features[dataset_{len(df_train)}]",
+        lambda: preprocessor.engineer_features(loader.df),
+    ))
+
+    # Nightly batch: every (user, category) series at once
+    rng = np.random.default_rng(0)
+    daily = rng.gamma(0.5, 20000, size=(FORECAST_BATCH_SERIES, DAILY_HISTORY_DAYS))
+    monthly = rng.gamma(5, 200000, size=(FORECAST_BATCH_SERIES, 12))
+    benchmarks.extend([
+        (f"forecast.forecast_month_end[batch_{FORECAST_BATCH_SERIES}]",
+         lambda: forecast_month_end(daily, date.today())),
+        (f"forecast.forecast_series[batch_{FORECAST_BATCH_SERIES}]",
+         lambda: forecast_series(monthly)),
+    ])
+
+    return benchmarks
+
+
+def run_benchmarks(only: str = None) -> Dict[str, float]:
+    """Run all benchmarks and return median microseconds per call"""
+    results = {}
+    for name, fn in build_benchmarks():
+        if only and only not in name:
+            continue
+        results[name] = time_call(fn) * 1e6
+        print(f"  {name:<64} {results[name]:12.1f} µs")
+    return results
+
+
+def compare_with_baseline(
+    results: Dict[str, float],
+    baseline: Dict[str, float],
+    tolerance: float,
+) -> List[str]:
+    """
+    Compare results against baseline timings
+
+    Returns:
+        Names of benchmarks slower than baseline * (1 + tolerance)
+    """
+    regressions = []
+    print("\n" + "=" * 60)
+    print(f"COMPARISON vs BASELINE (tolerance +{tolerance * 100:.0f}%)")
+    print("=" * 60)
+    for name, current in results.items():
+        if name not in baseline:
+            print(f"  {name:<64} (no baseline)")
+            continue
+        previous = baseline[name]
+        change = (current - previous) / previous if previous > 0 else 0
+        flag = ""
+        if change > tolerance:
+            flag = "  ❌ REGRESSION"
+            regressions.append(name)
+        elif change < -tolerance:
+            flag = "  ✅ faster"
+        print(f"  {name:<64} {previous:10.1f} -> {current:10.1f} µs ({change * 100:+6.1f}%){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ML service hot paths")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--only", default=None, help="Substring filter on benchmark names")
+    parser.add_argument("--json-out", default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    print("⏱️  Running hot path benchmarks...")
+    results = run_benchmarks(args.only)
+
+    report = {
+        "generated_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "unit": "microseconds_per_call",
+        "results": results,
+    }
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Results saved to {args.json_out}")
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r") as f:
+                baseline = json.load(f).get("results", {})
+        baseline.update(results)
+        report["results"] = dict(sorted(baseline.items()))
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"✅ Baseline updated: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"⚠️  No baseline at {args.baseline}; run with --update-baseline first")
+        return
+
+    with open(args.baseline, "r") as f:
+        baseline = json.load(f).get("results", {})
+
+    regressions = compare_with_baseline(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} benchmark(s) regressed beyond tolerance")
+        sys.exit(1)
+    print("\n✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Local Transactions Store
+
+Creates a SQLite stand-in for the Supabase `transactions`, `budgets` and
+`users` tables (same columns and indexes as supabase/migrations) filled
+with synthetic users, for retraining and DB-mode tests.
+
+Usage:
+    python scripts/create_local_store.py --path data/transactions.db --users 200
+"""
+
+import argparse
+import os
+import sqlite3
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from synthetic_data import DEFAULT_BUDGET, generate_user_transactions
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    email TEXT UNIQUE NOT NULL,
+    birth_year INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS transactions (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL REFERENCES users(id),
+    amount INTEGER NOT NULL CHECK (amount > 0),
+    description TEXT NOT NULL,
+    category TEXT NOT NULL,
+    payment_method TEXT NOT NULL DEFAULT 'card',
+    merchant TEXT,
+    date TEXT NOT NULL,
+    time_slot TEXT,
+    is_deleted INTEGER DEFAULT 0,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_transactions_user_date ON transactions(user_id, date DESC);
+CREATE INDEX IF NOT EXISTS idx_transactions_is_deleted ON transactions(is_deleted);
+
+CREATE TABLE IF NOT EXISTS budgets (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL REFERENCES users(id),
+    category TEXT NOT NULL,
+    amount INTEGER NOT NULL CHECK (amount >= 0),
+    month TEXT NOT NULL,
+    UNIQUE(user_id, category, month)
+);
+
+CREATE INDEX IF NOT EXISTS idx_budgets_user_month ON budgets(user_id, month);
+"""
+
+
+def create_store(
+    path: str,
+    n_users: int = 100,
+    transactions_per_user: int = 300,
+    months: int = 6,
+    seed: int = 0,
+    end_date: Optional[datetime] = None,
+) -> sqlite3.Connection:
+    """
+    Create (or extend) a SQLite store with synthetic users
+
+    Args:
+        path: SQLite file path
+        n_users: Number of synthetic users
+        transactions_per_user: Transactions per user
+        months: History length in months
+        seed: Base random seed (user i uses seed + i)
+        end_date: Last day of every history (defaults to today)
+
+    Returns:
+        Open connection to the store
+    """
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+
+    month = (end_date or datetime.now()).strftime("%Y-%m")
+    for i in range(n_users):
+        user_id = str(uuid.UUID(int=seed + i))
+        conn.execute(
+            "INSERT OR IGNORE INTO users (id, email, birth_year) VALUES (?, ?, ?)",
+            (user_id, f"user{seed + i}@example.com", 2000 + i % 6),
+        )
+        history = generate_user_transactions(transactions_per_user, seed=seed + i, months=months, end_date=end_date)
+        conn.executemany(
+            "INSERT INTO transactions (id, user_id, amount, description, category, merchant, date, time_slot) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (str(uuid.uuid4()), user_id, int(t["amount"]), t["description"],
+                 t["category"], t["merchant"], t["date"], t["time_slot"])
+                for t in history
+            ],
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO budgets (id, user_id, category, amount, month) VALUES (?, ?, ?, ?, ?)",
+            [(str(uuid.uuid4()), user_id, c, a, month) for c, a in DEFAULT_BUDGET.items()],
+        )
+    conn.commit()
+    return conn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create a local SQLite transactions store")
+    parser.add_argument("--path", default="data/transactions.db")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--transactions", type=int, default=300, help="Transactions per user")
+    parser.add_argument("--months", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.path)), exist_ok=True)
+    create_store(args.path, args.users, args.transactions, args.months, args.seed).close()
+    print(f"✅ Created {args.users} users in {args.path}")
+
+
+if __name__ == "__main__":
+    main()
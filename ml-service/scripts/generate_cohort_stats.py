@@ -10,6 +10,12 @@ import numpy as np
 from datetime import datetime
 import json
 import os
+import sys
+
+SERVICE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(SERVICE_DIR)
+
+from pipeline.categories import DATASET_SPENDING_COLUMNS, DATASET_TO_APP  # noqa: E402
 
 # Path to the dataset
 DATASET_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "student_spending.csv")
@@ -32,25 +38,8 @@ def load_and_analyze_dataset(filepath: str = None) -> dict:
     print(f"Age range: {df['age'].min()} - {df['age'].max()}")
     print(f"Columns: {list(df.columns)}")
     
-    # Define spending categories mapping
-    # Dataset columns to our app categories
-    CATEGORY_MAPPING = {
-        "food": "food",
-        "transportation": "transport",
-        "entertainment": "entertainment",
-        "books_supplies": "education",
-        "health_wellness": "health",
-        "personal_care": "shopping",
-        "technology": "shopping",
-        "miscellaneous": "other",
-        "housing": "utilities",
-    }
-    
-    # Spending columns in the dataset
-    SPENDING_COLUMNS = [
-        "food", "transportation", "books_supplies", "entertainment",
-        "personal_care", "technology", "health_wellness", "miscellaneous", "housing"
-    ]
+    # Spending columns in the dataset (housing counts towards utilities)
+    SPENDING_COLUMNS = DATASET_SPENDING_COLUMNS + ["housing"]
     
     # Calculate total monthly spending per student
     df["total_spending"] = df[SPENDING_COLUMNS].sum(axis=1)
@@ -86,7 +75,7 @@ def load_and_analyze_dataset(filepath: str = None) -> dict:
         
         # Category averages (mapped to our app categories)
         category_averages = {}
-        for dataset_col, app_category in CATEGORY_MAPPING.items():
+        for dataset_col, app_category in DATASET_TO_APP.items():
             if dataset_col in group_df.columns:
                 if app_category not in category_averages:
                     category_averages[app_category] = 0
@@ -129,10 +118,7 @@ def generate_coaching_patterns(df: pd.DataFrame) -> list:
     Returns:
         List of common spending patterns and coaching suggestions
     """
-    SPENDING_COLUMNS = [
-        "food", "transportation", "books_supplies", "entertainment",
-        "personal_care", "technology", "health_wellness", "miscellaneous"
-    ]
+    SPENDING_COLUMNS = DATASET_SPENDING_COLUMNS
     
     patterns = []
     
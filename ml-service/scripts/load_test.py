@@ -0,0 +1,314 @@
+"""
+Endpoint Load Test
+
+Fires concurrent requests at the ML endpoints with synthetic users of
+configurable history length and reports throughput, latency percentiles
+and error rate per endpoint. Results can be written as JSON and compared
+against a previous run to check a build before deploying.
+
+Usage:
+    python scripts/load_test.py --spawn --sizes 10,1000,50000 --concurrency 1,8
+    python scripts/load_test.py --base-url http://localhost:8000 --json-out run.json
+    python scripts/load_test.py --spawn --compare baseline.json
+"""
+
+import argparse
+import http.client
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from synthetic_data import build_payload, generate_user_transactions
+
+SERVICE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+ENDPOINTS = [
+    "/predict/insights",
+    "/coaching/message",
+    "/coaching/peer-comparison",
+]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(base_url: str, timeout: float = 120.0) -> bool:
+    """
+    Poll the readiness endpoint until models are loaded and warmed up
+
+    Args:
+        base_url: Service base URL
+        timeout: Seconds to wait before giving up
+
+    Returns:
+        True if the service became ready in time
+    """
+    parsed = urlparse(base_url)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=2)
+            conn.request("GET", "/ready")
+            status = conn.getresponse().status
+            conn.close()
+            if status == 200:
+                return True
+        except (OSError, ValueError):
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def spawn_server(port: int, workers: int = 1) -> subprocess.Popen:
+    """Start a local uvicorn instance running main:app"""
+    cmd = [
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(workers), "--log-level", "warning",
+    ]
+    return subprocess.Popen(cmd, cwd=SERVICE_DIR)
+
+
+class _Worker(threading.local):
+    """One keep-alive connection per client thread"""
+    conn: Optional[http.client.HTTPConnection] = None
+
+
+def run_scenario(
+    base_url: str,
+    endpoint: str,
+    bodies: List[bytes],
+    concurrency: int,
+    n_requests: int,
+    api_key: str,
+    timeout: float,
+) -> Dict:
+    """
+    Send n_requests to one endpoint with the given concurrency
+
+    Args:
+        base_url: Service base URL
+        endpoint: Endpoint path
+        bodies: Pre-encoded request bodies (one per synthetic user)
+        concurrency: Number of concurrent client threads
+        n_requests: Total number of requests to send
+        api_key: Value for the X-API-Key header
+        timeout: Per-request timeout in seconds
+
+    Returns:
+        Dict with latency percentiles, throughput and error rate
+    """
+    parsed = urlparse(base_url)
+    local = _Worker()
+    headers = {"Content-Type": "application/json", "X-API-Key": api_key}
+
+    def send(i: int):
+        body = bodies[i % len(bodies)]
+        if local.conn is None:
+            local.conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=timeout)
+        start = time.perf_counter()
+        try:
+            local.conn.request("POST", endpoint, body=body, headers=headers)
+            response = local.conn.getresponse()
+            response.read()
+            ok = 200 <= response.status < 300
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            local.conn.close()
+            local.conn = None
+            ok, status = False, 0
+        return time.perf_counter() - start, ok, status
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(send, range(n_requests)))
+    wall = time.perf_counter() - wall_start
+
+    latencies = sorted(r[0] * 1000 for r in results)
+    errors = [r for r in results if not r[1]]
+    status_counts: Dict[str, int] = {}
+    for _, _, status in results:
+        status_counts[str(status)] = status_counts.get(str(status), 0) + 1
+
+    return {
+        "requests": n_requests,
+        "errors": len(errors),
+        "error_rate": len(errors) / n_requests if n_requests else 0.0,
+        "status_counts": status_counts,
+        "throughput_rps": n_requests / wall if wall > 0 else 0.0,
+        "latency_ms": {
+            "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": latencies[-1] if latencies else 0.0,
+        },
+        "wall_seconds": wall,
+    }
+
+
+def run_load_test(args: argparse.Namespace) -> Dict:
+    """Run every (endpoint, size, concurrency) combination"""
+    sizes = [int(s) for s in args.sizes.split(",")]
+    concurrencies = [int(c) for c in args.concurrency.split(",")]
+    endpoints = args.endpoints.split(",") if args.endpoints else ENDPOINTS
+
+    scenarios = []
+    for size in sizes:
+        histories = [
+            generate_user_transactions(size, seed=args.seed + u, months=args.months)
+            for u in range(args.users)
+        ]
+        for endpoint in endpoints:
+            bodies = [
+                json.dumps(build_payload(endpoint, f"load-user-{u}", h)).encode("utf-8")
+                for u, h in enumerate(histories)
+            ]
+            for concurrency in concurrencies:
+                # Warm the code path so the first request doesn't skew p99
+                run_scenario(args.base_url, endpoint, bodies, 1, 1, args.api_key, args.timeout)
+                result = run_scenario(
+                    args.base_url, endpoint, bodies, concurrency,
+                    args.requests, args.api_key, args.timeout,
+                )
+                result.update({
+                    "endpoint": endpoint,
+                    "history_size": size,
+                    "concurrency": concurrency,
+                    "payload_bytes": sum(len(b) for b in bodies) // len(bodies),
+                })
+                scenarios.append(result)
+                print_scenario(result)
+
+    return {
+        "generated_at": datetime.now().isoformat(),
+        "base_url": args.base_url,
+        "git_revision": _git_revision(),
+        "config": {
+            "sizes": sizes,
+            "concurrency": concurrencies,
+            "requests": args.requests,
+            "users": args.users,
+            "months": args.months,
+            "seed": args.seed,
+        },
+        "scenarios": scenarios,
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=SERVICE_DIR, stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_scenario(result: Dict):
+    """Print one scenario as a table row"""
+    lat = result["latency_ms"]
+    print(
+        f"  {result['endpoint']:<28} n={result['history_size']:<6} c={result['concurrency']:<3} "
+        f"{result['throughput_rps']:8.1f} req/s  "
+        f"p50={lat['p50']:8.1f}ms p95={lat['p95']:8.1f}ms p99={lat['p99']:8.1f}ms  "
+        f"err={result['error_rate'] * 100:5.1f}%"
+    )
+
+
+def compare_runs(baseline: Dict, current: Dict):
+    """Print p95 and throughput deltas against a previous run"""
+    def key(s):
+        return (s["endpoint"], s["history_size"], s["concurrency"])
+
+    previous = {key(s): s for s in baseline.get("scenarios", [])}
+    print("\n" + "=" * 60)
+    print(f"COMPARISON vs {baseline.get('git_revision') or baseline.get('generated_at')}")
+    print("=" * 60)
+    for scenario in current["scenarios"]:
+        old = previous.get(key(scenario))
+        if old is None:
+            continue
+        p95_old = old["latency_ms"]["p95"]
+        p95_new = scenario["latency_ms"]["p95"]
+        rps_old = old["throughput_rps"]
+        rps_new = scenario["throughput_rps"]
+        p95_delta = ((p95_new - p95_old) / p95_old * 100) if p95_old else 0
+        rps_delta = ((rps_new - rps_old) / rps_old * 100) if rps_old else 0
+        print(
+            f"  {scenario['endpoint']:<28} n={scenario['history_size']:<6} c={scenario['concurrency']:<3} "
+            f"p95 {p95_old:8.1f} -> {p95_new:8.1f}ms ({p95_delta:+.1f}%)  "
+            f"rps {rps_old:7.1f} -> {rps_new:7.1f} ({rps_delta:+.1f}%)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the ML service endpoints")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--spawn", action="store_true", help="Start a local uvicorn instance")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers when spawning")
+    parser.add_argument("--endpoints", default=None, help="Comma-separated endpoint paths")
+    parser.add_argument("--sizes", default="10,1000,10000", help="Transactions per user")
+    parser.add_argument("--concurrency", default="1,8", help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per scenario")
+    parser.add_argument("--users", type=int, default=4, help="Distinct synthetic users")
+    parser.add_argument("--months", type=int, default=6, help="History length in months")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--api-key", default=os.getenv("ML_API_SECRET_KEY", "dev-secret-key"))
+    parser.add_argument("--json-out", default=None, help="Write results as JSON")
+    parser.add_argument("--compare", default=None, help="Previous JSON result to compare with")
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        port = _free_port()
+        args.base_url = f"http://127.0.0.1:{port}"
+        print(f"🚀 Starting uvicorn on port {port}...")
+        server = spawn_server(port, args.workers)
+
+    try:
+        if not wait_until_ready(args.base_url):
+            print(f"❌ Service at {args.base_url} did not become ready")
+            sys.exit(1)
+
+        print(f"📊 Load testing {args.base_url}")
+        report = run_load_test(args)
+
+        if args.json_out:
+            with open(args.json_out, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"✅ Results saved to {args.json_out}")
+
+        if args.compare:
+            with open(args.compare, "r") as f:
+                compare_runs(json.load(f), report)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
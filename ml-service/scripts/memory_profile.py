@@ -0,0 +1,68 @@
+"""
+Per-Stage Memory Profile
+
+Reports the peak tracemalloc allocation of every pipeline stage for a
+synthetic payload of the given size and flags stages over budget.
+
+Usage:
+    python scripts/memory_profile.py --transactions 10000
+    python scripts/memory_profile.py --transactions 50000 --json-out memory.json
+"""
+
+import argparse
+import json
+import os
+import sys
+
+SERVICE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(SERVICE_DIR)
+
+from synthetic_data import DEFAULT_BUDGET, generate_user_transactions  # noqa: E402
+from pipeline.data_loader import DataLoader  # noqa: E402
+from pipeline.preprocessor import SpendingPreprocessor  # noqa: E402
+from models.clustering import SpendingClusterModel  # noqa: E402
+from monitoring.memory import check_budgets, profile_pipeline_memory  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak memory per pipeline stage")
+    parser.add_argument("--transactions", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json-out", default=None)
+    args = parser.parse_args()
+
+    # Fit models the same way the service does on startup
+    loader = DataLoader(os.path.join(SERVICE_DIR, "data", "student_spending.csv"))
+    df = loader.load_dataset()
+    preprocessor = SpendingPreprocessor().fit_reference(df)
+    df_eng = preprocessor.engineer_features(df)
+    preprocessor.fit(df_eng)
+    cluster_model = SpendingClusterModel()
+    cluster_model.fit(preprocessor.prepare_for_clustering(df_eng))
+    cluster_model.feature_reference = preprocessor.reference
+    cluster_model.build_peer_index(preprocessor.prepare_for_clustering(df_eng))
+
+    transactions = generate_user_transactions(args.transactions, seed=args.seed)
+    peaks = profile_pipeline_memory(
+        transactions, DEFAULT_BUDGET, cluster_model=cluster_model, preprocessor=preprocessor
+    )
+    exceeded = check_budgets(peaks, args.transactions)
+
+    print(f"\n📊 Peak allocation per stage ({args.transactions} transactions)")
+    print("-" * 60)
+    for stage, peak in peaks.items():
+        flag = "  ❌ over budget" if stage in exceeded else ""
+        print(f"  {stage:<28} {peak / 1024 / 1024:10.2f} MiB{flag}")
+    print(f"  {'max':<28} {max(peaks.values()) / 1024 / 1024:10.2f} MiB")
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump({"transactions": args.transactions, "peak_bytes": peaks}, f, indent=2)
+        print(f"✅ Results saved to {args.json_out}")
+
+    if exceeded:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Startup Profile
+
+Breaks down ML service cold start into import time per top-level package
+(via `python -X importtime`) and boot stages (dataset load, feature
+engineering, training), and checks the import budget.
+
+Usage:
+    python scripts/startup_profile.py
+    python scripts/startup_profile.py --budget-ms 1500 --top 15
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+SERVICE_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# Heavy dependencies the request path should only pay for on first use
+DEFERRED_MODULES = ["sklearn", "scipy", "joblib"]
+
+DEFAULT_IMPORT_BUDGET_MS = 1500
+
+
+def profile_imports(module: str = "main") -> Tuple[List[Tuple[str, float]], Dict[str, bool], float]:
+    """
+    Import a module in a fresh interpreter with -X importtime
+
+    Args:
+        module: Module to import
+
+    Returns:
+        Tuple of (top-level packages with cumulative ms, deferred module -> imported?, total ms)
+    """
+    check = "; ".join(
+        f"print('DEFERRED {name}', '{name}' in sys.modules)" for name in DEFERRED_MODULES
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import sys; import {module}; {check}"],
+        cwd=SERVICE_DIR, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr[-2000:])
+
+    packages: Dict[str, float] = {}
+    total_ms = 0.0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        depth = len(name) - len(name.lstrip(" "))
+        cumulative_ms = int(cumulative) / 1000
+        if name.strip() == module:
+            total_ms = cumulative_ms
+        # Direct imports of the module (one level down) and top-level imports
+        if depth <= 3:
+            top = name.strip().split(".")[0]
+            packages[top] = max(packages.get(top, 0.0), cumulative_ms)
+
+    deferred = {}
+    for line in proc.stdout.splitlines():
+        if line.startswith("DEFERRED "):
+            _, name, imported = line.split()
+            deferred[name] = imported == "True"
+
+    packages.pop(module, None)
+    return sorted(packages.items(), key=lambda p: -p[1]), deferred, total_ms
+
+
+def profile_boot() -> str:
+    """Run the service startup in-process and return the boot stage breakdown"""
+    os.chdir(SERVICE_DIR)
+    sys.path.insert(0, SERVICE_DIR)
+    import main
+
+    # startup_event() schedules load_models() in the background; run it inline here
+    main.init_components()
+    main.load_models()
+    return main.BOOT_TIMER.report()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import and boot time breakdown")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_IMPORT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--skip-boot", action="store_true", help="Only profile imports")
+    args = parser.parse_args()
+
+    packages, deferred, total_ms = profile_imports()
+
+    print(f"📦 import main: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    for name, ms in packages[: args.top]:
+        print(f"   {name:<24} {ms:9.1f} ms")
+
+    print("\n💤 Deferred dependencies")
+    eager = [name for name, imported in deferred.items() if imported]
+    for name, imported in deferred.items():
+        print(f"   {name:<24} {'❌ imported at startup' if imported else '✅ deferred'}")
+
+    if not args.skip_boot:
+        print()
+        print(profile_boot())
+
+    if total_ms > args.budget_ms or eager:
+        print("\n❌ Startup budget exceeded")
+        sys.exit(1)
+    print("\n✅ Startup within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Synthetic Transaction Generator
+
+Builds deterministic synthetic users for load tests and benchmarks.
+Histories end today so the current/previous month logic in the
+service always has data to work with.
+"""
+
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from generate_mock_transactions import FREQ_CONFIG, MERCHANTS, get_time_slot
+
+CATEGORIES = list(FREQ_CONFIG.keys())
+CATEGORY_WEIGHTS = [FREQ_CONFIG[c]["weight"] for c in CATEGORIES]
+
+# Budget used for /predict/insights payloads (roughly the 20s cohort average)
+DEFAULT_BUDGET = {
+    "food": 330000,
+    "transport": 160000,
+    "shopping": 300000,
+    "entertainment": 110000,
+    "education": 230000,
+    "health": 150000,
+}
+
+
+def generate_user_transactions(
+    n_transactions: int,
+    seed: int = 0,
+    months: int = 6,
+    end_date: Optional[datetime] = None,
+) -> List[Dict]:
+    """
+    Generate a synthetic transaction history
+
+    Args:
+        n_transactions: Number of transactions to generate
+        seed: Random seed (same seed -> same history)
+        months: Length of the history in months
+        end_date: Last day of the history (defaults to today)
+
+    Returns:
+        List of transaction dicts sorted by date
+    """
+    rng = random.Random(seed)
+    end_date = end_date or datetime.now()
+    total_days = max(1, months * 30)
+
+    transactions = []
+    for _ in range(n_transactions):
+        category = rng.choices(CATEGORIES, weights=CATEGORY_WEIGHTS)[0]
+        config = FREQ_CONFIG[category]
+        tx_date = end_date - timedelta(days=rng.randint(0, total_days - 1))
+        amount = round(rng.randint(config["min_price"], config["max_price"]) / 100) * 100
+        merchant = rng.choice(MERCHANTS.get(category, ["상점"]))
+
+        transactions.append({
+            "date": tx_date.strftime("%Y-%m-%d"),
+            "amount": float(amount),
+            "category": category,
+            "description": f"{merchant} 결제",
+            "merchant": merchant,
+            "time_slot": get_time_slot(rng.randint(0, 23)),
+        })
+
+    transactions.sort(key=lambda x: x["date"])
+    return transactions
+
+
+def build_payload(endpoint: str, user_id: str, transactions: List[Dict]) -> Dict:
+    """
+    Build a request body for one of the ML endpoints
+
+    Args:
+        endpoint: Endpoint path (e.g. '/predict/insights')
+        user_id: Synthetic user identifier
+        transactions: Transaction history
+
+    Returns:
+        JSON-serialisable request body
+    """
+    if endpoint == "/predict/insights":
+        return {
+            "user_id": user_id,
+            "transactions": [
+                {k: t[k] for k in ("date", "amount", "category", "description", "merchant")}
+                for t in transactions
+            ],
+            "current_month_budget": DEFAULT_BUDGET,
+        }
+
+    coaching_transactions = [
+        {k: t[k] for k in ("date", "amount", "category", "time_slot")}
+        for t in transactions
+    ]
+
+    if endpoint == "/coaching/peer-comparison":
+        return {
+            "user_id": user_id,
+            "birth_year": datetime.now().year - 22,
+            "transactions": coaching_transactions,
+        }
+
+    return {"user_id": user_id, "transactions": coaching_transactions}
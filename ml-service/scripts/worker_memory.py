@@ -0,0 +1,188 @@
+"""
+Worker Memory Comparison
+
+Starts the service with N pre-forked workers (serving.prefork) and with N
+independent uvicorn workers, then reports time to ready, total RSS/PSS of
+the process tree (idle and after load) and throughput for each mode.
+
+PSS (proportional set size) splits shared pages between the processes
+mapping them, so it is the number that shows copy-on-write sharing; RSS
+counts shared pages once per process.
+
+Usage:
+    python scripts/worker_memory.py --workers 4
+    python scripts/worker_memory.py --workers 8 --size 1000 --requests 400 --json-out workers.json
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+from load_test import ENDPOINTS, _free_port, run_scenario, wait_until_ready
+from synthetic_data import build_payload, generate_user_transactions
+
+SERVICE_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+MODES = ["prefork", "independent"]
+
+
+def spawn(mode: str, port: int, workers: int) -> subprocess.Popen:
+    """Start the service in the given serving mode"""
+    if mode == "prefork":
+        cmd = [sys.executable, "-m", "serving.prefork", "--host", "127.0.0.1",
+               "--port", str(port), "--workers", str(workers)]
+    else:
+        cmd = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+               "--port", str(port), "--workers", str(workers), "--log-level", "warning"]
+    return subprocess.Popen(cmd, cwd=SERVICE_DIR, stdout=subprocess.DEVNULL)
+
+
+def process_tree(root_pid: int) -> List[int]:
+    """PIDs of a process and all of its descendants (Linux /proc)"""
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces; ppid follows the closing ')'
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    pids, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(children.get(pid, []))
+    return pids
+
+
+def memory_kb(pid: int) -> Dict[str, int]:
+    """RSS and PSS of one process in kB"""
+    result = {"rss": 0, "pss": 0}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss"):
+                    result[key.lower()] = int(rest.split()[0])
+    except OSError:
+        pass
+    return result
+
+
+def tree_memory_mb(root_pid: int) -> Dict[str, float]:
+    """Summed RSS/PSS of a process tree in MB"""
+    pids = process_tree(root_pid)
+    totals = [memory_kb(pid) for pid in pids]
+    return {
+        "processes": len(pids),
+        "rss_mb": sum(t["rss"] for t in totals) / 1024,
+        "pss_mb": sum(t["pss"] for t in totals) / 1024,
+    }
+
+
+def wait_all_workers_ready(base_url: str, workers: int, timeout: float) -> bool:
+    """Wait until /ready succeeds repeatedly (each request may hit another worker)"""
+    deadline = time.time() + timeout
+    streak = 0
+    while time.time() < deadline and streak < workers * 3:
+        if wait_until_ready(base_url, timeout=max(deadline - time.time(), 0.1)):
+            streak += 1
+        else:
+            return False
+    return streak >= workers * 3
+
+
+def measure_mode(mode: str, args: argparse.Namespace, bodies: List[bytes]) -> Dict:
+    """Start one serving mode, measure memory and throughput, stop it"""
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    proc = spawn(mode, port, args.workers)
+    try:
+        if not wait_all_workers_ready(base_url, args.workers, args.timeout):
+            raise RuntimeError(f"{mode} server did not become ready")
+        ready_seconds = time.perf_counter() - start
+        time.sleep(1.0)
+        idle = tree_memory_mb(proc.pid)
+
+        load = run_scenario(
+            base_url, args.endpoint, bodies, args.concurrency,
+            args.requests, args.api_key, args.timeout,
+        )
+        loaded = tree_memory_mb(proc.pid)
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+    return {
+        "mode": mode,
+        "workers": args.workers,
+        "ready_seconds": ready_seconds,
+        "idle": idle,
+        "after_load": loaded,
+        "throughput_rps": load["throughput_rps"],
+        "latency_ms": load["latency_ms"],
+        "error_rate": load["error_rate"],
+    }
+
+
+def print_result(result: Dict):
+    print(
+        f"{result['mode']:<12} workers={result['workers']:<3} "
+        f"ready={result['ready_seconds']:6.1f}s  "
+        f"idle RSS={result['idle']['rss_mb']:7.1f}MB PSS={result['idle']['pss_mb']:7.1f}MB  "
+        f"loaded RSS={result['after_load']['rss_mb']:7.1f}MB PSS={result['after_load']['pss_mb']:7.1f}MB  "
+        f"{result['throughput_rps']:7.1f} req/s  p95={result['latency_ms']['p95']:.1f}ms  "
+        f"errors={result['error_rate']:.1%}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork vs independent worker memory/throughput")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--endpoint", default=ENDPOINTS[0])
+    parser.add_argument("--size", type=int, default=1000, help="Transactions per user")
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=None, help="Defaults to 2 x workers")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=180.0)
+    parser.add_argument("--api-key", default=os.getenv("ML_API_SECRET_KEY", "dev-secret-key"))
+    parser.add_argument("--json-out", default=None)
+    args = parser.parse_args()
+    args.concurrency = args.concurrency or args.workers * 2
+
+    bodies = [
+        json.dumps(build_payload(
+            args.endpoint, f"mem-user-{u}", generate_user_transactions(args.size, seed=u)
+        )).encode("utf-8")
+        for u in range(args.users)
+    ]
+
+    print(f"🖥️  {os.cpu_count()} CPUs, {args.workers} workers, concurrency {args.concurrency}")
+    results = []
+    for mode in args.modes.split(","):
+        result = measure_mode(mode, args, bodies)
+        print_result(result)
+        results.append(result)
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump({"cpus": os.cpu_count(), "results": results}, f, indent=2)
+        print(f"💾 Results written to {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
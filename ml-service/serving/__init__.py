@@ -0,0 +1 @@
+# Serving Package
@@ -0,0 +1,202 @@
+"""
+Admission Control
+Per-endpoint concurrency limits with a bounded wait queue and load shedding
+
+Each limited endpoint has a capacity in cost units. A request's cost is
+estimated from its Content-Length (1 unit per ML_ADMISSION_BYTES_PER_UNIT,
+capped at the capacity, so one huge payload runs alone instead of alongside
+everything else). Requests that do not fit wait in a FIFO queue:
+
+    queue full                -> 429 + Retry-After (shed immediately)
+    waited > queue timeout    -> 503 + Retry-After
+
+Only the endpoints passed to the middleware are limited; /health, /ready,
+/metrics and the cheap pre-aggregated endpoints are never queued.
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from monitoring.metrics import REGISTRY
+from serving.responses import dumps
+
+
+ADMISSION_CAPACITY = int(os.getenv("ML_ADMISSION_CAPACITY", "8"))  # 0 disables limiting
+ADMISSION_QUEUE_SIZE = int(os.getenv("ML_ADMISSION_QUEUE_SIZE", "32"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ML_ADMISSION_QUEUE_TIMEOUT", "5"))
+BYTES_PER_COST_UNIT = int(os.getenv("ML_ADMISSION_BYTES_PER_UNIT", str(256 * 1024)))
+
+ADMISSION_REJECTED = REGISTRY.counter(
+    "ml_admission_rejected_total", "Requests shed by admission control", ("endpoint", "reason")
+)
+ADMISSION_WAIT = REGISTRY.histogram(
+    "ml_admission_wait_seconds", "Time spent queued before admission", ("endpoint",)
+)
+
+
+class AdmissionRejected(Exception):
+    """Request could not be admitted"""
+
+    def __init__(self, status_code: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionLimiter:
+    """Weighted FIFO semaphore with a bounded queue for one endpoint"""
+
+    def __init__(
+        self,
+        capacity: int = ADMISSION_CAPACITY,
+        queue_size: int = ADMISSION_QUEUE_SIZE,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT,
+        bytes_per_unit: int = BYTES_PER_COST_UNIT,
+    ):
+        """
+        Args:
+            capacity: Cost units that may run concurrently
+            queue_size: Requests allowed to wait for capacity
+            queue_timeout: Seconds a request may wait before 503
+            bytes_per_unit: Request body bytes per cost unit
+        """
+        self.capacity = capacity
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.bytes_per_unit = bytes_per_unit
+        self.in_use = 0
+        self._waiters: Deque[Tuple[int, asyncio.Future]] = deque()
+        # Moving average of admitted request durations (seconds per request)
+        self._avg_duration = 0.1
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def estimate_cost(self, content_length: Optional[int]) -> int:
+        """
+        Cost units of a request
+
+        Args:
+            content_length: Body size in bytes (None when unknown, e.g. chunked)
+
+        Returns:
+            1..capacity; unknown sizes are charged the full capacity
+        """
+        if content_length is None:
+            return self.capacity
+        return min(self.capacity, 1 + content_length // self.bytes_per_unit)
+
+    def retry_after(self) -> int:
+        """Seconds until the queued work is expected to drain"""
+        backlog = self.in_use + sum(cost for cost, _ in self._waiters)
+        return max(1, math.ceil(self._avg_duration * backlog / self.capacity))
+
+    async def acquire(self, cost: int) -> float:
+        """
+        Wait until `cost` units are free
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            AdmissionRejected: Queue full (429) or wait timed out (503)
+        """
+        if not self._waiters and self.in_use + cost <= self.capacity:
+            self.in_use += cost
+            return 0.0
+        if len(self._waiters) >= self.queue_size:
+            raise AdmissionRejected(429, "queue_full", self.retry_after())
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = (cost, future)
+        self._waiters.append(waiter)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if future.done() and not future.cancelled():
+                # Admitted just as the wait ended: hand the units back
+                self.release(cost)
+            else:
+                future.cancel()
+                self._waiters.remove(waiter)
+                self._wake()
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            raise AdmissionRejected(503, "queue_timeout", self.retry_after()) from None
+        return time.perf_counter() - start
+
+    def release(self, cost: int, duration: Optional[float] = None):
+        """Return `cost` units and admit waiters that now fit"""
+        self.in_use -= cost
+        if duration is not None:
+            self._avg_duration = 0.8 * self._avg_duration + 0.2 * duration
+        self._wake()
+
+    def _wake(self):
+        # Strict FIFO: a large request at the head is not overtaken by small ones
+        while self._waiters:
+            cost, future = self._waiters[0]
+            if self.in_use + cost > self.capacity:
+                break
+            self._waiters.popleft()
+            self.in_use += cost
+            future.set_result(None)
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware applying an AdmissionLimiter to selected POST endpoints"""
+
+    def __init__(self, app, limiters: Dict[str, AdmissionLimiter]):
+        self.app = app
+        self.limiters = limiters
+
+    async def __call__(self, scope, receive, send):
+        limiter = None
+        if scope["type"] == "http" and scope["method"] == "POST":
+            limiter = self.limiters.get(scope["path"])
+        if limiter is None or limiter.capacity <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = None
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                content_length = int(value)
+                break
+
+        endpoint = scope["path"]
+        cost = limiter.estimate_cost(content_length)
+        try:
+            waited = await limiter.acquire(cost)
+        except AdmissionRejected as rejected:
+            ADMISSION_REJECTED.inc(endpoint, rejected.reason)
+            await _send_rejection(send, rejected)
+            return
+        ADMISSION_WAIT.observe(waited, endpoint)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(cost, time.perf_counter() - start)
+
+
+async def _send_rejection(send, rejected: AdmissionRejected):
+    body = dumps({"detail": "Service overloaded, retry later", "reason": rejected.reason})
+    await send({
+        "type": "http.response.start",
+        "status": rejected.status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(rejected.retry_after).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,147 @@
+"""
+Pre-fork Server
+Loads the dataset and trains models once in a parent process, then forks
+uvicorn workers that share the loaded models copy-on-write
+
+Compared with `uvicorn --workers N` (every worker imports, loads and
+trains on its own), training happens once and the model, dataset cache
+pages and imported modules stay shared between workers as long as they
+are only read. `gc.freeze()` moves everything loaded before the fork into
+the permanent generation, so the cyclic GC in the workers does not touch
+(and un-share) those pages.
+
+Usage:
+    python -m serving.prefork --workers 4 --port 8000
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict
+
+SERVICE_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """Create the listening socket shared by every worker"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def preload():
+    """Load components and models in this process before forking"""
+    if SERVICE_DIR not in sys.path:
+        sys.path.insert(0, SERVICE_DIR)
+    import main
+
+    print("🚀 Preloading models before fork...")
+    main.init_components()
+    main.load_models()
+    # Workers must not load again in their startup event
+    main.PRELOADED = True
+    return main.app
+
+
+def _run_worker(app, sock: socket.socket, log_level: str):
+    import uvicorn
+
+    config = uvicorn.Config(app, log_level=log_level, lifespan="on")
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+
+
+class PreforkServer:
+    """Fork and supervise uvicorn workers sharing one listening socket"""
+
+    def __init__(self, app, sock: socket.socket, workers: int, log_level: str = "warning"):
+        self.app = app
+        self.sock = sock
+        self.workers = workers
+        self.log_level = log_level
+        self.children: Dict[int, int] = {}  # pid -> worker index
+        self.stopping = False
+
+    def spawn(self, index: int):
+        """Fork one worker"""
+        pid = os.fork()
+        if pid == 0:
+            # Child: default signal handling, uvicorn installs its own
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                _run_worker(self.app, self.sock, self.log_level)
+            except BaseException as e:
+                print(f"❌ Worker {index} crashed: {e}")
+                code = 1
+            finally:
+                os._exit(code)
+        self.children[pid] = index
+        print(f"👷 Worker {index} started (pid {pid})")
+
+    def stop(self, signum=None, frame=None):
+        """Forward shutdown to every worker"""
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        """Fork the workers and restart any that exit until stopped"""
+        # Everything allocated so far is shared with the workers; keep the GC off it
+        gc.collect()
+        gc.freeze()
+
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        for index in range(self.workers):
+            self.spawn(index)
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+
+            index = self.children.pop(pid, None)
+            if index is None:
+                continue
+            if not self.stopping:
+                print(f"⚠️ Worker {index} (pid {pid}) exited with status {status}, restarting")
+                time.sleep(1)
+                self.spawn(index)
+
+        self.sock.close()
+        print("👋 Pre-fork server stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve main:app from pre-forked workers")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)))
+    parser.add_argument("--log-level", default="warning")
+    args = parser.parse_args()
+
+    # Bind first so a port conflict fails before spending time on training
+    sock = bind_socket(args.host, args.port)
+    app = preload()
+    PreforkServer(app, sock, args.workers, args.log_level).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Fast JSON Responses
+Encodes response dicts straight from the pipelines, NumPy scalars and
+arrays included, in a single pass
+
+Endpoints that return NumpyJSONResponse skip FastAPI's response_model
+validation and serialization; the response model then only documents the
+schema (tests check the encoded bodies against it).
+"""
+
+import json
+from typing import Any
+
+import numpy as np
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    orjson = None
+
+
+def _encode_numpy(obj: Any) -> Any:
+    """json.dumps fallback for types the stdlib encoder does not know"""
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return float(obj)
+    if isinstance(obj, np.bool_):
+        return bool(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode content as UTF-8 JSON, natively handling NumPy values"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+        default=_encode_numpy,
+    ).encode("utf-8")
+
+
+class NumpyJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (stdlib json fallback)"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,137 @@
+"""
+Retrain Scheduler
+Periodically runs `python -m pipeline.retrain` in a child process and
+publishes accepted candidates
+
+Inside the service the scheduler runs as an asyncio task: the fit happens
+in the child process, and publishing goes through the model registry, so
+requests are never blocked. With pre-forked workers run it standalone
+instead; it replaces the model file and the workers pick it up through
+ML_MODEL_WATCH_INTERVAL:
+
+    python -m serving.retrain_scheduler --interval 86400 --database-url sqlite:///data/transactions.db
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+SERVICE_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+DEFAULT_MODEL_PATH = "saved_models/clustering_model.joblib"
+DEFAULT_CANDIDATE_PATH = "saved_models/candidate_clustering_model.joblib"
+
+
+def replace_model_file(candidate_path: str, model_path: str = DEFAULT_MODEL_PATH):
+    """Atomically make an accepted candidate the served model file"""
+    os.replace(candidate_path, model_path)
+    print(f"✅ Retrained model installed at {model_path}")
+
+
+class RetrainScheduler:
+    """Run retraining jobs on an interval and hand accepted models to `publish`"""
+
+    def __init__(
+        self,
+        interval: float,
+        database_url: str,
+        publish: Callable[[str, Dict], None],
+        model_path: str = DEFAULT_MODEL_PATH,
+        candidate_path: str = DEFAULT_CANDIDATE_PATH,
+        timeout: float = 900.0,
+    ):
+        """
+        Args:
+            interval: Seconds between runs
+            database_url: Transactions store URL passed to pipeline.retrain
+            publish: Called in a thread with (candidate_path, report) for accepted models
+            model_path: Currently served model (validation reference)
+            candidate_path: Where the child writes an accepted candidate
+            timeout: Seconds before a retraining child is killed
+        """
+        self.interval = interval
+        self.database_url = database_url
+        self.publish = publish
+        self.model_path = model_path
+        self.candidate_path = candidate_path
+        self.timeout = timeout
+        self.last_report: Optional[Dict] = None
+
+    async def run_once(self) -> Dict:
+        """Run one retraining job and publish the candidate if it was accepted"""
+        fd, report_path = tempfile.mkstemp(prefix="retrain-", suffix=".json")
+        os.close(fd)
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                sys.executable, "-m", "pipeline.retrain",
+                "--database-url", self.database_url,
+                "--reference", self.model_path,
+                "--output", self.candidate_path,
+                "--report-out", report_path,
+                cwd=SERVICE_DIR,
+                stdout=asyncio.subprocess.DEVNULL,
+            )
+            try:
+                await asyncio.wait_for(proc.wait(), self.timeout)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                raise RuntimeError(f"retraining did not finish within {self.timeout:.0f}s")
+
+            try:
+                with open(report_path, encoding="utf-8") as f:
+                    report = json.load(f)
+            except (OSError, ValueError):
+                raise RuntimeError(f"retraining failed with exit code {proc.returncode}")
+        finally:
+            os.remove(report_path)
+
+        self.last_report = report
+        if report.get("accepted"):
+            await asyncio.to_thread(self.publish, self.candidate_path, report)
+        else:
+            print(f"⚠️ Retrained model rejected: {'; '.join(report.get('reasons', []))}")
+        return report
+
+    async def run_forever(self):
+        """Retrain every `interval` seconds until cancelled"""
+        while True:
+            await asyncio.sleep(self.interval)
+            print(f"🔁 Retraining personas ({datetime.now().isoformat(timespec='seconds')})")
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"❌ Retraining failed: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Standalone persona retraining scheduler")
+    parser.add_argument("--interval", type=float, default=float(os.getenv("ML_RETRAIN_INTERVAL", "86400")))
+    parser.add_argument("--database-url", default=os.getenv("ML_TRANSACTIONS_DB_URL", os.getenv("DATABASE_URL")))
+    parser.add_argument("--model-path", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--once", action="store_true", help="Run a single job and exit")
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("--database-url (or ML_TRANSACTIONS_DB_URL) is required")
+
+    os.chdir(SERVICE_DIR)
+    scheduler = RetrainScheduler(
+        args.interval,
+        args.database_url,
+        publish=lambda candidate, report: replace_model_file(candidate, args.model_path),
+        model_path=args.model_path,
+    )
+    if args.once:
+        print(json.dumps(asyncio.run(scheduler.run_once()), ensure_ascii=False))
+    else:
+        asyncio.run(scheduler.run_forever())
+
+
+if __name__ == "__main__":
+    main()
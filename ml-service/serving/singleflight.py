@@ -0,0 +1,88 @@
+"""
+Single-Flight Coalescing
+Concurrent identical requests share one computation
+
+The first request for a key starts the computation as its own task; requests
+with the same key that arrive before it finishes await that task instead of
+starting another. Errors reach every waiter. A waiter that is cancelled (for
+example a disconnected client) does not cancel the computation for the
+others; the computation is only cancelled once no waiter is left.
+"""
+
+import asyncio
+import hashlib
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+from monitoring.metrics import REGISTRY
+
+T = TypeVar("T")
+
+
+def fingerprint(*parts: bytes) -> str:
+    """Short digest identifying a request (e.g. path and raw body)"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(len(part).to_bytes(8, "little"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """In-flight deduplication of async computations by key"""
+
+    def __init__(self, name: str = "single_flight"):
+        """
+        Args:
+            name: Cache name in /metrics (hit = shared a running computation)
+        """
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._stats = REGISTRY.cache(name)
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run factory() once for all concurrent callers with the same key
+
+        Args:
+            key: Request fingerprint
+            factory: Creates the awaitable computing the result
+
+        Returns:
+            The shared result (exceptions are re-raised in every caller)
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            self._stats.miss()
+            task = asyncio.ensure_future(factory())
+            flight = self._flights[key] = _Flight(task)
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self._stats.hit()
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        flight = self._flights.get(key)
+        if flight is not None and flight.task is task:
+            del self._flights[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every waiter was cancelled
+            task.exception()
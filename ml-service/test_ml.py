@@ -1,17 +1,18 @@
 import sys
 import os
-sys.path.insert(0, '/Users/junochoi/Documents/University/1학년_2학기/cherry_tomato_ramen')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from ml-service.pipeline.data_loader import DataLoader
-from ml-service.pipeline.preprocessor import Preprocessor
+from pipeline.data_loader import DataLoader
+from pipeline.preprocessor import SpendingPreprocessor
 
 # Test data loading
-data_path = "ml-service/data/student_spending.csv"
+data_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "student_spending.csv")
 print(f"Checking if file exists: {os.path.exists(data_path)}")
 
 if os.path.exists(data_path):
     loader = DataLoader(data_path)
-    df = loader.load_data()
-    print(f"✅ Data loaded: {df.shape}")
+    df = loader.load_dataset()
+    df_eng = SpendingPreprocessor().engineer_features(df)
+    print(f"✅ Data loaded: {df.shape}, engineered: {df_eng.shape}")
 else:
     print(f"❌ File not found: {data_path}")
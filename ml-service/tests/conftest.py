@@ -0,0 +1,27 @@
+import os
+import sys
+
+SERVICE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, SERVICE_DIR)
+sys.path.insert(0, os.path.join(SERVICE_DIR, "scripts"))
+
+import pytest  # noqa: E402
+
+from pipeline.data_loader import DataLoader  # noqa: E402
+from pipeline.preprocessor import SpendingPreprocessor  # noqa: E402
+from models.clustering import SpendingClusterModel  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def fitted_models():
+    """Preprocessor and cluster model fitted the same way as on startup"""
+    loader = DataLoader(os.path.join(SERVICE_DIR, "data", "student_spending.csv"))
+    df = loader.load_dataset()
+    preprocessor = SpendingPreprocessor().fit_reference(df)
+    df_eng = preprocessor.engineer_features(df)
+    preprocessor.fit(df_eng)
+    cluster_model = SpendingClusterModel()
+    cluster_model.fit(preprocessor.prepare_for_clustering(df_eng))
+    cluster_model.feature_reference = preprocessor.reference
+    cluster_model.build_peer_index(preprocessor.prepare_for_clustering(df_eng))
+    return preprocessor, cluster_model
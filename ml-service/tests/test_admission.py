@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from serving.admission import AdmissionLimiter, AdmissionRejected
+
+
+def test_cost_is_estimated_from_payload_size():
+    limiter = AdmissionLimiter(capacity=4, queue_size=1, queue_timeout=1, bytes_per_unit=1000)
+
+    assert limiter.estimate_cost(10) == 1
+    assert limiter.estimate_cost(2500) == 3
+    assert limiter.estimate_cost(10**9) == 4
+    assert limiter.estimate_cost(None) == 4
+
+
+def test_queue_is_fifo_and_sheds_when_full():
+    async def scenario():
+        limiter = AdmissionLimiter(capacity=2, queue_size=2, queue_timeout=1)
+        order = []
+
+        async def run(name, cost, hold):
+            await limiter.acquire(cost)
+            order.append(name)
+            await asyncio.sleep(hold)
+            limiter.release(cost, hold)
+
+        running = asyncio.create_task(run("a", 2, 0.02))
+        await asyncio.sleep(0)
+        queued = [asyncio.create_task(run(name, cost, 0)) for name, cost in (("big", 2), ("small", 1))]
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await limiter.acquire(1)
+        await asyncio.gather(running, *queued)
+        return order, rejected.value, limiter.in_use, limiter.queued
+
+    order, rejected, in_use, queued = asyncio.run(scenario())
+
+    assert order == ["a", "big", "small"]
+    assert rejected.status_code == 429 and rejected.retry_after >= 1
+    assert in_use == 0 and queued == 0
+
+
+def test_queue_timeout_returns_503_and_frees_slot():
+    async def scenario():
+        limiter = AdmissionLimiter(capacity=1, queue_size=4, queue_timeout=0.01)
+        await limiter.acquire(1)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await limiter.acquire(1)
+        queued_after_timeout = limiter.queued
+        limiter.release(1)
+        waited = await limiter.acquire(1)
+        return rejected.value, queued_after_timeout, waited
+
+    rejected, queued, waited = asyncio.run(scenario())
+
+    assert rejected.status_code == 503 and rejected.reason == "queue_timeout"
+    assert queued == 0 and waited == 0.0
@@ -0,0 +1,151 @@
+import asyncio
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+
+from synthetic_data import DEFAULT_BUDGET, generate_user_transactions
+from pipeline.aggregates import (
+    AggregateStore, SpendMatrix, check_iso_dates, lock_checkpoint, month_key, shift_month,
+)
+from pipeline.data_loader import DataLoader
+from pipeline.insights import build_insights, build_insights_from_totals
+from models.anomaly import flag_transactions
+from models.coaching import analyze_spending_matrix, analyze_spending_patterns
+from models.forecast import project_month_end
+from models.peer_comparison import generate_peer_comparison_message, peer_comparison_from_totals
+from models.trend import TrendAnalyzer
+from models.overspending import OverspendingPredictor
+
+
+def test_deltas_upsert_update_and_soft_delete(tmp_path):
+    month = month_key(datetime.now())
+    store = AggregateStore()
+    store.apply("u1", [
+        {"id": "a", "date": f"{month}-01", "amount": 1000, "category": "food", "time_slot": "lunch"},
+        {"id": "b", "date": f"{month}-02", "amount": 500, "category": "transport"},
+    ])
+    # Update moves "a" to another category, soft delete removes "b"
+    summary = store.apply("u1", [
+        {"id": "a", "date": f"{month}-01", "amount": 1200, "category": "shopping"},
+        {"id": "b", "date": f"{month}-02", "amount": 500, "category": "transport", "is_deleted": True},
+        {"id": "c", "date": f"{shift_month(month, -1)}-15", "amount": 300, "category": "food"},
+    ])
+
+    assert summary == {"upserted": 2, "deleted": 1, "transactions": 2, "months": 2, "new_ids": ["c"]}
+    matrix = store.snapshot("u1")
+    assert matrix.category_totals() == {"food": 300, "shopping": 1200}
+    assert matrix.monthly_trend(3) == [0.0, 300.0, 1200.0]
+
+    path = str(tmp_path / "aggregates.json.gz")
+    store.save_checkpoint(path)
+    restored = AggregateStore()
+    assert restored.load_checkpoint(path) == 1
+    assert restored.snapshot("u1").cells == matrix.cells
+
+
+def test_bad_dates_reject_the_whole_batch_and_checkpoints_have_one_owner(tmp_path):
+    month = month_key(datetime.now())
+    store = AggregateStore()
+    with pytest.raises(ValueError):
+        store.apply("u1", [
+            {"id": "a", "date": f"{month}-01", "amount": 1000, "category": "food"},
+            {"id": "b", "date": "bad", "amount": 500, "category": "food"},
+        ])
+    assert store.snapshot("u1") is None
+
+    path = str(tmp_path / "aggregates.json.gz")
+    owner = lock_checkpoint(path)
+    assert owner is not None
+    assert lock_checkpoint(path) is None
+    owner.close()
+    assert lock_checkpoint(path) is not None
+
+
+def test_insights_from_aggregates_match_raw_transactions(fitted_models):
+    transactions = generate_user_transactions(400, seed=3, months=3)
+    preprocessor, cluster_model = fitted_models
+    loader = DataLoader()
+    models = (preprocessor, cluster_model, TrendAnalyzer(), OverspendingPredictor())
+
+    matrix = SpendMatrix.from_transactions(transactions)
+    assert matrix.category_totals() == loader.get_category_totals(transactions)
+    assert matrix.monthly_trend(3) == loader.get_monthly_trend(transactions, 3)
+
+    raw = build_insights(transactions, DEFAULT_BUDGET, loader, *models)
+    # Anomalies and month-end projections need the raw rows; pass them through
+    month_end = project_month_end(
+        [t["date"] for t in transactions],
+        [t["category"] for t in transactions],
+        [t["amount"] for t in transactions],
+    )
+    aggregated = build_insights_from_totals(
+        matrix.category_totals(), matrix.monthly_trend(3), DEFAULT_BUDGET, loader, *models,
+        anomalies=flag_transactions(transactions), month_end=month_end,
+    )
+    assert aggregated == raw
+
+
+def _cells(transactions):
+    """Cells as produced by the user_spend_cells view"""
+    df = pd.DataFrame(transactions)
+    df["month"] = df["date"].str[:7]
+    grouped = df.groupby(["month", "category", "time_slot"], dropna=False)["amount"].agg(["sum", "count"])
+    return [
+        {"month": m, "category": c, "time_slot": None if pd.isna(s) else s, "amount": a, "count": n}
+        for (m, c, s), (a, n) in grouped.iterrows()
+    ]
+
+
+def test_coaching_and_peer_comparison_from_cells_match_raw_transactions():
+    transactions = generate_user_transactions(300, seed=5, months=2)
+    for t in transactions[::7]:
+        t["time_slot"] = None
+    df = pd.DataFrame(transactions)[["date", "amount", "category", "time_slot"]]
+    matrix = SpendMatrix.from_cells(_cells(transactions))
+
+    assert analyze_spending_matrix(matrix) == analyze_spending_patterns(df)
+
+    volatile = ("id", "generated_at")
+    raw = generate_peer_comparison_message("u1", 2003, df).to_dict()
+    aggregated = peer_comparison_from_totals("u1", 2003, matrix.category_totals()).to_dict()
+    assert {k: v for k, v in aggregated.items() if k not in volatile} == {
+        k: v for k, v in raw.items() if k not in volatile
+    }
+
+
+def test_ingest_endpoints_require_the_api_key(monkeypatch):
+    import main
+
+    monkeypatch.delenv("ML_API_SECRET_KEY", raising=False)
+    calls = [
+        lambda key: main.ingest_transactions(main.IngestRequest(user_id="u1"), x_api_key=key),
+        lambda key: main.generate_insights_from_aggregates(
+            main.IngestedInsightRequest(user_id="u1"), x_api_key=key
+        ),
+    ]
+    for call in calls:
+        for key in (None, "wrong"):
+            with pytest.raises(HTTPException) as e:
+                asyncio.run(call(key))
+            assert e.value.status_code == 401
+
+
+@pytest.mark.parametrize("value", ["2024/01/05", "2024-02-30", "2024-01", "05-01-2024", None])
+def test_non_iso_dates_are_rejected_at_the_boundary(value):
+    import main
+
+    check_iso_dates(["2024-01-05", "2024-01-05T09:30:00", datetime(2024, 1, 5)])
+    with pytest.raises(ValueError, match="invalid date"):
+        check_iso_dates(["2024-01-05", value])
+
+    if value is None:
+        return
+    transactions = [
+        {"date": d, "amount": 1000.0, "category": "food", "description": ""} for d in ("2024-01-05", value)
+    ]
+    request = main.InsightRequest(user_id="u1", transactions=transactions, current_month_budget={})
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(main.generate_insights(request, None))
+    assert e.value.status_code == 400
@@ -0,0 +1,121 @@
+import math
+
+import numpy as np
+
+from models.anomaly import (
+    ANOMALY_Z_THRESHOLD,
+    MIN_HISTORY,
+    AnomalyDetector,
+    anomaly_insight,
+    flag_transactions,
+    score_transaction_history,
+)
+
+
+def _history(rng, n=30):
+    transactions = [
+        {"date": f"2024-03-{i % 28 + 1:02d}", "amount": float(rng.normal(9000, 1500)), "category": "food"}
+        for i in range(n)
+    ]
+    transactions += [
+        {"date": f"2024-03-{i % 28 + 1:02d}", "amount": float(rng.normal(60000, 8000)), "category": "shopping"}
+        for i in range(n)
+    ]
+    return transactions
+
+
+def test_history_scoring_flags_outlier_only():
+    rng = np.random.default_rng(0)
+    transactions = _history(rng)
+    transactions.append({"date": "2024-03-29", "amount": 180000.0, "category": "food"})
+
+    anomalies = flag_transactions(transactions)
+    assert len(anomalies) == 1
+    assert anomalies[0]["amount"] == 180000.0
+    assert 7000 < anomalies[0]["typical_amount"] < 11000
+
+    insight = anomaly_insight(anomalies[0])
+    assert insight["type"] == "transaction_anomaly"
+    assert insight["category"] == "food"
+    assert insight["potential_savings"] > 160000
+
+
+def test_identical_prices_keep_a_positive_scale():
+    scores = score_transaction_history(
+        np.full(MIN_HISTORY + 2, 4500.0), ["transport"] * (MIN_HISTORY + 2)
+    )
+    assert np.isfinite(scores["z"]).all()
+    assert not scores["flagged"].any()
+
+
+def test_merchant_baseline_preferred_over_category():
+    # Cheap coffee and regular expensive dinners share the food category;
+    # a 60,000 charge at the café is only unusual for the café
+    amounts = [4500.0] * 12 + [70000.0] * 12 + [60000.0]
+    merchants = ["카페"] * 12 + ["레스토랑"] * 12 + ["카페"]
+    scores = score_transaction_history(amounts, ["food"] * len(amounts), merchants)
+    assert scores["flagged"][-1]
+    assert scores["flagged"].sum() == 1
+
+    without_merchants = score_transaction_history(amounts, ["food"] * len(amounts))
+    assert not without_merchants["flagged"][-1]
+
+
+def test_incremental_detector_warms_up_and_resists_outliers():
+    rng = np.random.default_rng(1)
+    detector = AnomalyDetector()
+    for t in _history(rng)[:MIN_HISTORY - 1]:
+        z, _ = detector.observe("u1", t["category"], t["amount"])
+        assert z == 0.0  # Not scored while warming up
+
+    for t in _history(rng):
+        detector.observe("u1", t["category"], t["amount"])
+
+    anomalies = detector.observe_batch("u1", [{"date": "2024-04-01", "amount": 200000.0, "category": "food"}])
+    assert len(anomalies) == 1 and anomalies[0]["z_score"] > ANOMALY_Z_THRESHOLD
+
+    # A single outlier barely moves the baseline
+    z, typical = detector.observe("u1", "food", 9000.0)
+    assert abs(z) < 1.5
+    assert 7000 < typical < 11000
+
+
+def test_detector_evicts_least_recent_users():
+    detector = AnomalyDetector(max_users=2)
+    for user_id in ("a", "b", "a", "c"):
+        detector.observe(user_id, "food", 5000.0)
+    assert len(detector) == 2
+    assert "b" not in detector._users
+
+
+def test_detector_canonicalizes_categories_and_caps_merchants():
+    detector = AnomalyDetector(max_merchants=2)
+    for merchant in ("m1", "m2", "m1", "m3"):
+        detector.observe("u1", "no-such-category", 5000.0, merchant)
+    baselines = detector._users["u1"]
+    assert list(baselines) == [("category", "other"), ("merchant", "m1"), ("merchant", "m3")]
+    # Purchases at dropped merchants still count towards the category baseline
+    assert baselines[("category", "other")].count == 4
+
+    anomalies = detector.observe_batch("u1", [{"amount": 1000.0, "category": "unknown"}])
+    assert anomalies == []
+    assert baselines[("category", "other")].count == 5
+
+
+def test_detector_checkpoint_restores_baselines(tmp_path):
+    rng = np.random.default_rng(2)
+    detector = AnomalyDetector()
+    for t in _history(rng):
+        detector.observe("u1", t["category"], t["amount"])
+    detector.observe("u2", "food", 5000.0)  # Still warming up
+    assert detector.dirty
+
+    path = str(tmp_path / "baselines.json.gz")
+    detector.save_checkpoint(path)
+    assert not detector.dirty
+    restored = AnomalyDetector(max_users=2)
+    assert restored.load_checkpoint(path) == 2
+
+    outlier = [{"date": "2024-04-01", "amount": 200000.0, "category": "food"}]
+    assert restored.observe_batch("u1", outlier) == detector.observe_batch("u1", outlier)
+    assert restored._users["u2"][("category", "food")].to_list() == [1, 0.0, 0.1, [math.log1p(5000.0)]]
@@ -0,0 +1,73 @@
+import csv
+import json
+import os
+
+import pandas as pd
+
+import batch_score
+from synthetic_data import DEFAULT_BUDGET, generate_user_transactions
+
+
+def _export(tmp_path, n_users=5):
+    rows = []
+    for i in range(n_users):
+        for t in generate_user_transactions(120, seed=i, months=3):
+            rows.append({"user_id": f"user-{i}", "birth_year": 2002, **t})
+    rows[0]["is_deleted"] = True
+    path = tmp_path / "transactions.csv"
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+    budgets = tmp_path / "budgets.csv"
+    pd.DataFrame(
+        [{"user_id": "user-0", "category": c, "amount": a} for c, a in DEFAULT_BUDGET.items()]
+    ).to_csv(budgets, index=False)
+    return str(path), str(budgets)
+
+
+def _read(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def test_scores_every_user_and_resumes(tmp_path, fitted_models):
+    _, cluster_model = fitted_models
+    model_path = str(tmp_path / "model.joblib")
+    cluster_model.save(model_path)
+    export, budgets = _export(tmp_path)
+    out = str(tmp_path / "out")
+
+    summary = batch_score.run_batch(export, out, budgets, model_path, workers=1, users_per_task=2)
+    assert summary["users"] == 5 and summary["failed_users"] == 0
+
+    insights = _read(os.path.join(out, "ai_insights.csv"))
+    logs = _read(os.path.join(out, "coaching_logs.csv"))
+    assert {row["user_id"] for row in insights} == {f"user-{i}" for i in range(5)}
+    assert all(row["category"] in batch_score.AI_INSIGHT_CATEGORIES | {""} for row in insights)
+    assert json.loads(insights[0]["metadata"])["spending_persona"]["persona_name"]
+    # One coaching message and one peer comparison per user
+    assert sorted(row["message_type"] for row in logs) == ["coaching"] * 5 + ["peer_comparison"] * 5
+
+    # Only the task whose marker is missing is scored again
+    os.remove(os.path.join(out, "parts", "000001.done"))
+    resumed = batch_score.run_batch(export, out, budgets, model_path, workers=1, users_per_task=2)
+    assert resumed["scored_this_run"] == 2 and resumed["resumed_users"] == 3
+    rescored = _read(os.path.join(out, "ai_insights.csv"))
+    assert [{**row, "expires_at": None} for row in rescored] == [{**row, "expires_at": None} for row in insights]
+
+
+def test_rejects_a_different_run_in_the_output_dir(tmp_path, fitted_models):
+    _, cluster_model = fitted_models
+    model_path = str(tmp_path / "model.joblib")
+    cluster_model.save(model_path)
+    export, _ = _export(tmp_path, n_users=2)
+    out = str(tmp_path / "out")
+
+    batch_score.run_batch(export, out, model_path=model_path, users_per_task=2)
+    try:
+        batch_score.run_batch(export, out, model_path=model_path, users_per_task=1)
+    except RuntimeError as e:
+        assert "--restart" in str(e)
+    else:
+        raise AssertionError("expected a RuntimeError")
+    summary = batch_score.run_batch(export, out, model_path=model_path, users_per_task=1, restart=True)
+    assert summary["scored_this_run"] == 2
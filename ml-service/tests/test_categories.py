@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from synthetic_data import generate_user_transactions
+from pipeline.categories import (
+    APP_CATEGORIES,
+    APP_TO_DATASET,
+    DATASET_SPENDING_COLUMNS,
+    SMALL_INPUT_ROWS,
+    CategoryRegistry,
+)
+from pipeline.data_loader import DataLoader
+
+
+def test_codes_are_stable_and_unknown_names_count_as_other():
+    registry = CategoryRegistry()
+
+    assert [registry.code(name) for name in APP_CATEGORIES] == list(range(len(APP_CATEGORIES)))
+    assert registry.code("pets") == registry.code("other")
+    assert registry.canonical("pets") == "other" and registry.canonical("cafe") == "cafe"
+    assert registry.label("food") == "식비" and registry.label("pets") == "pets"
+
+    codes = registry.encode(pd.Series(["cafe", None, "pets", "cafe"]))
+    assert codes.tolist() == [registry.code("cafe"), registry.code("other"), registry.code("other"), registry.code("cafe")]
+    # Client input never grows the registry
+    registry.encode([f"unknown-{i}" for i in range(100)])
+    assert len(registry) == len(APP_CATEGORIES) and registry.names == list(APP_CATEGORIES)
+
+
+def test_totals_match_string_aggregation():
+    registry = CategoryRegistry()
+    transactions = generate_user_transactions(3000, seed=5, months=3)
+    transactions.append({"date": "2025-01-01", "amount": 1234.0, "category": "pets"})
+
+    expected = {}
+    for t in transactions:
+        category = t["category"] if t["category"] in APP_CATEGORIES else "other"
+        expected[category] = expected.get(category, 0) + t["amount"]
+
+    codes = registry.encode([t["category"] for t in transactions])
+    totals = registry.totals(codes, np.array([t["amount"] for t in transactions]))
+
+    assert list(totals) == sorted(expected)
+    assert totals == {name: float(amount) for name, amount in expected.items()}
+    assert DataLoader().get_category_totals(transactions) == totals
+
+    # The dict loop for short inputs gives the same totals as the code path
+    for n in (10, SMALL_INPUT_ROWS):
+        rows = transactions[-n:]
+        expected_n = registry.totals(registry.encode([t["category"] for t in rows]), [t["amount"] for t in rows])
+        assert registry.column_totals([t["category"] for t in rows], [t["amount"] for t in rows]) == expected_n
+
+
+def test_dataset_totals_fold_app_categories():
+    registry = CategoryRegistry()
+    totals = {"food": 100.0, "delivery": 10.0, "transport": 20.0, "shopping": 5.0, "pets": 1.0}
+
+    expected = dict.fromkeys(DATASET_SPENDING_COLUMNS, 0.0)
+    for category, amount in totals.items():
+        expected[APP_TO_DATASET.get(category, "miscellaneous")] += amount
+
+    folded = registry.dataset_totals(totals)
+    assert dict(zip(DATASET_SPENDING_COLUMNS, folded.tolist())) == expected
+    assert registry.dataset_codes_of(["food", "pets"]).tolist() == [0, DATASET_SPENDING_COLUMNS.index("miscellaneous")]
@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from synthetic_data import generate_user_transactions
+from pipeline.aggregates import SpendMatrix
+from pipeline.columnar import ColumnarError, parse_arrow_stream, parse_columnar_json
+from pipeline.data_loader import DataLoader
+
+REQUIRED = ["date", "amount", "category"]
+FIELDS = ("date", "amount", "category", "description", "time_slot")
+
+
+def _columnar_body(transactions, **fields):
+    columns = {name: [t[name] for t in transactions] for name in FIELDS}
+    return json.dumps({**fields, "transactions": columns}).encode()
+
+
+def test_columnar_json_matches_row_aggregates():
+    transactions = generate_user_transactions(2000, seed=11, months=3)
+    fields, df = parse_columnar_json(_columnar_body(transactions, user_id="u1"), REQUIRED)
+
+    assert fields == {"user_id": "u1"}
+    assert df["amount"].dtype == "float64" and len(df) == len(transactions)
+
+    loader = DataLoader()
+    matrix = SpendMatrix.from_frame(df)
+    assert matrix.category_totals() == loader.get_category_totals(transactions)
+    assert matrix.monthly_trend(3) == loader.get_monthly_trend(transactions, 3)
+    assert matrix.cells == SpendMatrix.from_transactions(transactions).cells
+
+
+@pytest.mark.parametrize("columns, message", [
+    ({"date": ["2025-01-01"], "amount": [1.0]}, "missing columns: category"),
+    ({"date": ["2025-01-01"], "amount": ["x"], "category": ["food"]}, "must contain numbers"),
+    ({"date": ["2025-01-01"], "amount": [1.0, 2.0], "category": ["food"]}, "has 2 values, expected 1"),
+    ({"date": ["2025-01-01"], "amount": [1.0], "category": [None]}, "must contain strings"),
+    ({"date": ["nope"], "amount": [1.0], "category": ["food"]}, "must contain ISO dates"),
+    ({"date": ["2025-13-01"], "amount": [1.0], "category": ["food"]}, "must contain ISO dates"),
+    ({"date": ["2025-01"], "amount": [1.0], "category": ["food"]}, "must contain ISO dates"),
+])
+def test_columnar_json_rejects_invalid_columns(columns, message):
+    body = json.dumps({"user_id": "u1", "transactions": columns}).encode()
+    with pytest.raises(ColumnarError, match=message):
+        parse_columnar_json(body, REQUIRED)
+
+
+def test_arrow_stream_matches_columnar_json():
+    pa = pytest.importorskip("pyarrow")
+    transactions = generate_user_transactions(500, seed=12, months=3)
+    table = pa.table({name: [t[name] for t in transactions] for name in FIELDS})
+    table = table.replace_schema_metadata({"request": json.dumps({"user_id": "u1"})})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+    fields, df = parse_arrow_stream(sink.getvalue().to_pybytes(), REQUIRED)
+    _, expected = parse_columnar_json(_columnar_body(transactions, user_id="u1"), REQUIRED)
+
+    assert fields == {"user_id": "u1"}
+    assert df.equals(expected)
@@ -0,0 +1,101 @@
+import asyncio
+import json
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+import main
+from synthetic_data import DEFAULT_BUDGET, generate_user_transactions
+from main import DashboardRequest, DashboardResponse
+from monitoring.profiling import REQUEST_TIMINGS
+from models.coaching import analyze_spending_matrix, generate_coaching_message
+from models.overspending import OverspendingPredictor
+from models.peer_comparison import generate_peer_comparison_message
+from models.registry import ModelRegistry
+from models.trend import TrendAnalyzer
+from pipeline.data_loader import DataLoader
+from pipeline.insights import build_insights
+
+VOLATILE = ("id", "generated_at")
+
+
+def _stable(message):
+    return {k: v for k, v in message.items() if k not in VOLATILE}
+
+
+def test_dashboard_matches_the_separate_endpoints(fitted_models, monkeypatch):
+    preprocessor, cluster_model = fitted_models
+    registry = ModelRegistry()
+    registry.publish(preprocessor, cluster_model, TrendAnalyzer(), OverspendingPredictor())
+    monkeypatch.setattr(main, "MODEL_REGISTRY", registry)
+    monkeypatch.setattr(main, "data_loader", DataLoader())
+
+    transactions = generate_user_transactions(400, seed=4, months=3)
+    request = DashboardRequest(
+        user_id="u1", transactions=transactions, current_month_budget=DEFAULT_BUDGET, birth_year=2003
+    )
+    df = pd.DataFrame(transactions)[main.DASHBOARD_COLUMNS]
+    body = asyncio.run(main._dashboard_response(request, df)).body
+    parsed = DashboardResponse.model_validate_json(body)
+    result = json.loads(body)
+
+    insights = build_insights(
+        transactions, DEFAULT_BUDGET, DataLoader(), preprocessor, cluster_model,
+        TrendAnalyzer(), OverspendingPredictor(),
+    )
+    assert result["insights"] == json.loads(main.NumpyJSONResponse({"user_id": "u1", **insights}).body)
+    assert parsed.insights.persona is not None
+
+    coaching = generate_coaching_message(df[["date", "amount", "category", "time_slot"]], "u1").to_dict()
+    assert _stable(result["coaching"]) == _stable(coaching)
+
+    period = datetime.now().strftime("%Y-%m")
+    current = df[df["date"].str[:7] == period]
+    comparison = generate_peer_comparison_message("u1", 2003, current, period=period).to_dict()
+    assert _stable(result["peer_comparison"]) == _stable(comparison)
+
+    # Without a birth year the peer comparison is skipped
+    request.birth_year = None
+    assert json.loads(asyncio.run(main._dashboard_response(request, df)).body)["peer_comparison"] is None
+
+
+def test_profiled_dashboard_runs_stages_on_the_calling_thread(fitted_models, monkeypatch):
+    preprocessor, cluster_model = fitted_models
+    registry = ModelRegistry()
+    registry.publish(preprocessor, cluster_model, TrendAnalyzer(), OverspendingPredictor())
+    monkeypatch.setattr(main, "MODEL_REGISTRY", registry)
+    monkeypatch.setattr(main, "data_loader", DataLoader())
+
+    calls = []
+
+    def analyze(matrix, now=None):
+        calls.append((threading.get_ident(), now))
+        return analyze_spending_matrix(matrix, now)
+
+    monkeypatch.setattr(main, "analyze_spending_matrix", analyze)
+
+    transactions = generate_user_transactions(200, seed=5, months=2)
+    request = DashboardRequest(
+        user_id="u1", transactions=transactions, current_month_budget=DEFAULT_BUDGET, birth_year=2003
+    )
+    df = pd.DataFrame(transactions)[main.DASHBOARD_COLUMNS]
+
+    async def profiled():
+        timings = []
+        token = REQUEST_TIMINGS.set(timings)
+        try:
+            return (await main._dashboard_response(request, df)).body, timings
+        finally:
+            REQUEST_TIMINGS.reset(token)
+
+    body, timings = asyncio.run(profiled())
+    # Coaching got the pinned clock and ran where cProfile is enabled
+    assert calls[0][0] == threading.get_ident() and calls[0][1] is not None
+    assert {"aggregate", "coaching", "peer_comparison"} <= {stage for stage, _ in timings}
+
+    result = json.loads(body)
+    expected = json.loads(asyncio.run(main._dashboard_response(request, df)).body)
+    assert calls[1][0] != threading.get_ident()
+    assert result["insights"] == expected["insights"]
+    assert _stable(result["coaching"]) == _stable(expected["coaching"])
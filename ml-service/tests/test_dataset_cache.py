@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from pipeline.dataset_cache import load_cache, load_dataset_cached
+
+
+def _write_csv(path, food=(100, 200, 300)):
+    pd.DataFrame(
+        {
+            "Unnamed: 0": range(len(food)),
+            "age": [20, 21, 22],
+            "gender": ["Male", "Female", "Male"],
+            "food": list(food),
+        }
+    ).to_csv(path, index=False)
+
+
+def test_cache_matches_csv_and_is_memory_mapped(tmp_path):
+    csv_path = tmp_path / "spending.csv"
+    _write_csv(csv_path)
+
+    df = load_dataset_cached(str(csv_path), str(tmp_path / "cache"))
+
+    assert list(df.columns) == ["age", "gender", "food"]
+    assert df["food"].dtype == np.float32
+    assert list(df["gender"]) == ["Male", "Female", "Male"]
+    np.testing.assert_array_equal(df["food"].to_numpy(), [100, 200, 300])
+
+    base = df["food"].to_numpy()
+    while getattr(base, "base", None) is not None:
+        base = base.base
+    assert not isinstance(base, np.ndarray)  # backed by the mapped file
+
+
+def test_cache_is_invalidated_when_csv_changes(tmp_path):
+    csv_path = tmp_path / "spending.csv"
+    cache_dir = str(tmp_path / "cache")
+    _write_csv(csv_path)
+    load_dataset_cached(str(csv_path), cache_dir)
+
+    _write_csv(csv_path, food=(1, 2, 3))
+    assert load_cache(str(csv_path), cache_dir) is None
+
+    df = load_dataset_cached(str(csv_path), cache_dir)
+    np.testing.assert_array_equal(df["food"].to_numpy(), [1, 2, 3])
@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from synthetic_data import generate_user_transactions
+from pipeline.data_loader import DataLoader
+from pipeline.feature_kernel import HIGH_COLUMNS, ReferenceStats
+from pipeline.preprocessor import SpendingPreprocessor
+
+DATASET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "student_spending.csv")
+
+
+def _user_rows(n_users):
+    loader = DataLoader()
+    return pd.concat(
+        [
+            loader.convert_user_transactions_to_features(generate_user_transactions(200, seed=seed, months=1))
+            for seed in range(n_users)
+        ],
+        ignore_index=True,
+    )
+
+
+def test_single_user_rows_match_batch_rows(fitted_models):
+    preprocessor, _ = fitted_models
+    batch = _user_rows(6)
+
+    batch_eng = preprocessor.engineer_features(batch)
+    single_eng = pd.concat(
+        [preprocessor.engineer_features(batch.iloc[[i]]) for i in range(len(batch))]
+    )
+
+    pd.testing.assert_frame_equal(batch_eng, single_eng)
+    np.testing.assert_array_equal(
+        preprocessor.prepare_for_clustering(batch_eng), preprocessor.prepare_for_clustering(single_eng)
+    )
+    # Flags come from the training data, not from the 1-row frame
+    assert single_eng[HIGH_COLUMNS].to_numpy().any()
+
+
+def test_kernel_matches_column_by_column_features():
+    df = DataLoader(DATASET_PATH, use_cache=False).load_dataset().head(500)
+    eng = SpendingPreprocessor().fit_reference(df).engineer_features(df)
+
+    spend = df[["food", "transportation", "books_supplies", "entertainment",
+                "personal_care", "technology", "health_wellness", "miscellaneous"]]
+    total = spend.sum(axis=1)
+    np.testing.assert_allclose(eng["total_spending"], total)
+    np.testing.assert_allclose(eng["food_ratio"], df["food"] / (total + 1) * 100)
+    np.testing.assert_allclose(eng["discretionary_spending"], df["entertainment"] + df["miscellaneous"])
+    np.testing.assert_allclose(eng["spending_ratio"], total / (df["monthly_income"] + 1) * 100)
+    expected_high = (df["food"] > df["food"].mean() + df["food"].std()).astype(int)
+    assert (eng["food_high"] == expected_high).all()
+
+
+def test_reference_stats_round_trip():
+    stats = ReferenceStats.from_spend(np.arange(24, dtype=float).reshape(3, 8))
+    assert ReferenceStats.from_dict(stats.to_dict()) == stats
+    assert ReferenceStats.from_dict({"columns": ["food"], "mean": [1], "std": [1]}) is None
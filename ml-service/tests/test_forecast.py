@@ -0,0 +1,104 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+from models.forecast import (
+    daily_category_matrix,
+    forecast_month_end,
+    forecast_series,
+    next_month_forecast,
+    project_month_end,
+)
+from models.overspending import OverspendingPredictor
+
+
+def test_batched_series_match_single_fits():
+    rng = np.random.default_rng(0)
+    series = rng.gamma(5, 200000, size=(50, 6))
+    batch = forecast_series(series, horizon=3)
+    for i in (0, 17, 49):
+        single = forecast_series(series[i:i + 1], horizon=3)
+        for key in ("point", "lower", "upper"):
+            np.testing.assert_allclose(batch[key][i], single[key][0])
+
+    assert (batch["lower"] <= batch["point"]).all() and (batch["point"] <= batch["upper"]).all()
+    # Intervals widen with the horizon
+    assert (np.diff(batch["upper"] - batch["point"], axis=1) >= -1e-6).all()
+
+
+def test_trend_is_continued_and_damped():
+    forecast = forecast_series(np.array([[100.0, 200.0, 300.0, 400.0, 500.0]]), horizon=2)
+    assert 500 < forecast["point"][0, 0] < 600
+    assert forecast["point"][0, 1] > forecast["point"][0, 0]
+
+
+def test_month_end_follows_weekday_profile():
+    today = date(2024, 3, 13)  # Wednesday; 18 days left, including 3 Saturdays
+    days = 56
+    first = today - timedelta(days=days - 1)
+    saturdays = np.array([(first + timedelta(days=i)).weekday() == 5 for i in range(days)])
+    daily = np.vstack([np.full(days, 10000.0), np.where(saturdays, 70000.0, 0.0)])
+
+    result = forecast_month_end(daily, today)
+    np.testing.assert_allclose(result["spent"], [130000.0, 140000.0])
+    np.testing.assert_allclose(result["projected_total"], [130000.0 + 18 * 10000, 140000.0 + 3 * 70000], rtol=1e-6)
+    # Noise-free series have (near) zero-width intervals
+    np.testing.assert_allclose(result["lower"], result["upper"], rtol=1e-6)
+
+
+def test_project_month_end_from_transactions():
+    today = date(2024, 3, 31)
+    transactions = [
+        (str(today - timedelta(days=i)), "food" if i % 2 else "transport", 5000.0)
+        for i in range(70)
+    ]
+    names, matrix = daily_category_matrix(*zip(*transactions), today=today, days=56)
+    assert names == ["food", "transport"] and matrix.shape == (2, 56)
+    assert matrix.sum() == 56 * 5000.0
+
+    # Last day of the month: nothing left to project
+    month_end = project_month_end(*zip(*transactions), today=today)
+    assert month_end["total"]["projected_total"] == month_end["total"]["spent"] == 31 * 5000.0
+
+    forecast = next_month_forecast([155000.0, 145000.0, 155000.0], month_end, today=today)
+    assert forecast["lower"] <= forecast["prediction"] <= forecast["upper"]
+    assert next_month_forecast([0.0, 0.0, 1000.0]) is None
+
+
+def test_overspending_uses_projections():
+    predictor = OverspendingPredictor()
+    projections = {"food": {"projected_total": 400000.0, "lower": 350000.0, "upper": 450000.0}}
+    result = predictor.predict_overspending_risk(
+        {"food": 200000, "transport": 50000},
+        {"food": 300000, "transport": 100000},
+        days_remaining=15,
+        projections=projections,
+    )
+    food, transport = result["category_risks"]["food"], result["category_risks"]["transport"]
+    assert food["projected_total"] == 400000.0 and food["projected_over"] == 100000.0
+    assert (food["projected_lower"], food["projected_upper"]) == (350000.0, 450000.0)
+    # No projection: average daily rate, no interval
+    assert transport["projected_total"] == 50000 / 15 * 30
+    assert transport["projected_lower"] is None
+
+
+def test_insights_compare_current_month_spend_with_its_projection():
+    from synthetic_data import DEFAULT_BUDGET, generate_user_transactions
+    from models.trend import TrendAnalyzer
+    from pipeline.data_loader import DataLoader
+    from pipeline.insights import build_insights
+    from pipeline.preprocessor import SpendingPreprocessor
+
+    transactions = generate_user_transactions(600, seed=3, months=3)
+    month_end = project_month_end(
+        [t["date"] for t in transactions], [t["category"] for t in transactions], [t["amount"] for t in transactions]
+    )
+    result = build_insights(
+        transactions, DEFAULT_BUDGET, DataLoader(), SpendingPreprocessor(), None,
+        TrendAnalyzer(), OverspendingPredictor(),
+    )
+    for category, risk in result["overspending_risks"]["category_risks"].items():
+        projection = month_end["categories"].get(category)
+        assert risk["spent"] == (projection["spent"] if projection else 0)
+        assert risk["projected_total"] >= risk["spent"]
+        assert risk["spent_percentage"] == risk["spent"] / risk["budget"] * 100
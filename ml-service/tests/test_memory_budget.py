@@ -0,0 +1,41 @@
+import pytest
+
+from synthetic_data import DEFAULT_BUDGET, generate_user_transactions
+from monitoring.memory import (
+    REFERENCE_SIZE,
+    STAGE_BUDGETS_MB,
+    check_budgets,
+    measure_peak,
+    profile_pipeline_memory,
+)
+
+
+@pytest.mark.parametrize("n_transactions", [100, REFERENCE_SIZE])
+def test_pipeline_stages_within_memory_budget(fitted_models, n_transactions):
+    preprocessor, cluster_model = fitted_models
+    transactions = generate_user_transactions(n_transactions, seed=7)
+
+    peaks = profile_pipeline_memory(
+        transactions, DEFAULT_BUDGET, cluster_model=cluster_model, preprocessor=preprocessor
+    )
+
+    assert set(peaks) == set(STAGE_BUDGETS_MB)
+    exceeded = check_budgets(peaks, n_transactions)
+    assert not exceeded, "Stages over memory budget (peak MiB, budget MiB): " + ", ".join(
+        f"{stage}={peak:.2f}/{budget:.2f}" for stage, (peak, budget) in exceeded.items()
+    )
+
+
+def test_measure_peak_reports_allocation():
+    result, peak = measure_peak(lambda: bytearray(4 * 1024 * 1024))
+
+    assert len(result) == 4 * 1024 * 1024
+    assert peak >= 4 * 1024 * 1024
+
+
+def test_check_budgets_flags_and_scales():
+    peaks = {"persona": 2 * 1024 * 1024, "monthly_trend": 6 * 1024 * 1024}
+
+    assert set(check_budgets(peaks, REFERENCE_SIZE)) == {"persona", "monthly_trend"}
+    # Budgets scale with payload size above the reference size
+    assert set(check_budgets(peaks, REFERENCE_SIZE * 10)) == set()
@@ -0,0 +1,91 @@
+from monitoring.metrics import MetricsRegistry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    latency = registry.histogram("test_latency_seconds", "Test latency", ("stage",), buckets=(0.1, 1.0))
+
+    latency.observe(0.05, "persona")
+    latency.observe(0.5, "persona")
+    latency.observe(5.0, "persona")
+
+    text = registry.render()
+    assert 'test_latency_seconds_bucket{stage="persona",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{stage="persona",le="1"} 2' in text
+    assert 'test_latency_seconds_bucket{stage="persona",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count{stage="persona"} 3' in text
+    assert "# TYPE test_latency_seconds histogram" in text
+
+
+def test_counter_and_cache_hit_ratio():
+    registry = MetricsRegistry()
+    requests = registry.counter("test_requests_total", "Test requests", ("endpoint", "status"))
+    requests.inc("/predict/insights", "200")
+    requests.inc("/predict/insights", "200")
+
+    cache = registry.cache("cohort_stats")
+    cache.miss()
+    cache.hit()
+    cache.hit()
+    cache.hit()
+
+    text = registry.render()
+    assert 'test_requests_total{endpoint="/predict/insights",status="200"} 2' in text
+    assert 'ml_cache_requests_total{cache="cohort_stats",result="hit"} 3' in text
+    assert 'ml_cache_hit_ratio{cache="cohort_stats"} 0.75' in text
+
+
+def test_stage_timer_records_into_active_request_profile():
+    from monitoring.metrics import stage_timer
+    from monitoring.profiling import REQUEST_TIMINGS, format_server_timing
+
+    timings = []
+    token = REQUEST_TIMINGS.set(timings)
+    try:
+        with stage_timer("/predict/insights", "persona"):
+            pass
+        with stage_timer("/predict/insights", "persona"):
+            pass
+    finally:
+        REQUEST_TIMINGS.reset(token)
+
+    with stage_timer("/predict/insights", "trend"):
+        pass
+
+    assert [stage for stage, _ in timings] == ["persona", "persona"]
+    header = format_server_timing(timings, total=0.5)
+    assert header.startswith("persona;dur=")
+    assert header.endswith("total;dur=500.00")
+
+
+def test_cprofile_covers_only_synchronous_stage_bodies():
+    import pstats
+
+    from monitoring.metrics import stage_timer
+    from monitoring.profiling import REQUEST_PROFILE, StageProfile
+
+    def profiled_work():
+        return sum(range(100))
+
+    def awaited_work():
+        return sum(range(100))
+
+    def unstaged_work():
+        return sum(range(100))
+
+    profile = StageProfile()
+    token = REQUEST_PROFILE.set(profile)
+    try:
+        with stage_timer("/predict/insights", "persona"):
+            with stage_timer("/predict/insights", "trend"):
+                profiled_work()
+            profiled_work()  # Still inside the outer stage
+        with stage_timer("/predict/insights", "fetch", profile=False):
+            awaited_work()
+        unstaged_work()
+    finally:
+        REQUEST_PROFILE.reset(token)
+
+    calls = {func[2]: stats[1] for func, stats in pstats.Stats(profile.profiler).stats.items()}
+    assert calls["profiled_work"] == 2
+    assert "awaited_work" not in calls and "unstaged_work" not in calls
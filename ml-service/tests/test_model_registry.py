@@ -0,0 +1,25 @@
+import dataclasses
+
+import pytest
+
+from models.registry import ModelRegistry
+
+
+def test_publish_swaps_bundle_without_touching_pinned_snapshot(fitted_models):
+    preprocessor, cluster_model = fitted_models
+    registry = ModelRegistry(history_size=2)
+
+    first = registry.publish(preprocessor, None, "trend", "overspending", source="init")
+    pinned = registry.current()
+    second = registry.publish(preprocessor, cluster_model, "trend", "overspending", source="reload")
+
+    assert pinned is first and pinned.cluster_model is None
+    assert registry.current() is second
+    assert (first.version, second.version) == (1, 2)
+    assert second.models_loaded and not first.models_loaded
+
+    registry.publish(preprocessor, cluster_model, "trend", "overspending", source="watch")
+    assert [h["source"] for h in registry.history()] == ["reload", "watch"]
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        second.cluster_model = None
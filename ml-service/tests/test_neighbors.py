@@ -0,0 +1,43 @@
+import numpy as np
+
+import models.neighbors as neighbors
+from models.clustering import SpendingClusterModel
+from models.neighbors import PROFILE_CATEGORIES, PeerIndex
+from pipeline.data_loader import DataLoader
+
+
+def test_blocked_query_matches_exact_search(monkeypatch):
+    monkeypatch.setattr(neighbors, "QUERY_BLOCK_SIZE", 7)  # Several blocks plus a partial one
+    rng = np.random.default_rng(0)
+    points = rng.random((300, 9)) * 100
+    queries = rng.random((25, 9)) * 100
+
+    distances, indices = PeerIndex(points).query(queries, k=5)
+    exact = np.linalg.norm(queries[:, None, :] - points[None, :, :], axis=2)
+    np.testing.assert_array_equal(indices, np.argsort(exact, axis=1)[:, :5])
+    np.testing.assert_allclose(distances, np.sort(exact, axis=1)[:, :5])
+
+    # k larger than the index returns every row
+    _, indices = PeerIndex(points[:3]).query(queries[:2], k=10)
+    assert sorted(indices[0]) == [0, 1, 2]
+
+
+def test_similar_peers_profile_and_persistence(fitted_models, tmp_path):
+    preprocessor, cluster_model = fitted_models
+    df = DataLoader().load_dataset().head(3)
+    X = preprocessor.prepare_for_clustering(preprocessor.engineer_features(df))
+    profiles = cluster_model.similar_peers(X, k=10)
+    assert len(profiles) == 3
+    for profile in profiles:
+        assert profile["k"] == 10
+        assert list(profile["spending_ratios"]) == PROFILE_CATEGORIES
+        assert abs(sum(profile["persona_share"].values()) - 1) < 1e-9
+
+    # Training rows are their own nearest peers
+    distances, _ = cluster_model.peer_index.query(X, k=1)
+    np.testing.assert_allclose(distances[:, 0], 0, atol=1e-6)
+
+    path = str(tmp_path / "model.joblib")
+    cluster_model.save(path)
+    loaded = SpendingClusterModel.load(path)
+    assert loaded.similar_peers(X, k=10) == profiles
@@ -0,0 +1,38 @@
+import json
+
+import numpy as np
+
+from synthetic_data import DEFAULT_BUDGET, generate_user_transactions
+from main import InsightResponse
+from pipeline.data_loader import DataLoader
+from pipeline.insights import build_insights
+from models.trend import TrendAnalyzer
+from models.overspending import OverspendingPredictor
+from serving.responses import NumpyJSONResponse, dumps
+
+
+def test_dumps_encodes_numpy_values():
+    content = {"a": np.float64(1.5), "b": np.int64(3), "c": np.bool_(True), "d": np.arange(3)}
+    assert json.loads(dumps(content)) == {"a": 1.5, "b": 3, "c": True, "d": [0, 1, 2]}
+
+
+def test_insight_body_matches_typed_response_model(fitted_models):
+    preprocessor, cluster_model = fitted_models
+    budget = {category: amount / 2 for category, amount in DEFAULT_BUDGET.items()}
+    result = build_insights(
+        generate_user_transactions(400, seed=2, months=3),
+        budget,
+        DataLoader(),
+        preprocessor,
+        cluster_model,
+        TrendAnalyzer(),
+        OverspendingPredictor(),
+    )
+
+    body = NumpyJSONResponse({"user_id": "u1", **result}).body
+    parsed = InsightResponse.model_validate_json(body)
+
+    assert parsed.persona is not None and parsed.overspending_risks.category_risks
+    assert parsed.trends.overall is not None
+    # The typed model neither drops nor renames fields
+    assert json.loads(parsed.model_dump_json()) == json.loads(body)
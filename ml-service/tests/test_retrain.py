@@ -0,0 +1,47 @@
+from datetime import date, datetime
+
+import numpy as np
+
+from create_local_store import create_store
+from models.clustering import SpendingClusterModel
+from pipeline.retrain import align_clusters, export_user_month_features, retrain
+
+
+def test_export_skips_deleted_rows_and_current_month(tmp_path):
+    conn = create_store(str(tmp_path / "store.db"), n_users=3, transactions_per_user=200,
+                        end_date=datetime(2025, 6, 20))
+    before = export_user_month_features(conn, months=3, today=date(2025, 6, 20))
+
+    conn.execute("UPDATE transactions SET is_deleted = 1 WHERE category = 'food'")
+    after = export_user_month_features(conn, months=3, today=date(2025, 6, 20))
+
+    months = sorted(before.index.get_level_values("month").unique())
+    assert months == ["2025-03", "2025-04", "2025-05"]
+    assert before["food"].sum() > 0 and after["food"].sum() == 0
+    np.testing.assert_allclose(after["transportation"], before["transportation"])
+
+
+def test_align_clusters_restores_reference_numbering(fitted_models):
+    preprocessor, reference = fitted_models
+    centers = reference.model.cluster_centers_
+    X = centers.repeat(20, axis=0) + np.random.default_rng(0).normal(0, 0.5, (len(centers) * 20, centers.shape[1]))
+
+    candidate = SpendingClusterModel(n_clusters=reference.n_clusters)
+    candidate.fit(X[::-1])
+    align_clusters(candidate, reference)
+
+    assert np.mean(candidate.predict(X) == reference.predict(X)) > 0.95
+
+
+def test_retrain_writes_report_and_only_saves_accepted(tmp_path, fitted_models):
+    _, reference = fitted_models
+    reference_path = str(tmp_path / "current.joblib")
+    reference.save(reference_path)
+    create_store(str(tmp_path / "store.db"), n_users=30, transactions_per_user=150).close()
+
+    output = tmp_path / "candidate.joblib"
+    report = retrain(f"sqlite:///{tmp_path / 'store.db'}", reference_path, str(output), months=3)
+
+    assert report["rows"] > 0
+    assert "label_agreement" in report and "inertia_ratio" in report
+    assert output.exists() == report["accepted"]
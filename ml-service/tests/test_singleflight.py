@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from serving.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_computation_and_errors():
+    async def scenario():
+        flight = SingleFlight("test_single_flight")
+        calls = []
+
+        async def compute(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            if value == "boom":
+                raise ValueError("boom")
+            return value
+
+        results = await asyncio.gather(*(flight.do("k", lambda: compute("ok")) for _ in range(5)))
+        errors = await asyncio.gather(
+            *(flight.do("e", lambda: compute("boom")) for _ in range(3)), return_exceptions=True
+        )
+        return calls, results, errors, len(flight)
+
+    calls, results, errors, in_flight = asyncio.run(scenario())
+
+    assert calls == ["ok", "boom"]
+    assert results == ["ok"] * 5
+    assert all(isinstance(e, ValueError) for e in errors)
+    assert in_flight == 0
+
+
+def test_cancelled_waiter_does_not_cancel_shared_computation():
+    async def scenario():
+        flight = SingleFlight("test_single_flight")
+        started = asyncio.Event()
+
+        async def compute():
+            started.set()
+            await asyncio.sleep(0.02)
+            return 42
+
+        leader = asyncio.create_task(flight.do("k", compute))
+        await started.wait()
+        follower = asyncio.create_task(flight.do("k", compute))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        result = await follower
+
+        # With every waiter gone the computation itself is cancelled
+        lone = asyncio.create_task(flight.do("x", compute))
+        await asyncio.sleep(0.005)
+        task = flight._flights["x"].task
+        lone.cancel()
+        await asyncio.gather(lone, return_exceptions=True)
+        await asyncio.sleep(0)
+        return result, task.cancelled()
+
+    result, lone_cancelled = asyncio.run(scenario())
+    assert result == 42
+    assert lone_cancelled
@@ -0,0 +1,52 @@
+import asyncio
+from datetime import date, datetime
+
+import pytest
+from fastapi import HTTPException
+
+import main
+from create_local_store import create_store
+from pipeline.transaction_store import create_transaction_store
+
+USER_ID = "00000000-0000-0000-0000-000000000000"
+
+
+def test_sqlite_store_fetches_window_and_budget(tmp_path):
+    path = tmp_path / "store.db"
+    conn = create_store(str(path), n_users=2, transactions_per_user=100, end_date=datetime(2025, 6, 20))
+    conn.execute("UPDATE transactions SET is_deleted = 1 WHERE user_id = ? AND category = 'food'", (USER_ID,))
+    conn.commit()
+    conn.close()
+
+    async def fetch():
+        store = create_transaction_store(f"sqlite:///{path}")
+        await store.connect()
+        try:
+            return (
+                await store.fetch_transactions(USER_ID, date(2025, 4, 1), date(2025, 5, 31)),
+                await store.fetch_budget(USER_ID, "2025-06"),
+            )
+        finally:
+            await store.close()
+
+    transactions, budget = asyncio.run(fetch())
+
+    assert transactions
+    assert all("2025-04-01" <= t["date"] <= "2025-05-31" for t in transactions)
+    assert all(t["category"] != "food" for t in transactions)
+    assert set(transactions[0]) == {"date", "amount", "category", "description", "merchant", "time_slot"}
+    assert budget["food"] > 0
+
+
+@pytest.mark.parametrize("api_key, user_id, status", [
+    (None, USER_ID, 401),
+    ("wrong", USER_ID, 401),
+    ("dev-secret-key", "not-a-uuid", 400),
+])
+def test_by_user_requires_api_key_and_uuid(monkeypatch, api_key, user_id, status):
+    monkeypatch.delenv("ML_API_SECRET_KEY", raising=False)
+    monkeypatch.setattr(main, "transaction_store", object())
+    request = main.InsightByUserRequest(user_id=user_id)
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(main.generate_insights_by_user(request, None, x_api_key=api_key))
+    assert e.value.status_code == status
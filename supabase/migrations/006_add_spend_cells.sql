@@ -0,0 +1,31 @@
+-- Migration: 006_add_spend_cells.sql
+-- Pre-aggregated spending for the ML service's aggregated endpoints
+-- (/predict/insights/aggregated, /coaching/message/aggregated,
+--  /coaching/peer-comparison/aggregated)
+
+-- One row per (month, category, time_slot) of the calling user's
+-- non-deleted transactions since p_start. Runs with the caller's
+-- privileges, so the transactions RLS policies still apply.
+CREATE OR REPLACE FUNCTION public.get_spend_cells(p_start DATE, p_end DATE DEFAULT NULL)
+RETURNS TABLE (
+    month TEXT,
+    category TEXT,
+    time_slot TEXT,
+    amount NUMERIC,
+    count BIGINT
+) AS $$
+    SELECT to_char(t.date, 'YYYY-MM') AS month,
+           t.category,
+           t.time_slot,
+           SUM(t.amount) AS amount,
+           COUNT(*) AS count
+    FROM public.transactions t
+    WHERE t.user_id = auth.uid()
+      AND COALESCE(t.is_deleted, false) = false
+      AND t.date >= p_start
+      AND (p_end IS NULL OR t.date <= p_end)
+    GROUP BY 1, 2, 3
+    ORDER BY 1, 2, 3;
+$$ LANGUAGE sql STABLE SECURITY INVOKER;
+
+GRANT EXECUTE ON FUNCTION public.get_spend_cells(DATE, DATE) TO authenticated;
@@ -0,0 +1,10 @@
+-- Migration: 007_add_anomaly_insight_type.sql
+-- Allow the ML service's 'transaction_anomaly' insights (unusually large
+-- single purchases) in ai_insights; /api/insights/generate inserts all of
+-- a user's insights in one statement, so a single anomaly would otherwise
+-- make the whole insert fail the CHECK constraint
+
+ALTER TABLE public.ai_insights DROP CONSTRAINT IF EXISTS ai_insights_type_check;
+ALTER TABLE public.ai_insights ADD CONSTRAINT ai_insights_type_check
+  CHECK (type IN ('overspending', 'trend_increase', 'trend_decrease', 'savings_opportunity',
+                  'category_warning', 'spending_persona', 'transaction_anomaly'));
@@ -1,10 +1,13 @@
+import { CoachingMessage, PeerComparisonMessage } from "./coaching";
+
 export type InsightType = 
   | "overspending"
   | "trend_increase"
   | "trend_decrease"
   | "savings_opportunity"
   | "category_warning"
-  | "spending_persona";
+  | "spending_persona"
+  | "transaction_anomaly";
 
 export type InsightSeverity = "info" | "warning" | "critical";
 
@@ -34,6 +37,46 @@ export interface MLInsightRequest {
   current_month_budget?: Record<string, number>;
 }
 
+/**
+ * Request for /predict/insights/by-user: the ML service reads the
+ * transactions and budgets itself
+ */
+export interface MLInsightByUserRequest {
+  user_id: string;
+  start_date?: string;
+  end_date?: string;
+  months?: number;
+  current_month_budget?: Record<string, number>;
+}
+
+/**
+ * Request for /predict/dashboard: insights, coaching message and peer
+ * comparison computed from one transaction list
+ */
+export interface MLDashboardRequest {
+  user_id: string;
+  transactions: Array<{
+    date: string;
+    amount: number;
+    category: string;
+    description?: string;
+    merchant?: string | null;
+    time_slot?: string | null;
+  }>;
+  current_month_budget?: Record<string, number>;
+  birth_year?: number; // peer comparison is skipped without it
+  period?: string; // YYYY-MM, defaults to the current month
+}
+
+// One row of the get_spend_cells RPC (pre-aggregated spending)
+export interface MLSpendCell {
+  month: string; // YYYY-MM
+  category: string;
+  time_slot: string | null;
+  amount: number;
+  count: number;
+}
+
 export interface MLInsightResponse {
   insights: Array<{
     type: InsightType;
@@ -51,3 +94,9 @@ export interface MLInsightResponse {
   };
 }
 
+export interface MLDashboardResponse {
+  user_id: string;
+  insights: MLInsightResponse;
+  coaching: CoachingMessage;
+  peer_comparison: PeerComparisonMessage | null;
+}